@@ -0,0 +1,56 @@
+"""Full text search
+
+Revision ID: 033b8d544b3b
+Revises: ae8894d915af
+Create Date: 2026-10-18 10:12:41.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '033b8d544b3b'
+down_revision: Union[str, None] = 'ae8894d915af'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of src.arabic.normalize_arabic_sql('arabic') at the time of this revision
+ARABIC_NORMALIZED = "translate(regexp_replace(coalesce(arabic, ''), '[\u064b-\u065f\u0670\u06d6-\u06ed\u0640]', '', 'g'), '\u0623\u0625\u0622\u0671\u0624\u0626\u0649\u0629', '\u0627\u0627\u0627\u0627\u0648\u064a\u064a\u0647')"
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.add_column('verses', sa.Column(
+        'arabic_normalized', sa.String(),
+        sa.Computed(ARABIC_NORMALIZED, persisted=True), nullable=True
+    ))
+    op.add_column('verses', sa.Column(
+        'english_tsv', postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('english'::regconfig, coalesce(english, ''))", persisted=True), nullable=True
+    ))
+    op.add_column('verses', sa.Column(
+        'arabic_tsv', postgresql.TSVECTOR(),
+        sa.Computed(f"to_tsvector('simple'::regconfig, {ARABIC_NORMALIZED})", persisted=True), nullable=True
+    ))
+
+    op.create_index('ix_verses_english_tsv', 'verses', ['english_tsv'], postgresql_using='gin')
+    op.create_index('ix_verses_arabic_tsv', 'verses', ['arabic_tsv'], postgresql_using='gin')
+    # Trigram indexes back the fuzzy (substring / typo tolerant) fallback in text_search
+    op.create_index('ix_verses_english_trgm', 'verses', ['english'],
+                    postgresql_using='gin', postgresql_ops={'english': 'gin_trgm_ops'})
+    op.create_index('ix_verses_arabic_normalized_trgm', 'verses', ['arabic_normalized'],
+                    postgresql_using='gin', postgresql_ops={'arabic_normalized': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_verses_arabic_normalized_trgm', table_name='verses')
+    op.drop_index('ix_verses_english_trgm', table_name='verses')
+    op.drop_index('ix_verses_arabic_tsv', table_name='verses')
+    op.drop_index('ix_verses_english_tsv', table_name='verses')
+    op.drop_column('verses', 'arabic_tsv')
+    op.drop_column('verses', 'english_tsv')
+    op.drop_column('verses', 'arabic_normalized')
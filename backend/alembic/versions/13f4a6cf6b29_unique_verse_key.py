@@ -0,0 +1,48 @@
+"""Unique verse key
+
+Revision ID: 13f4a6cf6b29
+Revises: dc43b9894c92
+Create Date: 2026-10-18 11:48:05.271390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '13f4a6cf6b29'
+down_revision: Union[str, None] = 'dc43b9894c92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Earlier seed_db.py runs inserted without a key, so a database seeded twice holds every verse
+    # twice. Keep the oldest copy of each (min id), repoint its topic links, then drop the rest.
+    # Rows with a NULL key part are never duplicates as far as the UNIQUE constraint goes; leave them.
+    op.execute("""
+        CREATE TEMPORARY TABLE duplicate_verses ON COMMIT DROP AS
+        SELECT id, min(id) OVER (PARTITION BY surah_id, verse_number) AS keep_id FROM verses
+        WHERE surah_id IS NOT NULL AND verse_number IS NOT NULL
+    """)
+    op.execute("DELETE FROM duplicate_verses WHERE id = keep_id")
+    op.execute("""
+        UPDATE verse_topics SET verse_id = duplicate_verses.keep_id
+        FROM duplicate_verses WHERE verse_topics.verse_id = duplicate_verses.id
+    """)
+    # Both copies may have carried the same topic
+    op.execute("""
+        DELETE FROM verse_topics a USING verse_topics b
+        WHERE a.ctid > b.ctid AND a.verse_id = b.verse_id AND a.topic_id IS NOT DISTINCT FROM b.topic_id
+          AND a.verse_id IN (SELECT keep_id FROM duplicate_verses)
+    """)
+    op.execute("DELETE FROM verses USING duplicate_verses WHERE verses.id = duplicate_verses.id")
+
+    # (surah_id, verse_number) is the natural key; seed_db.py upserts on it so reruns keep verse ids
+    op.create_unique_constraint('uq_verses_surah_verse', 'verses', ['surah_id', 'verse_number'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_verses_surah_verse', 'verses', type_='unique')
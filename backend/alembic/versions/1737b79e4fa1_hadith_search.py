@@ -0,0 +1,115 @@
+"""Hadith search
+
+Revision ID: 1737b79e4fa1
+Revises: cc6021a58a17
+Create Date: 2026-10-18 14:05:19.472630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+from src.config import PGVECTOR
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1737b79e4fa1'
+down_revision: Union[str, None] = 'cc6021a58a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of src.arabic.normalize_arabic_sql('arabic') at the time of this revision
+ARABIC_NORMALIZED = "translate(regexp_replace(coalesce(arabic, ''), '[\u064b-\u065f\u0670\u06d6-\u06ed\u0640]', '', 'g'), '\u0623\u0625\u0622\u0671\u0624\u0626\u0649\u0629', '\u0627\u0627\u0627\u0627\u0648\u064a\u064a\u0647')"
+
+# Must match verses.embedding; hadiths are searched with the same query vector
+EMBEDDING_DIM = 384
+# VECTOR_SEARCH_BACKEND=memory stores plain double precision[] and builds no HNSW index
+EMBEDDING = Vector(EMBEDDING_DIM) if PGVECTOR else postgresql.ARRAY(sa.Float())
+STAGED_EMBEDDING = Vector() if PGVECTOR else postgresql.ARRAY(sa.Float())
+
+
+def upgrade() -> None:
+    # Hadiths seeded before this key existed may be there twice; keep the oldest copy of each
+    # (min id), move its topic and narrator links over, then drop the rest (as unique_verse_key does)
+    op.execute("""
+        CREATE TEMPORARY TABLE duplicate_hadiths ON COMMIT DROP AS
+        SELECT id, min(id) OVER (PARTITION BY collection_id, hadith_number) AS keep_id FROM hadiths
+        WHERE collection_id IS NOT NULL AND hadith_number IS NOT NULL
+    """)
+    op.execute("DELETE FROM duplicate_hadiths WHERE id = keep_id")
+    for links, other in (('hadith_topics', 'topic_id'), ('hadith_narrators', 'narrator_id')):
+        op.execute(f"""
+            UPDATE {links} SET hadith_id = duplicate_hadiths.keep_id
+            FROM duplicate_hadiths WHERE {links}.hadith_id = duplicate_hadiths.id
+        """)
+        # Both copies may have carried the same link
+        op.execute(f"""
+            DELETE FROM {links} a USING {links} b
+            WHERE a.ctid > b.ctid AND a.hadith_id = b.hadith_id AND a.{other} IS NOT DISTINCT FROM b.{other}
+              AND a.hadith_id IN (SELECT keep_id FROM duplicate_hadiths)
+        """)
+    op.execute("DELETE FROM hadiths USING duplicate_hadiths WHERE hadiths.id = duplicate_hadiths.id")
+
+    op.add_column('hadiths', sa.Column('embedding', EMBEDDING, nullable=True))
+    op.add_column('hadiths', sa.Column('embedding_model_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('hadiths_embedding_model_id_fkey', 'hadiths', 'embedding_models', ['embedding_model_id'], ['id'])
+    op.add_column('hadiths', sa.Column(
+        'arabic_normalized', sa.String(),
+        sa.Computed(ARABIC_NORMALIZED, persisted=True), nullable=True
+    ))
+    op.add_column('hadiths', sa.Column(
+        'english_tsv', postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('english'::regconfig, coalesce(english, ''))", persisted=True), nullable=True
+    ))
+    op.add_column('hadiths', sa.Column(
+        'arabic_tsv', postgresql.TSVECTOR(),
+        sa.Computed(f"to_tsvector('simple'::regconfig, {ARABIC_NORMALIZED})", persisted=True), nullable=True
+    ))
+
+    op.create_unique_constraint('uq_hadiths_collection_number', 'hadiths', ['collection_id', 'hadith_number'])
+    op.create_index('ix_hadiths_grading', 'hadiths', ['grading'])
+    op.create_index('ix_hadith_narrators_narrator_hadith', 'hadith_narrators', ['narrator_id', 'hadith_id'])
+    op.create_index('ix_hadiths_english_tsv', 'hadiths', ['english_tsv'], postgresql_using='gin')
+    op.create_index('ix_hadiths_arabic_tsv', 'hadiths', ['arabic_tsv'], postgresql_using='gin')
+    op.create_index('ix_hadiths_english_trgm', 'hadiths', ['english'],
+                    postgresql_using='gin', postgresql_ops={'english': 'gin_trgm_ops'})
+    op.create_index('ix_hadiths_arabic_normalized_trgm', 'hadiths', ['arabic_normalized'],
+                    postgresql_using='gin', postgresql_ops={'arabic_normalized': 'gin_trgm_ops'})
+    if PGVECTOR:
+        op.create_index(
+            'ix_hadiths_embedding_hnsw', 'hadiths', ['embedding'],
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding': 'vector_cosine_ops'}
+        )
+
+    op.create_table('hadith_embeddings',
+    sa.Column('hadith_id', sa.Integer(), nullable=False),
+    sa.Column('model_id', sa.Integer(), nullable=False),
+    sa.Column('embedding', STAGED_EMBEDDING, nullable=False),
+    sa.ForeignKeyConstraint(['hadith_id'], ['hadiths.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['model_id'], ['embedding_models.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('hadith_id', 'model_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('hadith_embeddings')
+    if PGVECTOR:
+        op.drop_index('ix_hadiths_embedding_hnsw', table_name='hadiths')
+    op.drop_index('ix_hadiths_arabic_normalized_trgm', table_name='hadiths')
+    op.drop_index('ix_hadiths_english_trgm', table_name='hadiths')
+    op.drop_index('ix_hadiths_arabic_tsv', table_name='hadiths')
+    op.drop_index('ix_hadiths_english_tsv', table_name='hadiths')
+    op.drop_index('ix_hadith_narrators_narrator_hadith', table_name='hadith_narrators')
+    op.drop_index('ix_hadiths_grading', table_name='hadiths')
+    op.drop_constraint('uq_hadiths_collection_number', 'hadiths', type_='unique')
+    op.drop_column('hadiths', 'arabic_tsv')
+    op.drop_column('hadiths', 'english_tsv')
+    op.drop_column('hadiths', 'arabic_normalized')
+    op.drop_constraint('hadiths_embedding_model_id_fkey', 'hadiths', type_='foreignkey')
+    op.drop_column('hadiths', 'embedding_model_id')
+    op.drop_column('hadiths', 'embedding')
@@ -0,0 +1,32 @@
+"""Corpus version
+
+Revision ID: 3e8fcc6ac411
+Revises: 1737b79e4fa1
+Create Date: 2026-10-18 15:21:44.083916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e8fcc6ac411'
+down_revision: Union[str, None] = '1737b79e4fa1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('corpus_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO corpus_version (id, version) VALUES (1, 1)")
+
+
+def downgrade() -> None:
+    op.drop_table('corpus_version')
@@ -0,0 +1,57 @@
+"""Hadith chunks
+
+Revision ID: 5b1e0c7d9a42
+Revises: 3e8fcc6ac411
+Create Date: 2026-10-18 17:02:31.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects import postgresql
+
+from src.config import PGVECTOR
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e0c7d9a42'
+down_revision: Union[str, None] = '3e8fcc6ac411'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match hadiths.embedding; chunks are searched with the same query vector
+EMBEDDING_DIM = 384
+# VECTOR_SEARCH_BACKEND=memory stores plain double precision[] and builds no HNSW index
+EMBEDDING = Vector(EMBEDDING_DIM) if PGVECTOR else postgresql.ARRAY(sa.Float())
+
+
+def upgrade() -> None:
+    op.create_table('hadith_chunks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('hadith_id', sa.Integer(), nullable=False),
+    sa.Column('chunk_index', sa.Integer(), nullable=False),
+    sa.Column('char_start', sa.Integer(), nullable=False),
+    sa.Column('char_end', sa.Integer(), nullable=False),
+    sa.Column('source_hash', sa.String(length=40), nullable=False),
+    sa.Column('embedding', EMBEDDING, nullable=True),
+    sa.Column('embedding_model_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['embedding_model_id'], ['embedding_models.id'], ),
+    sa.ForeignKeyConstraint(['hadith_id'], ['hadiths.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('hadith_id', 'chunk_index', name='uq_hadith_chunks_hadith_chunk')
+    )
+    if PGVECTOR:
+        op.create_index(
+            'ix_hadith_chunks_embedding_hnsw', 'hadith_chunks', ['embedding'],
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding': 'vector_cosine_ops'}
+        )
+
+
+def downgrade() -> None:
+    if PGVECTOR:
+        op.drop_index('ix_hadith_chunks_embedding_hnsw', table_name='hadith_chunks')
+    op.drop_table('hadith_chunks')
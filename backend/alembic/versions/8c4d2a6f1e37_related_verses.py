@@ -0,0 +1,41 @@
+"""Related verses
+
+Revision ID: 8c4d2a6f1e37
+Revises: 5b1e0c7d9a42
+Create Date: 2026-10-18 18:40:12.604137
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4d2a6f1e37'
+down_revision: Union[str, None] = '5b1e0c7d9a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('related_verses',
+    sa.Column('verse_id', sa.Integer(), nullable=False),
+    sa.Column('source', sa.String(length=8), nullable=False),
+    sa.Column('rank', sa.SmallInteger(), nullable=False),
+    sa.Column('neighbour_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['verse_id'], ['verses.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('verse_id', 'source', 'rank')
+    )
+    op.create_table('related_members',
+    sa.Column('source', sa.String(length=8), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('digest', sa.String(length=16), nullable=False),
+    sa.PrimaryKeyConstraint('source', 'row_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('related_members')
+    op.drop_table('related_verses')
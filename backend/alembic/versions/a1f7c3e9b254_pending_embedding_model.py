@@ -0,0 +1,27 @@
+"""Pending embedding model
+
+Revision ID: a1f7c3e9b254
+Revises: 8c4d2a6f1e37
+Create Date: 2026-10-18 21:05:37.418220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1f7c3e9b254'
+down_revision: Union[str, None] = '8c4d2a6f1e37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('embedding_models',
+                  sa.Column('is_pending', sa.Boolean(), server_default=sa.text('false'), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('embedding_models', 'is_pending')
@@ -0,0 +1,66 @@
+"""Embedding model registry
+
+Revision ID: cc6021a58a17
+Revises: 13f4a6cf6b29
+Create Date: 2026-10-18 12:37:52.904417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects import postgresql
+
+from src.config import PGVECTOR
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cc6021a58a17'
+down_revision: Union[str, None] = '13f4a6cf6b29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same type as verses.embedding (double precision[] for VECTOR_SEARCH_BACKEND=memory)
+STAGED_EMBEDDING = Vector() if PGVECTOR else postgresql.ARRAY(sa.Float())
+
+
+def upgrade() -> None:
+    op.create_table('embedding_models',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('dimension', sa.Integer(), nullable=False),
+    sa.Column('normalized', sa.Boolean(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.add_column('verses', sa.Column('embedding_model_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('verses_embedding_model_id_fkey', 'verses', 'embedding_models', ['embedding_model_id'], ['id'])
+    op.create_table('verse_embeddings',
+    sa.Column('verse_id', sa.Integer(), nullable=False),
+    sa.Column('model_id', sa.Integer(), nullable=False),
+    sa.Column('embedding', STAGED_EMBEDDING, nullable=False),
+    sa.ForeignKeyConstraint(['model_id'], ['embedding_models.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['verse_id'], ['verses.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('verse_id', 'model_id')
+    )
+
+    # Vectors already stored came from all-MiniLM-L6-v2 (see the pgvector_embeddings revision)
+    op.execute("""
+        INSERT INTO embedding_models (name, dimension, normalized, is_active)
+        SELECT 'sentence-transformers/all-MiniLM-L6-v2', 384, false, true
+        WHERE EXISTS (SELECT 1 FROM verses WHERE embedding IS NOT NULL)
+    """)
+    op.execute("""
+        UPDATE verses SET embedding_model_id = (SELECT id FROM embedding_models WHERE is_active)
+        WHERE embedding IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('verse_embeddings')
+    op.drop_constraint('verses_embedding_model_id_fkey', 'verses', type_='foreignkey')
+    op.drop_column('verses', 'embedding_model_id')
+    op.drop_table('embedding_models')
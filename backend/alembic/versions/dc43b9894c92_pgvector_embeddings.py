@@ -0,0 +1,50 @@
+"""pgvector embeddings
+
+Revision ID: dc43b9894c92
+Revises: 033b8d544b3b
+Create Date: 2026-10-18 11:03:27.640915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.config import PGVECTOR
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dc43b9894c92'
+down_revision: Union[str, None] = '033b8d544b3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# all-MiniLM-L6-v2, the model used to encode queries
+EMBEDDING_DIM = 384
+
+
+def upgrade() -> None:
+    if not PGVECTOR:
+        # VECTOR_SEARCH_BACKEND=memory: embeddings stay double precision[], no extension needed
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    # float8[] -> vector(n). Rows embedded with a model of another dimension cannot be
+    # compared with query embeddings anyway; they are cleared and must be re-seeded.
+    op.execute(f"""
+        ALTER TABLE verses ALTER COLUMN embedding TYPE vector({EMBEDDING_DIM})
+        USING CASE WHEN array_length(embedding, 1) = {EMBEDDING_DIM}
+                   THEN embedding::vector({EMBEDDING_DIM}) END
+    """)
+    op.create_index(
+        'ix_verses_embedding_hnsw', 'verses', ['embedding'],
+        postgresql_using='hnsw',
+        postgresql_with={'m': 16, 'ef_construction': 64},
+        postgresql_ops={'embedding': 'vector_cosine_ops'}
+    )
+
+
+def downgrade() -> None:
+    if not PGVECTOR:
+        return
+    op.drop_index('ix_verses_embedding_hnsw', table_name='verses')
+    op.execute("ALTER TABLE verses ALTER COLUMN embedding TYPE double precision[] USING embedding::real[]::double precision[]")
@@ -0,0 +1,153 @@
+"""Latency, memory and agreement of the query encoder backends.
+
+    python benchmarks/bench_encoder.py
+    python benchmarks/bench_encoder.py --threads 2 --backends torch onnx-int8 --repeat 50
+
+Exports the model to ONNX (float32 and int8) in a scratch directory, then
+loads each backend in a fresh interpreter, the way an API worker does, and
+times single-query encodes and a batch of queries. Peak RSS is that
+interpreter's, so the torch row includes importing torch and the onnx rows
+show what a worker costs without it. Every backend is pinned to the same
+thread count. Cosine agreement is measured against the torch vectors.
+
+Results are written as JSON named after the current git commit.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import resource
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.bench_search import QUERIES, _git_commit, _percentiles
+from src.config import EMBEDDING_MODEL, EMBEDDING_ONNX_THREADS
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def load(backend: str, model_name: str, directory: str, threads: int):
+    if backend == "torch":
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        torch.set_num_threads(threads)
+        return SentenceTransformer(model_name, device="cpu")
+    from src.services.onnx_encoder import OnnxEncoder
+
+    return OnnxEncoder(directory, quantized=backend == "onnx-int8", threads=threads)
+
+
+def measure(args) -> dict:
+    """Runs in the child interpreter: load one backend, time it and save its vectors"""
+    started = time.perf_counter()
+    model = load(args.worker, args.model, args.directory, args.threads)
+    model.encode(["warmup"])
+    loaded = time.perf_counter() - started
+
+    single = []
+    for _ in range(args.repeat):
+        for query in QUERIES:
+            began = time.perf_counter()
+            model.encode(query)
+            single.append(time.perf_counter() - began)
+    batch, texts = [], (QUERIES * (args.batch // len(QUERIES) + 1))[:args.batch]
+    for _ in range(args.repeat):
+        began = time.perf_counter()
+        model.encode(texts)
+        batch.append(time.perf_counter() - began)
+
+    np.save(args.vectors, np.asarray(model.encode(QUERIES), dtype=np.float32))
+    return {
+        "backend": args.worker,
+        "load_s": round(loaded, 2),
+        "single": _percentiles(single),
+        f"batch_{args.batch}": _percentiles(batch),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+
+def run(args) -> list:
+    from src.services.onnx_encoder import export
+
+    results, vectors = [], {}
+    with tempfile.TemporaryDirectory() as root:
+        directory = args.onnx_dir or export(args.model, os.path.join(root, "onnx"), quantize=True)
+        for backend in args.backends:
+            path = os.path.join(root, f"{backend}.npy")
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", backend, "--vectors", path,
+                 "--model", args.model, "--directory", directory, "--threads", str(args.threads),
+                 "--repeat", str(args.repeat), "--batch", str(args.batch)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            vectors[backend] = np.load(path)
+            results.append(result)
+
+    reference = vectors.get("torch")
+    for result in results:
+        if reference is not None:
+            cosine = _cosine(vectors[result["backend"]], reference)
+            result["cosine_vs_torch"] = {"min": round(float(cosine.min()), 5), "mean": round(float(cosine.mean()), 5)}
+        print(f"{result['backend']:>9}: single p50 {result['single']['p50_ms']} ms, "
+              f"batch of {args.batch} p50 {result[f'batch_{args.batch}']['p50_ms']} ms, "
+              f"peak RSS {result['peak_rss_mb']} MB, load {result['load_s']} s"
+              + (f", cosine vs torch min {result['cosine_vs_torch']['min']}" if "cosine_vs_torch" in result else ""))
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the torch and ONNX query encoders")
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--onnx-dir", help="Existing export to use instead of exporting to a scratch directory")
+    parser.add_argument("--threads", type=int, default=EMBEDDING_ONNX_THREADS, help="Intra-op threads per encode")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the query set")
+    parser.add_argument("--batch", type=int, default=32, help="Queries per encode for the batch timing")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/encoder-<commit>.json)")
+    # Internal: run one backend in this interpreter and print its result
+    parser.add_argument("--worker", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--directory", help=argparse.SUPPRESS)
+    parser.add_argument("--vectors", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.worker:
+        print(json.dumps(measure(args)))
+        return 0
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "model": args.model, "threads": args.threads, "repeat": args.repeat, "batch": args.batch,
+            "queries": len(QUERIES),
+        },
+        "results": run(args),
+    }
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), "results",
+                                         f"encoder-{report['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""Latency / throughput benchmark for GET /search.
+
+    python benchmarks/bench_search.py --database-url postgresql://localhost/baseera_bench
+    python benchmarks/bench_search.py ... --compare benchmarks/results/<older-commit>.json
+
+Runs offline against a local Postgres (with pgvector). The database is
+filled with a fixed corpus: all 6,236 verses (synthetic text unless --quran
+points at a seed_db.py --save-dump file) plus synthetic hadith rows. The LLM
+is replaced by a deterministic FakeExpander and the sentence encoder by a
+HashingEncoder, so only our code and Postgres are measured. Requests go
+through the real FastAPI router in-process (httpx ASGI transport).
+
+Results (p50/p95/p99 latency, throughput per concurrency level, peak RSS of
+this process) are written as JSON named after the current git commit.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+SURAH_VERSE_COUNTS = [
+    7, 286, 200, 176, 120, 165, 206, 75, 129, 109, 123, 111, 43, 52, 99, 128, 111, 110, 98, 135,
+    112, 78, 118, 64, 77, 227, 93, 88, 69, 60, 34, 30, 73, 54, 45, 83, 182, 88, 75, 85,
+    54, 53, 89, 59, 37, 35, 38, 29, 18, 45, 60, 49, 62, 55, 78, 96, 29, 22, 24, 13,
+    14, 11, 11, 18, 12, 12, 30, 52, 52, 44, 28, 28, 20, 56, 40, 31, 50, 40, 46, 42,
+    29, 19, 36, 25, 22, 17, 19, 26, 30, 20, 15, 21, 11, 8, 8, 19, 5, 8, 8, 11,
+    11, 8, 3, 9, 5, 4, 7, 3, 6, 3, 5, 4, 5, 6,
+]
+
+QUERIES = [
+    "patience", "prayer", "zakat", "mercy", "patience in hardship", "night prayer",
+    "charity to the poor", "forgiveness of sins", "day of judgement", "parents kindness",
+    "fasting ramadan", "pilgrimage", "paradise rivers", "trust in god", "gratitude",
+    "orphans wealth", "justice witness", "repentance", "knowledge seeking", "the prophets",
+]
+
+ENCODER_NAME = "hashing-encoder"
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _synthetic_text(rng: np.random.Generator, vocabulary: list, low: int, high: int) -> str:
+    return " ".join(rng.choice(vocabulary, size=rng.integers(low, high)))
+
+
+def build_corpus(engine, args, encoder) -> dict:
+    """Reset the benchmark database and load the fixed corpus; returns its size"""
+    from sqlalchemy import insert
+    from sqlalchemy.orm import Session
+    from src.models import Base, EmbeddingModel, Hadith, HadithCollection, Surah, Verse
+
+    rng = np.random.default_rng(args.seed)
+    vocabulary = [f"w{i}" for i in range(3000)] + [w for q in QUERIES for w in q.split()] * 5
+    arabic_letters = list("ابتثجحخدذرزسشصضطظعغفقكلمنهوي")
+    arabic_words = ["".join(rng.choice(arabic_letters, size=rng.integers(2, 7))) for _ in range(2000)]
+
+    if args.quran:
+        with open(args.quran, encoding="utf-8") as f:
+            surahs = json.load(f)
+    else:
+        surahs = [
+            {
+                "id": n, "name": f"Surah {n}", "name_arabic": _synthetic_text(rng, arabic_words, 1, 2),
+                "is_makki": bool(n % 3), "verses": [
+                    {"verse_number": v, "english": _synthetic_text(rng, vocabulary, 8, 60),
+                     "arabic": _synthetic_text(rng, arabic_words, 5, 40)}
+                    for v in range(1, count + 1)
+                ]
+            }
+            for n, count in enumerate(SURAH_VERSE_COUNTS, 1)
+        ]
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        model = EmbeddingModel(name=ENCODER_NAME, dimension=encoder.dimension, normalized=False, is_active=True)
+        db.add(model)
+        db.flush()
+
+        db.execute(insert(Surah), [
+            {k: s.get(k) for k in ("id", "name", "name_arabic", "is_makki")} | {"verses_count": len(s["verses"])}
+            for s in surahs
+        ])
+        verses = [{"surah_id": s["id"], **v} for s in surahs for v in s["verses"]]
+        embeddings = encoder.encode([v["english"] or "" for v in verses])
+        db.execute(insert(Verse), [
+            {**v, "embedding": e, "embedding_model_id": model.id} for v, e in zip(verses, embeddings)
+        ])
+
+        db.execute(insert(HadithCollection), [{"id": i, "name": f"Collection {i}"} for i in range(1, 7)])
+        hadiths = [
+            {"collection_id": int(rng.integers(1, 7)), "hadith_number": i, "chapter_number": i // 50,
+             "english": _synthetic_text(rng, vocabulary, 30, 250), "arabic": _synthetic_text(rng, arabic_words, 20, 200),
+             "grading": str(rng.choice(["Sahih", "Hasan", "Da'if"]))}
+            for i in range(1, args.hadiths + 1)
+        ]
+        embeddings = encoder.encode([h["english"] for h in hadiths])
+        db.execute(insert(Hadith), [
+            {**h, "embedding": e, "embedding_model_id": model.id} for h, e in zip(hadiths, embeddings)
+        ])
+        db.commit()
+        return {"verses": len(verses), "hadiths": args.hadiths, "model_id": model.id}
+
+
+def _percentiles(latencies: list) -> dict:
+    ms = np.asarray(latencies) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+    }
+
+
+async def run_load(client, search_type: str, requests: int, concurrency: int, corpus: str = "quran") -> dict:
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get("/search", params={
+                "q": QUERIES[i % len(QUERIES)], "search_type": search_type, "corpus": corpus
+            })
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests, "concurrency": concurrency, "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2), **_percentiles(latencies),
+    }
+
+
+async def benchmark(args, corpus: dict, encoder) -> dict:
+    import httpx
+    from fastapi import FastAPI
+    from src.api.routes import search as search_routes
+    from src.database import get_async_sessionmaker, get_search_sessionmaker
+    from src.services.cache import MemoryCache, QueryCache, get_query_cache
+    from src.services.embeddings import EmbeddingProvider, get_embedding_provider
+    from src.services.llm import get_ai_client
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from benchmarks.fakes import FakeExpander
+
+    async_engine = create_async_engine(make_url(args.database_url).set(drivername="postgresql+asyncpg"))
+    sessions = async_sessionmaker(async_engine, expire_on_commit=False)
+    provider = EmbeddingProvider(ENCODER_NAME, factory=lambda name: encoder)
+    provider.load(ENCODER_NAME, corpus["model_id"], False)
+    # maxsize=0 disables caching so every request pays for expansion and encoding
+    cache = QueryCache(MemoryCache(maxsize=args.cache_size))
+    expander = FakeExpander(latency=args.llm_latency_ms / 1000)
+
+    app = FastAPI()
+    app.include_router(search_routes.router)
+    app.dependency_overrides[get_async_sessionmaker] = lambda: sessions
+    app.dependency_overrides[get_search_sessionmaker] = lambda: sessions
+    app.dependency_overrides[get_embedding_provider] = lambda: provider
+    app.dependency_overrides[get_ai_client] = lambda: expander
+    app.dependency_overrides[get_query_cache] = lambda: cache
+
+    results = {}
+    # Count application errors as failed requests instead of aborting the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for search_type in args.search_types:
+            await run_load(client, search_type, len(QUERIES), 1, args.corpus)  # warm up indexes and pools
+            results[search_type] = {
+                "sequential": await run_load(client, search_type, args.requests, 1, args.corpus),
+                "concurrent": [await run_load(client, search_type, args.requests, c, args.corpus)
+                               for c in args.concurrency],
+            }
+            print(f"{search_type:>8}: p50 {results[search_type]['sequential']['p50_ms']:.1f}ms "
+                  f"p95 {results[search_type]['sequential']['p95_ms']:.1f}ms "
+                  f"p99 {results[search_type]['sequential']['p99_ms']:.1f}ms; "
+                  + ", ".join(f"c={r['concurrency']} {r['throughput_rps']:.0f} rps" for r in results[search_type]["concurrent"]))
+    await async_engine.dispose()
+    return results
+
+
+def compare(current: dict, baseline_path: str, max_regression: float) -> bool:
+    """Print p95 / throughput deltas against an earlier result file; False if anything regressed too far"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    ok = True
+    print(f"Compared with {baseline.get('commit')} ({baseline_path}):")
+    for search_type, result in current["results"].items():
+        old = baseline.get("results", {}).get(search_type)
+        if old is None:
+            continue
+        pairs = [("p95_ms", result["sequential"]["p95_ms"], old["sequential"]["p95_ms"], False)]
+        old_concurrent = {r["concurrency"]: r for r in old["concurrent"]}
+        for r in result["concurrent"]:
+            if r["concurrency"] in old_concurrent:
+                pairs.append((f"rps@c={r['concurrency']}", r["throughput_rps"],
+                              old_concurrent[r["concurrency"]]["throughput_rps"], True))
+        for metric, new_value, old_value, higher_is_better in pairs:
+            change = (new_value - old_value) / old_value if old_value else 0.0
+            regressed = -change > max_regression if higher_is_better else change > max_regression
+            ok = ok and not regressed
+            print(f"  {search_type:>8} {metric:>10}: {old_value:10.2f} -> {new_value:10.2f} "
+                  f"({change:+.1%}){'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark /search offline")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", "postgresql://localhost/baseera_bench"),
+                        help="Scratch database; it is dropped and recreated")
+    parser.add_argument("--quran", help="seed_db.py --save-dump file to use instead of synthetic verse text")
+    parser.add_argument("--hadiths", type=int, default=7000, help="Synthetic hadith rows")
+    parser.add_argument("--search-types", nargs="+", default=["text", "semantic", "hybrid"])
+    parser.add_argument("--corpus", choices=["quran", "hadith", "all"], default="quran", help="Corpus searched by every request")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per measurement")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--vector-backend", choices=["pgvector", "memory"], default=None,
+                        help="Override VECTOR_SEARCH_BACKEND")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated LLM round-trip")
+    parser.add_argument("--cache-size", type=int, default=0, help="Query cache entries (0 = disabled)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Result file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed relative slowdown for --compare")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.vector_backend:
+        # Read by src.config at import time
+        os.environ["VECTOR_SEARCH_BACKEND"] = args.vector_backend
+
+    from sqlalchemy import create_engine
+    from benchmarks.fakes import HashingEncoder
+
+    encoder = HashingEncoder(ENCODER_NAME)
+    engine = create_engine(args.database_url)
+    started = time.perf_counter()
+    corpus = build_corpus(engine, args, encoder)
+    print(f"Loaded {corpus['verses']} verses and {corpus['hadiths']} hadiths in {time.perf_counter() - started:.1f}s")
+    engine.dispose()
+
+    from src.config import VECTOR_SEARCH_BACKEND
+    results = asyncio.run(benchmark(args, corpus, encoder))
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "vector_backend": VECTOR_SEARCH_BACKEND, "corpus": args.corpus, "requests": args.requests,
+            "concurrency": args.concurrency, "llm_latency_ms": args.llm_latency_ms,
+            "cache_size": args.cache_size, "seed": args.seed,
+        },
+        "corpus": {"verses": corpus["verses"], "hadiths": corpus["hadiths"]},
+        "results": results,
+        # ru_maxrss is KiB on Linux; this process only, Postgres is not included
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Peak RSS {report['peak_rss_mb']} MB; results written to {output}")
+
+    if args.compare and not compare(report, args.compare, args.max_regression):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Recall / latency trade-off of the quantized embedding snapshots.
+
+    python benchmarks/bench_snapshot.py
+    python benchmarks/bench_snapshot.py --rows 200000 --rerank 0 2 4 8
+    python benchmarks/bench_snapshot.py --snapshot /var/lib/baseera/snapshots/hadiths-3
+
+Writes float32, float16 and int8 snapshots of one corpus to a scratch
+directory, memory-maps each one the way the API workers do, and times
+top-k search for single queries and for a batch. Recall@k is measured
+against exact float32 search. The corpus is synthetic (clustered, like
+sentence embeddings) unless --snapshot points at a snapshot the ingest
+scripts wrote, whose float32 vectors are then used.
+
+Results are written as JSON named after the current git commit.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.bench_search import _git_commit, _percentiles
+
+
+def synthetic_corpus(rows: int, dimension: int, clusters: int, rng: np.random.Generator):
+    centres = rng.normal(size=(clusters, dimension))
+    vectors = centres[rng.integers(clusters, size=rows)] + 0.6 * rng.normal(size=(rows, dimension))
+    return np.arange(1, rows + 1), vectors.astype(np.float32)
+
+
+def _recall(hits, expected) -> float:
+    found = sum(len({row_id for row_id, _ in h} & {row_id for row_id, _ in e}) for h, e in zip(hits, expected))
+    return found / max(1, sum(len(e) for e in expected))
+
+
+def _time(index, queries: np.ndarray, k: int, batch: int) -> dict:
+    latencies = []
+    for start in range(0, len(queries), batch):
+        began = time.perf_counter()
+        index.search_many(queries[start:start + batch], k=k)
+        latencies.append(time.perf_counter() - began)
+    return _percentiles(latencies)
+
+
+def run(args, ids: np.ndarray, vectors: np.ndarray) -> list:
+    from src.services.embedding_snapshot import snapshot_path, write_snapshot
+    from src.services.vector_index import VectorIndex, load_snapshot_index
+
+    rng = np.random.default_rng(args.seed + 1)
+    # Queries near the corpus, like real questions about it
+    queries = vectors[rng.integers(len(vectors), size=args.queries)] + 0.8 * rng.normal(size=(args.queries, vectors.shape[1]))
+    exact = VectorIndex.from_rows(zip(ids.tolist(), vectors)).search_many(queries, k=args.k)
+    signature = (0, len(ids), int(ids[-1]))
+
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        for dtype in args.dtypes:
+            path = write_snapshot(snapshot_path("bench", 0, root), ids, vectors, signature, dtype)
+            scanned = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)
+                          if name in (("vectors.npy",) if dtype == "float32" else ("codes.npy", "scales.npy")))
+            for rerank in ([0] if dtype == "float32" else args.rerank):
+                index = load_snapshot_index("bench", signature, rerank=rerank, root=root)
+                hits = index.search_many(queries, k=args.k)
+                result = {
+                    "dtype": dtype,
+                    "rerank": rerank,
+                    f"recall@{args.k}": round(_recall(hits, exact), 4),
+                    "scanned_mb": round(scanned / 2 ** 20, 2),
+                    "single": _time(index, queries, args.k, 1),
+                    f"batch_{args.batch}": _time(index, queries, args.k, args.batch),
+                }
+                results.append(result)
+                print(f"{dtype:>7} rerank {rerank:>2}: recall@{args.k} {result[f'recall@{args.k}']:.4f}, "
+                      f"{result['scanned_mb']} MB scanned, single p50 {result['single']['p50_ms']} ms, "
+                      f"batch of {args.batch} p50 {result[f'batch_{args.batch}']['p50_ms']} ms")
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark quantized embedding snapshots offline")
+    parser.add_argument("--snapshot", help="Existing snapshot directory to take the float32 vectors from")
+    parser.add_argument("--rows", type=int, default=50000, help="Synthetic corpus rows")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200, help="Topics in the synthetic corpus")
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=64, help="Queries per search_many call for the batch timing")
+    parser.add_argument("--dtypes", nargs="+", default=["float32", "float16", "int8"])
+    parser.add_argument("--rerank", type=int, nargs="+", default=[0, 2, 4, 8], help="Re-rank factors to try")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Result file (default benchmarks/results/snapshot-<commit>.json)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.snapshot:
+        path = os.path.realpath(args.snapshot)
+        ids, vectors = np.load(os.path.join(path, "ids.npy")), np.load(os.path.join(path, "vectors.npy"))
+    else:
+        ids, vectors = synthetic_corpus(args.rows, args.dimension, args.clusters, np.random.default_rng(args.seed))
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "snapshot": args.snapshot, "rows": len(ids), "dimension": vectors.shape[1], "queries": args.queries,
+            "k": args.k, "batch": args.batch, "seed": args.seed,
+        },
+        "results": run(args, ids, vectors),
+    }
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), "results",
+                                         f"snapshot-{report['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""Offline stand-ins for the LLM and the sentence encoder.
+
+Both are deterministic, so benchmark runs on different commits see exactly
+the same inputs and only the code under test changes.
+"""
+import asyncio
+import hashlib
+import re
+from types import SimpleNamespace
+from typing import List, Union
+
+import numpy as np
+
+EXPANSIONS = {
+    "patience": "sabr perseverance endurance steadfastness hardship trial",
+    "prayer": "salah worship prostration dua remembrance",
+    "zakat": "charity alms giving wealth poor",
+    "mercy": "rahma compassion forgiveness kindness",
+}
+
+
+def expand(messages: List[dict]) -> str:
+    query = messages[-1]["content"].rsplit(":", 1)[-1].strip()
+    extra = " ".join(EXPANSIONS.get(word, "") for word in query.lower().split())
+    return f"{query} {extra}".strip()
+
+
+class FakeExpander:
+    """Quacks like AsyncOpenAI for chat.completions.create; appends canned related terms.
+
+    With stream=True the completion arrives word by word, `latency` spread across the words.
+    """
+
+    def __init__(self, latency: float = 0.0, fail: bool = False):
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, model: str, messages: List[dict], stream: bool = False, **kwargs):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("fake LLM is down")
+        content = expand(messages)
+        if stream:
+            return self._stream(content.split(" "))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    async def _stream(self, words: List[str]):
+        for i, word in enumerate(words):
+            if self.latency:
+                await asyncio.sleep(self.latency / len(words))
+            delta = SimpleNamespace(content=word if i == 0 else f" {word}")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+def fake_llm_app(latency: float = 0.0):
+    """OpenAI-compatible /v1/chat/completions (plain and SSE streaming) backed by expand().
+
+    Serve it for a real client with LLM_BASE_URL=http://localhost:8099/v1 and
+    `uvicorn benchmarks.fakes:llm_app --port 8099`, or mount it in-process through
+    httpx.ASGITransport.
+    """
+    import json
+    import time
+
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse, StreamingResponse
+    from starlette.routing import Route
+
+    async def completions(request: Request):
+        body = await request.json()
+        content = expand(body["messages"])
+        common = {"id": "chatcmpl-fake", "created": int(time.time()), "model": body["model"]}
+        if not body.get("stream"):
+            await asyncio.sleep(latency)
+            return JSONResponse({**common, "object": "chat.completion", "choices": [{
+                "index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content},
+            }]})
+
+        words = content.split(" ")
+
+        async def events():
+            for i, word in enumerate(words):
+                await asyncio.sleep(latency / len(words))
+                chunk = {**common, "object": "chat.completion.chunk", "choices": [{
+                    "index": 0, "finish_reason": None, "delta": {"content": word if i == 0 else f" {word}"},
+                }]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return Starlette(routes=[Route("/v1/chat/completions", completions, methods=["POST"])])
+
+
+llm_app = fake_llm_app()
+
+
+class HashingEncoder:
+    """Feature-hashing bag-of-words encoder with the SentenceTransformer call signature"""
+
+    def __init__(self, name: str = "hashing-encoder", dimension: int = 384):
+        self.name = name
+        self.dimension = dimension
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            digest = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+            vector[digest % self.dimension] += 1.0 if digest & (1 << 63) else -1.0
+        return vector
+
+    def encode(self, texts: Union[str, List[str]], normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        matrix = np.stack([self._encode_one(t) for t in ([texts] if single else texts)])
+        if normalize_embeddings:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix /= np.where(norms == 0, 1, norms)
+        return matrix[0] if single else matrix
@@ -1,11 +1,74 @@
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from src.models import Base
-from src.database import engine
-from src.api.routes import search
+from fastapi.responses import JSONResponse, PlainTextResponse
+from src.config import (
+    CORPUS_VERSION_POLL, EMBEDDING_REGISTRY_POLL, HTTP_CACHE_MAX_AGE, METRICS_ENABLED, QUERY_CACHE_TTL,
+    RESPONSE_CACHE_SIZE, SERVER_TIMING, SLOW_REQUEST_MS
+)
+from src.database import SearchSessionLocal, async_engine, ping, pool_stats, search_engine
+from src.api.http_cache import ResponseCacheMiddleware
+from src.api.timing import TimingMiddleware
+from src.api.routes import search, verses
+from src.services.cache import MemoryCache
+from src.services.corpus_version import corpus_version, watch_corpus_version
+from src.services.embedding_registry import load_active_model, watch_active_model
+from src.services.embeddings import embedding_provider
+from src.services.metrics import metrics
+from src.services.surahs import surah_cache
+from src.services.vector_index import hadith_chunk_index, hadith_index, verse_index
+
+def drop_corpus_caches(version: int):
+    """A new ingest landed: forget everything derived from the old corpus"""
+    surah_cache.invalidate()
+    verse_index.invalidate()
+    hadith_index.invalidate()
+    hadith_chunk_index.invalidate()
+
+corpus_version.on_change(drop_corpus_caches)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load and warm the embedding model once per worker, before serving traffic.
+    # It must be the model the stored vectors were built with; startup fails otherwise.
+    # Both are read where search reads (the replica, if any), so they never run ahead of its data
+    async with SearchSessionLocal() as db:
+        await load_active_model(embedding_provider, db)
+        await corpus_version.refresh(db)
+    watchers = [
+        asyncio.create_task(watch_active_model(embedding_provider, SearchSessionLocal, EMBEDDING_REGISTRY_POLL)),
+        asyncio.create_task(watch_corpus_version(corpus_version, SearchSessionLocal, CORPUS_VERSION_POLL)),
+    ]
+    yield
+    for watcher in watchers:
+        watcher.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await watcher
+    await async_engine.dispose()
+    await search_engine.dispose()
 
 # Create FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# ETag / Cache-Control / in-process response cache for corpus reads, keyed on the corpus version.
+# Added before CORS so CORS stays outermost and also decorates cached and 304 responses.
+app.add_middleware(
+    ResponseCacheMiddleware,
+    tracker=corpus_version,
+    cache=MemoryCache(maxsize=RESPONSE_CACHE_SIZE, ttl=QUERY_CACHE_TTL),
+    max_age=HTTP_CACHE_MAX_AGE,
+)
+
+# Stage timings; outside the cache so cache hits and 304s are measured too
+if METRICS_ENABLED or SERVER_TIMING or SLOW_REQUEST_MS:
+    app.add_middleware(
+        TimingMiddleware,
+        record_metrics=METRICS_ENABLED,
+        server_timing=SERVER_TIMING,
+        slow_ms=SLOW_REQUEST_MS,
+    )
 
 # Add CORS middleware
 app.add_middleware(
@@ -18,10 +81,37 @@ app.add_middleware(
 
 # Include routers
 app.include_router(search.router)
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
+app.include_router(verses.router)
 
 @app.get("/")
 def read_root():
-    return {"message": "Welcome to Baseera AI API"}    
\ No newline at end of file
+    return {"message": "Welcome to Baseera AI API"}
+
+@app.get("/ready")
+def ready():
+    """Readiness probe: only route traffic here once the model is warm"""
+    if not embedding_provider.is_ready:
+        return JSONResponse(status_code=503, content={"status": "loading"})
+    return {"status": "ready"}
+
+@app.get("/health")
+async def health():
+    """Everything a search needs: the primary, the search replica and the warm model, plus pool usage"""
+    engines = {"database": async_engine}
+    if search_engine is not async_engine:
+        engines["search_database"] = search_engine
+    errors = dict(zip(engines, await asyncio.gather(*(ping(db_engine) for db_engine in engines.values()))))
+    checks = {name: error or "ok" for name, error in errors.items()}
+    checks["model"] = "ready" if embedding_provider.is_ready else "loading"
+
+    healthy = not any(errors.values()) and embedding_provider.is_ready
+    return JSONResponse(
+        status_code=200 if healthy else 503,
+        content={"status": "ok" if healthy else "unavailable", "checks": checks, "pools": pool_stats()},
+    )
+
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics():
+        """Prometheus scrape endpoint"""
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,57 @@
+"""Build the related-verses graph served by GET /api/verses/{id}/related.
+
+    python scripts/build_related.py          # recompute what changed since the last build
+    python scripts/build_related.py --full   # start over, e.g. after changing RELATED_K
+
+seed_db.py, seed_hadith.py and reembed.py run the incremental build after
+every ingest, so this is only needed by hand for --full. Each verse keeps its
+RELATED_K nearest verses and RELATED_K nearest hadiths under the active model.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+from sqlalchemy import select
+from src.database import SessionLocal
+from src.models import EmbeddingModel
+from src.services.corpus_version import bump_corpus_version
+from src.services.related import build_related
+
+
+def update_related(model_id: int, full: bool = False) -> None:
+    """Bring the graph up to date with the model's vectors and bump the corpus version if it changed"""
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        verses, neighbours = build_related(db, model_id, full=full)
+        if verses:
+            bump_corpus_version(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    print(f"Related verses: recomputed {verses} verses ({neighbours} neighbours) in {time.perf_counter() - started:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the related-verses graph")
+    parser.add_argument('--full', action='store_true', help="Recompute every verse, not just the affected ones")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        model_id = db.scalar(select(EmbeddingModel.id).filter(EmbeddingModel.is_active))
+    finally:
+        db.close()
+    if model_id is None:
+        sys.exit("No active embedding model; run seed_db.py first")
+    update_related(model_id, args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Fail when importing the API app gets slower or starts pulling in heavy packages.
+
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --budget-ms 800 --top 15
+
+Workers boot by importing main, so this is the cold-start cost paid before the
+lifespan loads the model. The import runs in a fresh interpreter under
+`python -X importtime`; the check fails if it takes longer than the budget
+(IMPORT_TIME_BUDGET_MS) or if any of HEAVY_PACKAGES got imported, since those
+belong behind the embedding provider and the LLM client, loaded on first use.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+from typing import Dict, NamedTuple, Optional, Set
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_TIME_BUDGET_MS = float(os.getenv('IMPORT_TIME_BUDGET_MS', 1500))
+HEAVY_PACKAGES = (
+    "torch", "sentence_transformers", "transformers", "sklearn", "scipy", "onnxruntime", "tokenizers",
+    "openai", "langchain", "chromadb",
+)
+
+_line = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+class ImportProfile(NamedTuple):
+    total_ms: float  # cumulative time of the top-level imports, interpreter start-up included
+    by_package: Dict[str, float]  # self time summed per top-level package, ms
+    modules: Set[str]
+
+
+def profile(module: str = "main", env: Optional[Dict[str, str]] = None) -> ImportProfile:
+    """Import `module` in a fresh interpreter, with `env` added to this process's environment"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, env={**os.environ, **(env or {})},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    total, by_package, modules = 0, Counter(), set()
+    for match in _line.finditer(result.stderr):
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), len(match[3]), match[4]
+        modules.add(name)
+        by_package[name.split(".")[0]] += self_us / 1000
+        if indent == 1:
+            total += cumulative_us
+    return ImportProfile(total / 1000, dict(by_package), modules)
+
+
+def heavy(modules: Set[str]) -> Set[str]:
+    return {name.split(".")[0] for name in modules if name.split(".")[0] in HEAVY_PACKAGES}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the API's import time against a budget")
+    parser.add_argument('--module', default='main')
+    parser.add_argument('--budget-ms', type=float, default=IMPORT_TIME_BUDGET_MS)
+    parser.add_argument('--top', type=int, default=10, help="Slowest packages to list")
+    args = parser.parse_args(argv)
+
+    result = profile(args.module)
+    for package, ms in sorted(result.by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{ms:8.1f} ms  {package}")
+    print(f"import {args.module}: {result.total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failures = []
+    if heavy(result.modules):
+        failures.append(f"imported at startup: {', '.join(sorted(heavy(result.modules)))}")
+    if result.total_ms > args.budget_ms:
+        failures.append(f"over budget by {result.total_ms - args.budget_ms:.0f} ms")
+    if failures:
+        sys.exit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Export a query encoder to ONNX for EMBEDDING_BACKEND=onnx.
+
+    python scripts/export_onnx.py                       # EMBEDDING_MODEL, int8 unless EMBEDDING_ONNX_QUANTIZE=false
+    python scripts/export_onnx.py --model sentence-transformers/all-mpnet-base-v2 --no-quantize
+
+Writes the float32 model (and the int8 one) with its tokenizer and pooling
+settings under EMBEDDING_ONNX_DIR, where the API's workers look for them.
+Workers export a missing model themselves on first load, but that needs torch;
+run this before activating a model with reembed.py so API nodes never do.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+from src.config import EMBEDDING_MODEL, EMBEDDING_ONNX_DIR, EMBEDDING_ONNX_QUANTIZE
+from src.services.onnx_encoder import export, export_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a sentence-transformers model to ONNX")
+    parser.add_argument('--model', default=EMBEDDING_MODEL)
+    parser.add_argument('--output-dir', default=EMBEDDING_ONNX_DIR)
+    parser.add_argument('--quantize', action=argparse.BooleanOptionalAction, default=EMBEDDING_ONNX_QUANTIZE,
+                        help="Also write the int8 dynamically quantized model")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    directory = export(args.model, export_path(args.model, args.output_dir), quantize=args.quantize)
+    print(f"Exported {args.model} to {directory} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
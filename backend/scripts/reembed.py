@@ -0,0 +1,277 @@
+"""Re-embed the corpus with a new model without taking search down.
+
+    python scripts/reembed.py --model sentence-transformers/all-mpnet-base-v2
+    python scripts/reembed.py --model sentence-transformers/all-mpnet-base-v2 --activate
+
+Vectors are staged in verse_embeddings and hadith_embeddings in small
+committed batches, so the run can be interrupted and resumed, while the API
+keeps serving the active model from the embedding columns. --activate stages
+whatever is left and marks the model pending: running workers load it next to
+the active one at their next registry poll (EMBEDDING_REGISTRY_POLL). After
+--warmup seconds, one short transaction moves the staged vectors into
+verses.embedding and hadiths.embedding and marks the model active, and the
+workers switch on their next search. A new dimension is prepared beforehand in
+a second column with a concurrently built index, so the swap only renames it.
+Hadith chunks are then re-embedded with the new model; until that finishes long
+hadiths are matched on their whole-row vector only.
+
+The ORM declares the embedding columns as vector(EMBEDDING_DIM), so activating
+a model of another dimension needs EMBEDDING_DIM set to it, for this run and
+for the API and ingest scripts afterwards; --activate refuses to start otherwise.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+from typing import List
+
+from sentence_transformers import SentenceTransformer
+from sqlalchemy import and_, insert, select, text, update
+from src.config import EMBEDDING_DIM, EMBEDDING_REGISTRY_POLL, PGVECTOR
+from src.database import SessionLocal, engine
+from src.models import EmbeddingModel, Hadith, HadithChunk, HadithEmbedding, Verse, VerseEmbedding
+from src.services.corpus_version import bump_corpus_version
+from src.services.embedding_registry import get_or_register_model
+from scripts.seed_db import write_snapshots
+from scripts.seed_hadith import chunk_hadiths
+from scripts.build_related import update_related
+
+
+# (table, staging table, staging foreign key) for every corpus searched with the query vector
+TARGETS = [
+    (Verse, VerseEmbedding, 'verse_id'),
+    (Hadith, HadithEmbedding, 'hadith_id'),
+]
+
+
+def stage(model: SentenceTransformer, registered: EmbeddingModel, batch_size: int) -> int:
+    """Embed rows that have no staged vector for this model yet; returns how many were staged"""
+    staged = 0
+    for source, staging, key in TARGETS:
+        staged += _stage_table(model, registered, batch_size, source, staging, key)
+    return staged
+
+
+def _stage_table(model: SentenceTransformer, registered: EmbeddingModel, batch_size: int,
+                 source, staging, key: str) -> int:
+    staged = 0
+    started = time.perf_counter()
+    staged_id = getattr(staging, key)
+    while True:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(source.id, source.english)
+                .outerjoin(staging, and_(
+                    staged_id == source.id,
+                    staging.model_id == registered.id
+                ))
+                .filter(staged_id.is_(None))
+                .order_by(source.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return staged
+
+            embeddings = model.encode(
+                [english or '' for _, english in rows],
+                batch_size=batch_size,
+                normalize_embeddings=registered.normalized
+            )
+            db.execute(insert(staging), [
+                {key: row_id, 'model_id': registered.id, 'embedding': embedding}
+                for (row_id, _), embedding in zip(rows, embeddings)
+            ])
+            db.commit()
+            staged += len(rows)
+            print(f"Staged {staged} {source.__tablename__} ({staged / (time.perf_counter() - started):.0f} rows/s)")
+        finally:
+            db.close()
+
+
+def _column_dimension(conn, table: str, column: str = 'embedding'):
+    return conn.execute(text(
+        "SELECT atttypmod FROM pg_attribute "
+        f"WHERE attrelid = '{table}'::regclass AND attname = '{column}' AND NOT attisdropped"
+    )).scalar()
+
+
+def _set_pending(model_id: int, pending: bool) -> None:
+    with engine.begin() as conn:
+        conn.execute(update(EmbeddingModel).where(EmbeddingModel.id == model_id).values(is_pending=pending))
+
+
+def _prepare_column(registered: EmbeddingModel, batch_size: int, source, staging, key: str) -> None:
+    """Build the resized column beside the live one: embedding_next, filled from staging and indexed.
+
+    Nothing here holds more than row locks or a momentary ALTER lock, so search and ingest
+    carry on; the index is built CONCURRENTLY. An interrupted run resumes where it stopped.
+    """
+    table, staging_table = source.__tablename__, staging.__tablename__
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        if _column_dimension(conn, table, 'embedding_next') not in (None, registered.dimension):
+            conn.execute(text(f"ALTER TABLE {table} DROP COLUMN embedding_next"))
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS embedding_next vector({registered.dimension})"))
+
+        filled = 0
+        while True:
+            batch = conn.execute(text(f"""
+                UPDATE {table} t SET embedding_next = s.embedding
+                FROM {staging_table} s
+                WHERE s.{key} = t.id AND s.model_id = :model_id AND t.id IN (
+                    SELECT t.id FROM {table} t JOIN {staging_table} s ON s.{key} = t.id AND s.model_id = :model_id
+                    WHERE t.embedding_next IS NULL ORDER BY t.id LIMIT :batch_size
+                )
+            """), {'model_id': registered.id, 'batch_size': batch_size}).rowcount
+            if not batch:
+                break
+            filled += batch
+            print(f"Copied {filled} {table} vectors into embedding_next")
+
+        # A CONCURRENTLY build that was interrupted leaves an invalid index behind; start it over
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS ix_{table}_embedding_next_hnsw"))
+        conn.execute(text(
+            f"CREATE INDEX CONCURRENTLY ix_{table}_embedding_next_hnsw ON {table} "
+            "USING hnsw (embedding_next vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+        ))
+
+
+def _swap(registered: EmbeddingModel, resized: List[str]) -> None:
+    """The switch itself, in one short transaction: vectors (or whole columns) and the active flag"""
+    db = SessionLocal()
+    try:
+        for source, staging, key in TARGETS:
+            table = source.__tablename__
+            if table in resized:
+                # Rows staged since _prepare_column ran, then only the model id is rewritten
+                db.execute(text(f"""
+                    UPDATE {table} t SET embedding_next = s.embedding
+                    FROM {staging.__tablename__} s
+                    WHERE s.{key} = t.id AND s.model_id = :model_id AND t.embedding_next IS NULL
+                """), {'model_id': registered.id})
+                db.execute(text(f"""
+                    UPDATE {table} t SET embedding_model_id = s.model_id
+                    FROM {staging.__tablename__} s
+                    WHERE s.{key} = t.id AND s.model_id = :model_id
+                """), {'model_id': registered.id})
+            else:
+                db.execute(text(f"""
+                    UPDATE {table} t
+                    SET embedding = s.embedding, embedding_model_id = s.model_id
+                    FROM {staging.__tablename__} s
+                    WHERE s.{key} = t.id AND s.model_id = :model_id
+                """), {'model_id': registered.id})
+            db.query(staging).filter(staging.model_id == registered.id).delete()
+
+        # Catalog-only changes last, so their ACCESS EXCLUSIVE locks are held for as short as possible
+        for table in resized:
+            db.execute(text(f"ALTER TABLE {table} DROP COLUMN embedding"))  # takes the old HNSW index with it
+            db.execute(text(f"ALTER TABLE {table} RENAME COLUMN embedding_next TO embedding"))
+            db.execute(text(f"ALTER INDEX ix_{table}_embedding_next_hnsw RENAME TO ix_{table}_embedding_hnsw"))
+        if PGVECTOR and _column_dimension(db, 'hadith_chunks') != registered.dimension:
+            # Old chunk vectors cannot even be compared with the new queries; they are re-cut after the swap
+            db.execute(text("TRUNCATE hadith_chunks"))
+
+        db.execute(update(EmbeddingModel).values(is_active=EmbeddingModel.id == registered.id, is_pending=False))
+        # Search results change with the model; cached responses must not outlive it
+        bump_corpus_version(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _resize_chunks(registered: EmbeddingModel) -> None:
+    """hadith_chunks was emptied by the swap; retype it for the new model before it is refilled"""
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        if not PGVECTOR or _column_dimension(conn, 'hadith_chunks') == registered.dimension:
+            return
+        # An empty table: retyping and indexing it are instant
+        conn.execute(text("DROP INDEX IF EXISTS ix_hadith_chunks_embedding_hnsw"))
+        conn.execute(text(f"ALTER TABLE hadith_chunks ALTER COLUMN embedding TYPE vector({registered.dimension})"))
+        conn.execute(text(
+            "CREATE INDEX ix_hadith_chunks_embedding_hnsw ON hadith_chunks "
+            "USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+        ))
+
+
+def activate(registered: EmbeddingModel, batch_size: int, warmup: float) -> None:
+    """Make the model active without a gap in search.
+
+    The model is first marked pending, and workers load it next to the active one at their next
+    registry poll. Meanwhile a dimension change is prepared beside the live columns. After
+    `warmup` seconds one short transaction swaps the vectors and the active flag; workers holding
+    the model in standby switch on their next search, the rest at their next poll.
+    """
+    _set_pending(registered.id, True)
+    try:
+        started = time.monotonic()
+        with engine.connect() as conn:
+            # double precision[] columns (VECTOR_SEARCH_BACKEND=memory) take any dimension as they are
+            resized = [source.__tablename__ for source, _, _ in TARGETS
+                       if PGVECTOR and _column_dimension(conn, source.__tablename__) != registered.dimension]
+        for source, staging, key in TARGETS:
+            if source.__tablename__ in resized:
+                _prepare_column(registered, batch_size, source, staging, key)
+        remaining = warmup - (time.monotonic() - started)
+        if remaining > 0:
+            print(f"Waiting {remaining:.0f}s for workers to load {registered.name}")
+            time.sleep(remaining)
+        _swap(registered, resized)
+    except Exception:
+        _set_pending(registered.id, False)
+        raise
+    _resize_chunks(registered)
+
+    if resized:
+        print(f"{', '.join(resized)}.embedding is now vector({registered.dimension}); "
+              f"keep EMBEDDING_DIM={registered.dimension} wherever the API and ingest scripts run")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-embed verses and hadiths with another model")
+    parser.add_argument('--model', required=True, help="sentence-transformers model name")
+    parser.add_argument('--normalize', action='store_true', help="Store L2-normalized vectors")
+    parser.add_argument('--batch-size', type=int, default=512)
+    parser.add_argument('--activate', action='store_true', help="Make the model active once everything is staged")
+    parser.add_argument('--warmup', type=float, default=2 * EMBEDDING_REGISTRY_POLL,
+                        help="Seconds API workers get to load the model before the switch")
+    args = parser.parse_args(argv)
+
+    model = SentenceTransformer(args.model)
+    db = SessionLocal()
+    try:
+        registered = get_or_register_model(db, args.model, model.get_sentence_embedding_dimension(), args.normalize)
+        db.commit()
+        db.refresh(registered)
+        db.expunge(registered)
+    finally:
+        db.close()
+
+    if registered.is_active:
+        print(f"{args.model} is already the active model")
+        return
+    if args.activate and PGVECTOR and registered.dimension != EMBEDDING_DIM:
+        # Chunking after the swap, and every later ingest, would have their writes rejected
+        raise SystemExit(
+            f"{args.model} makes {registered.dimension}-dim vectors but EMBEDDING_DIM is {EMBEDDING_DIM}; "
+            f"run with EMBEDDING_DIM={registered.dimension} and set it for the API and ingest scripts too"
+        )
+
+    print(f"Staged {stage(model, registered, args.batch_size)} new vectors for {args.model}")
+    if args.activate:
+        # Catch rows inserted since the last batch, then swap
+        stage(model, registered, args.batch_size)
+        activate(registered, args.batch_size, args.warmup)
+        chunk_hadiths(model, registered, args.batch_size)
+        write_snapshots([source for source, _, _ in TARGETS] + [HadithChunk], registered)
+        update_related(registered.id)
+        print(f"{args.model} is now active")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,91 +1,361 @@
+"""Load the Quran into the database.
+
+Pipeline: fetch -> normalize -> batch-encode -> bulk load.
+
+    python scripts/seed_db.py                                # alquran.cloud API
+    python scripts/seed_db.py --source json --path dump.json
+    python scripts/seed_db.py --source csv --path quran.csv
+    python scripts/seed_db.py --save-dump dump.json          # keep a copy for offline reruns
+
+Each surah is loaded in its own transaction and recorded in a checkpoint
+file, so a failed run resumes where it stopped. Loads are upserts on
+(surah_id, verse_number), so rerunning a surah is harmless and keeps verse ids.
+With EMBEDDING_SNAPSHOT_DIR set, the run ends by rewriting the on-disk
+embedding snapshot the API workers memory-map.
+"""
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import argparse
+import csv
+import json
+import time
+import unicodedata
+from collections import defaultdict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List
+
 import requests
 from sentence_transformers import SentenceTransformer
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert
+from src.config import EMBEDDING_MODEL, EMBEDDING_SNAPSHOT_DIR
 from src.database import SessionLocal
-from src.models import Surah, Verse
-import time
+from src.models import EmbeddingModel, Surah, Verse
+from src.services.corpus_version import bump_corpus_version
+from src.services.embedding_registry import get_or_register_model
+from src.services.embedding_snapshot import export_snapshot
+from scripts.build_related import update_related
+
+SURAH_COUNT = 114
+API_URL = "http://api.alquran.cloud/v1/surah/{}/editions/quran-uthmani,en.asad"
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".seed_checkpoint.json")
+
+
+class Stats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.seconds = defaultdict(float)
+        self.surahs = 0
+        self.verses = 0
 
-def fetch_quran_data():
-    print("Fetching Quran data...")
-    surahs = []
-    model = SentenceTransformer('sentence-transformers/paraphrase-multilingual-mpnet-base-v2')
-    
-    for surah_num in range(1, 115):  # Quran has 114 surahs
+    @contextmanager
+    def timed(self, stage):
+        start = time.perf_counter()
         try:
-            print(f"Fetching Surah {surah_num}...")
-            response = requests.get(
-                f"http://api.alquran.cloud/v1/surah/{surah_num}/editions/quran-uthmani,en.asad"
+            yield
+        finally:
+            self.seconds[stage] += time.perf_counter() - start
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        rate = self.verses / elapsed if elapsed else 0.0
+        stages = ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in self.seconds.items())
+        print(f"Loaded {self.surahs} surahs / {self.verses} verses in {elapsed:.1f}s "
+              f"({rate:.0f} verses/s; {stages})")
+
+
+# --- fetch -------------------------------------------------------------------
+
+def _fetch_surah(session: requests.Session, surah_num: int, retries: int = 3) -> Dict:
+    for attempt in range(1, retries + 1):
+        try:
+            response = session.get(API_URL.format(surah_num), timeout=30)
+            response.raise_for_status()
+            surah_data, surah_en_data = response.json()['data'][:2]  # Arabic, English
+            return {
+                'id': surah_num,
+                'name': surah_en_data['englishName'],
+                'name_arabic': surah_data['name'],
+                'is_makki': surah_data['revelationType'] == 'Meccan',
+                'verses': [
+                    {'verse_number': i, 'arabic': ayah_ar['text'], 'english': ayah_en['text']}
+                    for i, (ayah_ar, ayah_en) in enumerate(zip(surah_data['ayahs'], surah_en_data['ayahs']), 1)
+                ]
+            }
+        except (requests.RequestException, KeyError, ValueError) as e:
+            if attempt == retries:
+                raise RuntimeError(f"Surah {surah_num}: {e}") from e
+            time.sleep(2 ** attempt)
+
+
+def fetch_from_api(surah_nums: List[int], workers: int) -> Iterator[Dict]:
+    """Fetch surahs concurrently (bounded by workers), yielding them in order"""
+    session = requests.Session()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(lambda n: _fetch_surah(session, n), surah_nums)
+
+
+def _parse_bool(value):
+    if value is None or value == '':
+        return None
+    return str(value).lower() in ('1', 'true', 'meccan')
+
+
+def _group_rows(rows: Iterable[Dict]) -> List[Dict]:
+    """Flat verse rows (one per ayah) -> surah dicts"""
+    surahs: Dict[int, Dict] = {}
+    for row in rows:
+        surah_num = int(row['surah'])
+        surah = surahs.setdefault(surah_num, {
+            'id': surah_num,
+            'name': row.get('surah_name'),
+            'name_arabic': row.get('surah_name_arabic'),
+            'is_makki': _parse_bool(row.get('is_makki')),
+            'verses': []
+        })
+        surah['verses'].append({
+            'verse_number': int(row['ayah']),
+            'arabic': row.get('arabic'),
+            'english': row.get('english', row.get('text')),
+        })
+    return [surahs[n] for n in sorted(surahs)]
+
+
+def read_json(path: str) -> List[Dict]:
+    """Either a list of surah dicts with 'verses' (as written by --save-dump) or flat ayah rows"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if data and 'verses' in data[0]:
+        return data
+    return _group_rows(data)
+
+
+def read_csv(path: str) -> List[Dict]:
+    """Columns: surah, ayah, arabic, english and optionally surah_name, surah_name_arabic, is_makki"""
+    with open(path, encoding='utf-8', newline='') as f:
+        return _group_rows(csv.DictReader(f))
+
+
+# --- normalize ---------------------------------------------------------------
+
+def _clean(text):
+    return unicodedata.normalize('NFC', text).strip() if text else text
+
+
+def normalize_surah(surah: Dict) -> Dict:
+    verses = sorted(surah['verses'], key=lambda v: v['verse_number'])
+    return {
+        **surah,
+        'name': _clean(surah.get('name')),
+        'name_arabic': _clean(surah.get('name_arabic')),
+        'verses_count': len(verses),
+        'verses': [
+            {**verse, 'arabic': _clean(verse.get('arabic')), 'english': _clean(verse.get('english'))}
+            for verse in verses
+        ]
+    }
+
+
+# --- encode ------------------------------------------------------------------
+
+def encode_surahs(model: SentenceTransformer, registered: EmbeddingModel, surahs: List[Dict], batch_size: int) -> None:
+    """Embed every verse of the given surahs in one batched encode call (English text)"""
+    verses = [verse for surah in surahs for verse in surah['verses']]
+    embeddings = model.encode(
+        [verse['english'] or '' for verse in verses],
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=registered.normalized
+    )
+    for verse, embedding in zip(verses, embeddings):
+        verse['embedding'] = embedding
+        verse['embedding_model_id'] = registered.id
+
+
+def register_model(model: SentenceTransformer) -> EmbeddingModel:
+    """Record EMBEDDING_MODEL in the registry; it becomes active if nothing else is"""
+    db = SessionLocal()
+    try:
+        registered = get_or_register_model(db, EMBEDDING_MODEL, model.get_sentence_embedding_dimension(), normalized=False)
+        active = db.query(EmbeddingModel).filter(EmbeddingModel.is_active).one_or_none()
+        if active is not None and active.id != registered.id:
+            raise SystemExit(
+                f"Stored vectors use {active.name}. Switch models with scripts/reembed.py --model {EMBEDDING_MODEL}"
             )
-            data = response.json()
-            
-            if response.status_code == 200 and 'data' in data:
-                surah_data = data['data'][0]  # Arabic
-                surah_en_data = data['data'][1]  # English
-                
-                # Create Surah
-                surah = {
-                    'id': surah_num,
-                    'name': surah_en_data['englishName'],
-                    'name_arabic': surah_data['name'],
-                    'is_makki': surah_data['revelationType'] == 'Meccan',
-                    'verses_count': len(surah_data['ayahs']),
-                    'verses': []
-                }
-                
-                # Process verses
-                for i, (ayah_ar, ayah_en) in enumerate(zip(surah_data['ayahs'], surah_en_data['ayahs']), 1):
-                    # Generate embedding from English text
-                    embedding = model.encode(ayah_en['text']).tolist()
-                    
-                    verse = {
-                        'verse_number': i,
-                        'arabic': ayah_ar['text'],
-                        'english': ayah_en['text'],
-                        'embedding': embedding
-                    }
-                    surah['verses'].append(verse)
-                
-                surahs.append(surah)
-                print(f"Processed Surah {surah_num}: {surah['name']}")
-                time.sleep(1)  # Be nice to the API
-                
-        except Exception as e:
-            print(f"Error processing Surah {surah_num}: {str(e)}")
-    
-    return surahs
-
-def seed_database(surahs):
-    print("Seeding database...")
+        registered.is_active = True
+        db.commit()
+        db.refresh(registered)
+        db.expunge(registered)
+        return registered
+    finally:
+        db.close()
+
+
+# --- load --------------------------------------------------------------------
+
+# Surah columns a verse source may leave out; an upsert never overwrites them with NULL
+SURAH_METADATA = ('name', 'name_arabic', 'is_makki')
+
+
+def load_surah(surah: Dict) -> None:
+    """Upsert one surah and its verses in a single transaction"""
     db = SessionLocal()
     try:
-        # First clear existing data
-        db.query(Verse).delete()
-        db.query(Surah).delete()
-        
-        # Add new data
-        for surah_data in surahs:
-            verses = surah_data.pop('verses')
-            surah = Surah(**surah_data)
-            db.add(surah)
-            db.flush()  # Get the surah ID
-            
-            for verse_data in verses:
-                verse = Verse(surah_id=surah.id, **verse_data)
-                db.add(verse)
-        
+        surah_row = {k: surah[k] for k in ('id', 'name', 'name_arabic', 'is_makki', 'verses_count')}
+        surah_stmt = insert(Surah).values(surah_row)
+        db.execute(surah_stmt.on_conflict_do_update(
+            index_elements=[Surah.id],
+            set_={
+                'verses_count': surah_stmt.excluded.verses_count,
+                **{k: func.coalesce(surah_stmt.excluded[k], getattr(Surah, k)) for k in SURAH_METADATA},
+            }
+        ))
+
+        stmt = insert(Verse)
+        db.execute(
+            stmt.on_conflict_do_update(
+                constraint='uq_verses_surah_verse',
+                set_={
+                    'arabic': stmt.excluded.arabic,
+                    'english': stmt.excluded.english,
+                    'embedding': stmt.excluded.embedding,
+                    'embedding_model_id': stmt.excluded.embedding_model_id
+                }
+            ),
+            [{'surah_id': surah['id'], **verse} for verse in surah['verses']]
+        )
+        db.execute(delete(Verse).where(
+            Verse.surah_id == surah['id'],
+            Verse.verse_number > surah['verses_count']
+        ))
+        bump_corpus_version(db)
         db.commit()
-        print("Database seeded successfully!")
-        
-    except Exception as e:
+    except Exception:
         db.rollback()
-        print(f"Error seeding database: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+# --- snapshots ---------------------------------------------------------------
+
+def write_snapshots(tables, registered: EmbeddingModel) -> None:
+    """Rewrite the embedding snapshots workers memory-map, then bump the corpus version so they remap"""
+    if not EMBEDDING_SNAPSHOT_DIR:
+        return
+    db = SessionLocal()
+    try:
+        for table in tables:
+            path = export_snapshot(db, table, registered.id)
+            if path:
+                print(f"Wrote {table.__tablename__} snapshot {path}")
+        bump_corpus_version(db)
+        db.commit()
     finally:
         db.close()
 
+
+# --- checkpoint --------------------------------------------------------------
+
+def read_checkpoint(path: str) -> set:
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('model') != EMBEDDING_MODEL:
+        print(f"Checkpoint was written for {checkpoint.get('model')}, not {EMBEDDING_MODEL}; starting over")
+        return set()
+    return set(checkpoint['completed'])
+
+
+def write_checkpoint(path: str, completed: set) -> None:
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'model': EMBEDDING_MODEL, 'completed': sorted(completed)}, f)
+    os.replace(tmp_path, path)
+
+
+# --- pipeline ----------------------------------------------------------------
+
+def _chunks(surahs: Iterable[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    """Group whole surahs until they hold at least batch_size verses"""
+    chunk, count = [], 0
+    for surah in surahs:
+        chunk.append(surah)
+        count += len(surah['verses'])
+        if count >= batch_size:
+            yield chunk
+            chunk, count = [], 0
+    if chunk:
+        yield chunk
+
+
+def run(args) -> None:
+    stats = Stats()
+    completed = set() if args.restart else read_checkpoint(args.checkpoint)
+    if completed:
+        print(f"Resuming: {len(completed)} surahs already loaded")
+
+    if args.source == 'api':
+        pending = [n for n in range(1, SURAH_COUNT + 1) if n not in completed]
+        surahs = fetch_from_api(pending, args.workers)
+    else:
+        reader = read_json if args.source == 'json' else read_csv
+        surahs = (s for s in reader(args.path) if s['id'] not in completed)
+
+    print(f"Loading embedding model {EMBEDDING_MODEL}...")
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    registered = register_model(model)
+    dump = [] if args.save_dump else None
+
+    chunks = _chunks((normalize_surah(s) for s in surahs), args.batch_size)
+    while True:
+        with stats.timed('fetch'):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        with stats.timed('encode'):
+            encode_surahs(model, registered, chunk, args.batch_size)
+        with stats.timed('load'):
+            for surah in chunk:
+                load_surah(surah)
+                completed.add(surah['id'])
+                write_checkpoint(args.checkpoint, completed)
+                stats.surahs += 1
+                stats.verses += surah['verses_count']
+        if dump is not None:
+            dump.extend({**s, 'verses': [{k: verse[k] for k in ('verse_number', 'arabic', 'english')} for verse in s['verses']]}
+                        for s in chunk)
+        print(f"Loaded surahs {chunk[0]['id']}-{chunk[-1]['id']} "
+              f"({stats.verses / (time.perf_counter() - stats.started):.0f} verses/s)")
+
+    if dump is not None:
+        with open(args.save_dump, 'w', encoding='utf-8') as f:
+            json.dump(dump, f, ensure_ascii=False)
+    with stats.timed('snapshot'):
+        write_snapshots([Verse], registered)
+    with stats.timed('related'):
+        update_related(registered.id)
+    stats.report()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Seed the verses table")
+    parser.add_argument('--source', choices=['api', 'json', 'csv'], default='api')
+    parser.add_argument('--path', help="Dump file for --source json/csv")
+    parser.add_argument('--batch-size', type=int, default=512, help="Verses per encode batch")
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent API requests")
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT)
+    parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint and reload everything")
+    parser.add_argument('--save-dump', help="Also write the text loaded in this run to a JSON file")
+    args = parser.parse_args(argv)
+    if args.source != 'api' and not args.path:
+        parser.error("--path is required for --source json/csv")
+    return args
+
+
 if __name__ == "__main__":
-    surahs = fetch_quran_data()
-    seed_database(surahs) 
\ No newline at end of file
+    run(parse_args())
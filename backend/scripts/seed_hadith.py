@@ -0,0 +1,229 @@
+"""Load hadith collections into the database.
+
+Pipeline: read -> normalize -> batch-encode -> bulk load, like seed_db.py.
+
+    python scripts/seed_hadith.py --path data/hadith.json
+    python scripts/seed_hadith.py --path bukhari.csv
+
+Records need collection, number and text (English); book, arabic, grading and
+narrator (a name or a list of names) are optional. Loads are upserts on
+(collection_id, hadith_number), and hadiths already embedded with the active
+model are skipped, so an interrupted run is resumed by running it again.
+
+Hadiths too long for the encoder's window are then cut into overlapping
+chunks with their own vectors (src/services/chunking.py). Only hadiths whose
+text, chunk settings or model changed are re-chunked, so running the script
+again after changing CHUNK_WORDS only redoes the chunks.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import csv
+import json
+import time
+from itertools import groupby
+from typing import Dict, List
+
+from sentence_transformers import SentenceTransformer
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from src.config import EMBEDDING_MODEL
+from src.database import SessionLocal
+from src.models import EmbeddingModel, Hadith, HadithChunk, HadithCollection, Narrator, hadith_narrators
+from src.services.chunking import index_chunks
+from src.services.corpus_version import bump_corpus_version
+from scripts.seed_db import Stats, _clean, register_model, write_snapshots
+from scripts.build_related import update_related
+
+
+# --- read --------------------------------------------------------------------
+
+def _narrators(value) -> List[str]:
+    if not value:
+        return []
+    names = value if isinstance(value, list) else str(value).split(';')
+    return [name for name in (_clean(n) for n in names) if name]
+
+
+def normalize_hadith(row: Dict) -> Dict:
+    return {
+        'collection': _clean(row['collection']),
+        'hadith_number': int(row['number']),
+        'chapter_number': int(row['book']) if row.get('book') not in (None, '') else None,
+        'arabic': _clean(row.get('arabic')),
+        'english': _clean(row.get('english', row.get('text'))),
+        'grading': _clean(row.get('grading')) or None,
+        'narrators': _narrators(row.get('narrators', row.get('narrator'))),
+    }
+
+
+def read_hadiths(path: str) -> List[Dict]:
+    """JSON list or CSV (narrators separated by ';'), sorted by collection then number"""
+    with open(path, encoding='utf-8', newline='') as f:
+        rows = json.load(f) if path.endswith('.json') else list(csv.DictReader(f))
+    hadiths = [normalize_hadith(row) for row in rows]
+    return sorted(hadiths, key=lambda h: (h['collection'], h['hadith_number']))
+
+
+# --- encode ------------------------------------------------------------------
+
+def encode_hadiths(model: SentenceTransformer, registered: EmbeddingModel, hadiths: List[Dict], batch_size: int) -> None:
+    embeddings = model.encode(
+        [hadith['english'] or '' for hadith in hadiths],
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=registered.normalized
+    )
+    for hadith, embedding in zip(hadiths, embeddings):
+        hadith['embedding'] = embedding
+        hadith['embedding_model_id'] = registered.id
+
+
+def chunk_hadiths(model: SentenceTransformer, registered: EmbeddingModel, batch_size: int) -> None:
+    """Re-chunk the long hadiths whose chunks are missing or stale, one commit per call"""
+    def encode(texts):
+        return model.encode(texts, batch_size=batch_size, convert_to_numpy=True,
+                            normalize_embeddings=registered.normalized)
+
+    db = SessionLocal()
+    try:
+        documents, chunks = index_chunks(db, encode, registered.id, batch_size)
+        if documents:
+            bump_corpus_version(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    print(f"Re-chunked {documents} hadiths into {chunks} chunks")
+
+
+# --- load --------------------------------------------------------------------
+
+def _get_or_create(db, model, name: str) -> int:
+    row_id = db.scalar(select(model.id).filter(model.name == name).order_by(model.id).limit(1))
+    if row_id is None:
+        row = model(name=name)
+        db.add(row)
+        db.flush()
+        row_id = row.id
+    return row_id
+
+
+def resolve_collections(names) -> Dict[str, int]:
+    db = SessionLocal()
+    try:
+        ids = {name: _get_or_create(db, HadithCollection, name) for name in names}
+        db.commit()
+        return ids
+    finally:
+        db.close()
+
+
+def already_loaded(collection_id: int, registered: EmbeddingModel) -> set:
+    db = SessionLocal()
+    try:
+        return set(db.scalars(select(Hadith.hadith_number).filter(
+            Hadith.collection_id == collection_id,
+            Hadith.embedding_model_id == registered.id
+        )))
+    finally:
+        db.close()
+
+
+def load_hadiths(collection_id: int, hadiths: List[Dict]) -> None:
+    """Upsert one batch of a collection, with its narrator links, in a single transaction"""
+    db = SessionLocal()
+    try:
+        stmt = insert(Hadith)
+        result = db.execute(
+            stmt.on_conflict_do_update(
+                constraint='uq_hadiths_collection_number',
+                set_={
+                    'chapter_number': stmt.excluded.chapter_number,
+                    'arabic': stmt.excluded.arabic,
+                    'english': stmt.excluded.english,
+                    'grading': stmt.excluded.grading,
+                    'embedding': stmt.excluded.embedding,
+                    'embedding_model_id': stmt.excluded.embedding_model_id
+                }
+            ).returning(Hadith.id, Hadith.hadith_number, sort_by_parameter_order=True),
+            [
+                {'collection_id': collection_id,
+                 **{k: h[k] for k in ('hadith_number', 'chapter_number', 'arabic', 'english',
+                                      'grading', 'embedding', 'embedding_model_id')}}
+                for h in hadiths
+            ]
+        )
+        ids = [hadith_id for hadith_id, _ in result]
+
+        narrator_ids = {name: _get_or_create(db, Narrator, name)
+                        for name in {n for h in hadiths for n in h['narrators']}}
+        db.execute(delete(hadith_narrators).where(hadith_narrators.c.hadith_id.in_(ids)))
+        links = [{'hadith_id': hadith_id, 'narrator_id': narrator_ids[name]}
+                 for hadith_id, h in zip(ids, hadiths) for name in h['narrators']]
+        if links:
+            db.execute(hadith_narrators.insert(), links)
+        bump_corpus_version(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# --- pipeline ----------------------------------------------------------------
+
+def run(args) -> None:
+    stats = Stats()
+    hadiths = read_hadiths(args.path)
+
+    print(f"Loading embedding model {EMBEDDING_MODEL}...")
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    registered = register_model(model)
+    collection_ids = resolve_collections({h['collection'] for h in hadiths})
+
+    loaded = 0
+    for name, group in groupby(hadiths, key=lambda h: h['collection']):
+        collection_id = collection_ids[name]
+        done = set() if args.restart else already_loaded(collection_id, registered)
+        pending = [h for h in group if h['hadith_number'] not in done]
+        if done:
+            print(f"{name}: {len(done)} hadiths already loaded")
+
+        for start in range(0, len(pending), args.batch_size):
+            batch = pending[start:start + args.batch_size]
+            with stats.timed('encode'):
+                encode_hadiths(model, registered, batch, args.batch_size)
+            with stats.timed('load'):
+                load_hadiths(collection_id, batch)
+            loaded += len(batch)
+            print(f"{name}: loaded {batch[0]['hadith_number']}-{batch[-1]['hadith_number']} "
+                  f"({loaded / (time.perf_counter() - stats.started):.0f} hadiths/s)")
+
+    with stats.timed('chunk'):
+        chunk_hadiths(model, registered, args.batch_size)
+    with stats.timed('snapshot'):
+        write_snapshots([Hadith, HadithChunk], registered)
+    with stats.timed('related'):
+        update_related(registered.id)
+
+    elapsed = time.perf_counter() - stats.started
+    stages = ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in stats.seconds.items())
+    print(f"Loaded {loaded} hadiths from {len(collection_ids)} collections in {elapsed:.1f}s ({stages})")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Seed the hadiths table")
+    parser.add_argument('--path', required=True, help="JSON or CSV dump")
+    parser.add_argument('--batch-size', type=int, default=512, help="Hadiths per encode batch")
+    parser.add_argument('--restart', action='store_true', help="Re-encode and reload hadiths already loaded")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    run(parse_args())
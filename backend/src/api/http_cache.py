@@ -0,0 +1,92 @@
+import hashlib
+from typing import Optional, Tuple
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+from ..services.cache import MemoryCache
+from ..services.corpus_version import CorpusVersionTracker
+
+# GET routes whose response depends only on the URL and the corpus. A route that could not
+# produce its normal response (e.g. search that fell back to the raw query) sends
+# Cache-Control: no-store, and the response is neither stored nor given an ETag.
+CACHED_PATHS = ("/search", "/api/verses")
+# Equivalent but not byte-identical across workers (search depends on the LLM expansion): weak ETags
+WEAK_PATHS = ("/search",)
+# Never cached: live counters rather than corpus data
+UNCACHED_PATHS = ("/search/cache",)
+# Validated with ETags, but too large to keep a copy of
+STREAMED_PATHS = ("/api/verses/export",)
+
+
+def _under(path: str, prefixes: Tuple[str, ...]) -> bool:
+    return any(path == prefix or path.startswith(prefix + "/") for prefix in prefixes)
+
+
+def _cacheable(path: str) -> bool:
+    return path not in UNCACHED_PATHS and _under(path, CACHED_PATHS)
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as If-None-Match uses. "*" is not honoured: answering it before the route
+    runs would turn a 404 into a 304."""
+    if not if_none_match:
+        return False
+    return _opaque(etag) in (_opaque(tag) for tag in if_none_match.split(","))
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    """ETags, Cache-Control and an in-process response cache, all keyed on the corpus version.
+
+    A representation only changes when the corpus does, so the ETag is derived from the version
+    and the URL alone: a matching If-None-Match is answered 304 without running the route.
+    Responses marked no-store by the route pass through untouched.
+    """
+
+    def __init__(self, app, tracker: CorpusVersionTracker, cache: MemoryCache, max_age: int):
+        super().__init__(app)
+        self.tracker = tracker
+        self.cache = cache
+        self.max_age = max_age
+        # Old entries can never be hit again (their key holds the old version); free them at once
+        tracker.on_change(lambda version: cache.clear())
+
+    def _key(self, request: Request, version: int) -> Tuple[str, str]:
+        query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+        key = f"{version}:{request.url.path}?{query}"
+        etag = f'"{version}-{hashlib.sha1(key.encode()).hexdigest()[:16]}"'
+        if _under(request.url.path, WEAK_PATHS):
+            etag = f"W/{etag}"
+        return key, etag
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        version = self.tracker.value
+        if request.method != "GET" or version is None or not _cacheable(request.url.path):
+            return await call_next(request)
+
+        key, etag = self._key(request, version)
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={self.max_age}"}
+        if _matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            body, content_type = cached
+            return Response(body, headers={**headers, "content-type": content_type})
+
+        response = await call_next(request)
+        if response.status_code != 200 or "no-store" in response.headers.get("cache-control", ""):
+            return response
+        response.headers.update(headers)
+        if request.url.path in STREAMED_PATHS:
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        self.cache.set(key, (body, response.headers.get("content-type")))
+        return Response(body, headers=dict(response.headers))
@@ -1,22 +1,93 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from ...database import get_db
-from ...services.search import SearchService
-from ...schemas import SearchResponse
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from typing import TYPE_CHECKING, List, Optional
+from ...config import FUSION_CANDIDATES, FUSION_METHOD
+from ...database import get_search_sessionmaker
+from ...services.cache import QueryCache, get_query_cache
+from ...services.embeddings import EmbeddingProvider, get_embedding_provider
+from ...services.llm import get_ai_client
+from ...services.metrics import stage
+from ...services.search import SearchFilters, SearchService
+from ...schemas import BatchSearchItem, BatchSearchRequest, BatchSearchResponse, SearchResponse
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 router = APIRouter()
 
 @router.get("/search", response_model=SearchResponse)
 async def search(
+    response: Response,
     q: str = Query(..., description="Search query"),
     search_type: str = Query("hybrid", description="Search type: text, semantic, or hybrid"),
-    db: Session = Depends(get_db)
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of results"),
+    fusion: str = Query(FUSION_METHOD, pattern="^(rrf|weighted)$", description="Hybrid fusion: rrf or weighted"),
+    text_weight: float = Query(1.0, ge=0, description="Weight of the text leg in hybrid fusion"),
+    semantic_weight: float = Query(1.0, ge=0, description="Weight of the semantic leg in hybrid fusion"),
+    k: int = Query(FUSION_CANDIDATES, ge=1, le=500, description="Candidates fetched per leg before fusion"),
+    corpus: str = Query("quran", pattern="^(quran|hadith|all)$", description="Corpus to search: quran, hadith, or all"),
+    collection_id: Optional[int] = Query(None, description="Only hadiths from this collection"),
+    grading: Optional[str] = Query(None, description="Only hadiths with this grading, e.g. Sahih"),
+    narrator_id: Optional[int] = Query(None, description="Only hadiths with this narrator in the chain"),
+    surah_from: Optional[int] = Query(None, ge=1, le=114, description="Only verses from this surah on"),
+    surah_to: Optional[int] = Query(None, ge=1, le=114, description="Only verses up to this surah"),
+    revelation: Optional[str] = Query(None, pattern="^(makki|madani)$", description="Only Makki or Madani surahs"),
+    topic_id: List[int] = Query([], description="Only verses / hadiths tagged with any of these topics (repeatable)"),
+    sessions: async_sessionmaker = Depends(get_search_sessionmaker),
+    embedder: EmbeddingProvider = Depends(get_embedding_provider),
+    ai_client: "AsyncOpenAI" = Depends(get_ai_client),
+    cache: QueryCache = Depends(get_query_cache)
+):
+    search_service = SearchService(sessions, embedder, ai_client, cache)
+    results = await search_service.search(
+        q, search_type, limit,
+        fusion=fusion,
+        weights={"text": text_weight, "semantic": semantic_weight},
+        candidates=k,
+        corpus=corpus,
+        filters=SearchFilters(collection_id, grading, narrator_id, surah_from, surah_to, revelation, tuple(topic_id))
+    )
+    if search_service.degraded:
+        # Ranked on the raw query because the LLM expansion failed or ran late: keep it out of every cache
+        response.headers["Cache-Control"] = "no-store"
+
+    with stage("serialize"):
+        return SearchResponse(results=results, count=len(results))
+
+@router.post("/search/batch", response_model=BatchSearchResponse)
+async def search_batch(
+    request: BatchSearchRequest,
+    response: Response,
+    sessions: async_sessionmaker = Depends(get_search_sessionmaker),
+    embedder: EmbeddingProvider = Depends(get_embedding_provider),
+    ai_client: "AsyncOpenAI" = Depends(get_ai_client),
+    cache: QueryCache = Depends(get_query_cache)
 ):
-    search_service = SearchService(db)
-    results = await search_service.search(q, search_type)
-    
-    return {
-        "results": results,
-        "count": len(results)
-    } 
\ No newline at end of file
+    """Many queries in one request: repeated queries run once, and the semantic leg
+    encodes and scores the whole batch at once"""
+    search_service = SearchService(sessions, embedder, ai_client, cache)
+    pages = await search_service.search_batch(
+        request.queries, request.search_type, request.limit,
+        fusion=request.fusion,
+        weights={"text": request.text_weight, "semantic": request.semantic_weight},
+        candidates=request.k,
+        corpus=request.corpus,
+        filters=SearchFilters(
+            request.collection_id, request.grading, request.narrator_id,
+            request.surah_from, request.surah_to, request.revelation, tuple(request.topic_id)
+        )
+    )
+    if search_service.degraded:
+        # As for GET /search; one query ranked without its expansion is enough to keep the batch out of caches
+        response.headers["Cache-Control"] = "no-store"
+
+    with stage("serialize"):
+        return BatchSearchResponse(results=[
+            BatchSearchItem(query=query, results=results, count=len(results))
+            for query, results in zip(request.queries, pages)
+        ])
+
+@router.get("/search/cache")
+async def search_cache_stats(cache: QueryCache = Depends(get_query_cache)):
+    """Hit/miss counters for the query expansion and embedding cache"""
+    return await cache.stats()
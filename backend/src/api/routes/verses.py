@@ -1,29 +1,109 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from ...database import get_db
-from ...models import Verse
-from ...schemas import VerseResponse
+from typing import List, Optional, Tuple
+from ...database import get_async_sessionmaker, get_db, get_search_sessionmaker
+from ...models import RelatedVerse, Surah, Verse
+from ...schemas import SearchResponse, VersePage, VerseResponse
+from ...services.search import VERSE_COLUMNS, hydrate
+from ...services.surahs import surah_cache, surah_name
 
 router = APIRouter(prefix="/api/verses")
 
-@router.get("/", response_model=List[VerseResponse])
-async def get_verses(
+# Rows per server-side cursor fetch in /export
+EXPORT_BATCH_SIZE = 1000
+
+def encode_cursor(surah_id: int, verse_number: int) -> str:
+    """Opaque page token for the position after (surah_id, verse_number)"""
+    return base64.urlsafe_b64encode(json.dumps([surah_id, verse_number]).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    try:
+        surah_id, verse_number = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(surah_id), int(verse_number)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _verse_rows(db: Session, rows) -> List[dict]:
+    """Serialize column rows with surah names from the in-process cache (no join, no lazy loads)"""
+    surahs = surah_cache.get(db, {row.surah_id for row in rows})
+    return [{**row._asdict(), "surah_name": surah_name(surahs, row.surah_id)} for row in rows]
+
+# Plain def: these use the sync session, so FastAPI runs them in its threadpool off the event loop
+@router.get("/", response_model=VersePage)
+def get_verses(
     surah_id: Optional[int] = None,
-    limit: int = 10,
-    offset: int = 0,
+    limit: int = Query(10, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: Session = Depends(get_db)
 ):
-    """Get verses with pagination"""
-    query = db.query(Verse)
+    """Get verses in mushaf order, one keyset page at a time"""
+    # Seeks on the (surah_id, verse_number) unique index, so every page costs the same however deep it is
+    query = select(*VERSE_COLUMNS).order_by(Verse.surah_id, Verse.verse_number)
+    if surah_id:
+        query = query.filter(Verse.surah_id == surah_id)
+    if cursor:
+        query = query.filter(tuple_(Verse.surah_id, Verse.verse_number) > decode_cursor(cursor))
+    rows = db.execute(query.limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].surah_id, rows[-1].verse_number)
+    return {"results": _verse_rows(db, rows), "next_cursor": next_cursor}
+
+@router.get("/export")
+async def export_verses(
+    surah_id: Optional[int] = None,
+    sessions: async_sessionmaker = Depends(get_async_sessionmaker)
+):
+    """The whole corpus (or one surah) as NDJSON, streamed from a server-side cursor"""
+    query = select(*VERSE_COLUMNS).order_by(Verse.surah_id, Verse.verse_number)
     if surah_id:
         query = query.filter(Verse.surah_id == surah_id)
-    return query.offset(offset).limit(limit).all()
+
+    async def rows():
+        # The session lives as long as the stream, not the request's dependencies
+        async with sessions() as db:
+            surahs = await surah_cache.aget(db, (await db.scalars(select(Surah.id))).all())
+            result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            async for batch in result.partitions():
+                yield "".join(
+                    json.dumps({**row._asdict(), "surah_name": surah_name(surahs, row.surah_id)}, ensure_ascii=False) + "\n"
+                    for row in batch
+                )
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
 
 @router.get("/{verse_id}", response_model=VerseResponse)
-async def get_verse(verse_id: int, db: Session = Depends(get_db)):
+def get_verse(verse_id: int, db: Session = Depends(get_db)):
     """Get a specific verse"""
-    verse = db.query(Verse).filter(Verse.id == verse_id).first()
-    if not verse:
+    row = db.execute(select(*VERSE_COLUMNS).filter(Verse.id == verse_id)).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Verse not found")
-    return verse 
\ No newline at end of file
+    return _verse_rows(db, [row])[0]
+
+@router.get("/{verse_id}/related", response_model=SearchResponse)
+async def get_related(
+    verse_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    source: str = Query("all", pattern="^(quran|hadith|all)$", description="Related verses, hadiths, or both"),
+    sessions: async_sessionmaker = Depends(get_search_sessionmaker)
+):
+    """Verses and hadiths closest in meaning to a verse, from the graph built at ingest (scripts/build_related.py)"""
+    # A primary-key range read; no query expansion, encoding or vector scan per request
+    query = select(RelatedVerse.source, RelatedVerse.neighbour_id, RelatedVerse.score).filter(
+        RelatedVerse.verse_id == verse_id
+    )
+    if source != "all":
+        query = query.filter(RelatedVerse.source == source)
+    async with sessions() as db:
+        hits = (await db.execute(query.order_by(RelatedVerse.score.desc()).limit(limit))).all()
+        if not hits and await db.scalar(select(Verse.id).filter(Verse.id == verse_id)) is None:
+            raise HTTPException(status_code=404, detail="Verse not found")
+    [results] = await hydrate(sessions, [[((name, row_id), score) for name, row_id, score in hits]])
+    return SearchResponse(results=results, count=len(results))
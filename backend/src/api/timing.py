@@ -0,0 +1,49 @@
+import logging
+from time import perf_counter
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+from ..services.metrics import REQUEST_SECONDS, STAGE_SECONDS, track
+
+logger = logging.getLogger(__name__)
+
+
+def server_timing(stages: dict, total: float) -> str:
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in (*stages.items(), ("total", total)))
+
+
+class TimingMiddleware(BaseHTTPMiddleware):
+    """Per-request stage timings (see services.metrics.stage), fed to any of:
+
+    - the /metrics histograms (request duration by route template, time per search stage)
+    - a Server-Timing response header, readable in the browser's network panel
+    - a warning log line for requests slower than slow_ms, with the stage breakdown
+    """
+
+    def __init__(self, app, record_metrics: bool = True, server_timing: bool = False, slow_ms: float = 0):
+        super().__init__(app)
+        self.record_metrics = record_metrics
+        self.server_timing = server_timing
+        self.slow_ms = slow_ms
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        start = perf_counter()
+        with track() as timings:
+            response = await call_next(request)
+        total = perf_counter() - start
+
+        if self.record_metrics:
+            # The route template, not the raw path, so ids and typos do not multiply series
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.observe(total, request.method, route, str(response.status_code))
+            for name, seconds in timings.stages.items():
+                STAGE_SECONDS.observe(seconds, name)
+        if self.server_timing:
+            response.headers["Server-Timing"] = server_timing(timings.stages, total)
+        if self.slow_ms and total * 1000 >= self.slow_ms:
+            stages = " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in timings.stages.items())
+            logger.warning("Slow request %.0fms %s %s?%s [%s]", total * 1000, request.method,
+                           request.url.path, request.url.query, stages or "no stages")
+        return response
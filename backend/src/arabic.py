@@ -0,0 +1,36 @@
+"""Arabic text normalization shared by ingestion, query parsing and the database.
+
+Uthmani script carries diacritics, Quranic annotation marks, tatweel and
+several alif/hamza spellings that users never type. Both the stored text and
+the query are folded to the same plain form before matching.
+"""
+
+import re
+
+# Tashkeel, dagger alif, Quranic annotation marks and tatweel
+ARABIC_MARKS = "[\u064b-\u065f\u0670\u06d6-\u06ed\u0640]"
+
+# alif variants -> bare alif, hamza seats -> their letter, alif maksura -> ya, ta marbuta -> ha
+ARABIC_FOLD_FROM = "\u0623\u0625\u0622\u0671\u0624\u0626\u0649\u0629"
+ARABIC_FOLD_TO = "\u0627\u0627\u0627\u0627\u0648\u064a\u064a\u0647"
+
+_marks = re.compile(ARABIC_MARKS)
+_letters = re.compile("[\u0621-\u063a\u0641-\u064a\u0671-\u06d3]")
+_fold = str.maketrans(ARABIC_FOLD_FROM, ARABIC_FOLD_TO)
+
+
+def normalize_arabic(text: str) -> str:
+    return _marks.sub("", text).translate(_fold)
+
+
+def has_arabic(text: str) -> bool:
+    """True if the text contains at least one Arabic letter"""
+    return _letters.search(text) is not None
+
+
+def normalize_arabic_sql(column: str) -> str:
+    """The same normalization as a Postgres expression (immutable, usable in generated columns)"""
+    return (
+        f"translate(regexp_replace(coalesce({column}, ''), '{ARABIC_MARKS}', '', 'g'), "
+        f"'{ARABIC_FOLD_FROM}', '{ARABIC_FOLD_TO}')"
+    )
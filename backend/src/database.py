@@ -1,15 +1,94 @@
-from sqlalchemy import create_engine
+import asyncio
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from src.config import DATABASE_URL
+from sqlalchemy.pool import QueuePool
+from src.config import (
+    ASYNC_DATABASE_URL, ASYNC_SEARCH_DATABASE_URL, DATABASE_URL, DB_MAX_OVERFLOW, DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_STATEMENT_TIMEOUT_MS
+)
+from src.services.metrics import metrics
+
+POOL_OPTIONS = dict(
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
 
-engine = create_engine(DATABASE_URL)
+def _connect_args(asyncpg: bool = False) -> dict:
+    """statement_timeout on every new connection, in asyncpg's or libpq's own way"""
+    if not DB_STATEMENT_TIMEOUT_MS:
+        return {}
+    if asyncpg:
+        return {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+    return {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+
+engine = create_engine(DATABASE_URL, connect_args=_connect_args(), **POOL_OPTIONS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = create_async_engine(ASYNC_DATABASE_URL, connect_args=_connect_args(asyncpg=True), **POOL_OPTIONS)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Search reads go to the replica when one is configured; its pool is separate from the primary's
+search_engine = (
+    async_engine if ASYNC_SEARCH_DATABASE_URL == ASYNC_DATABASE_URL
+    else create_async_engine(ASYNC_SEARCH_DATABASE_URL, connect_args=_connect_args(asyncpg=True), **POOL_OPTIONS)
+)
+SearchSessionLocal = async_sessionmaker(search_engine, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    return AsyncSessionLocal
+
+def get_search_sessionmaker() -> async_sessionmaker:
+    return SearchSessionLocal
+
+def _pools() -> Dict[str, QueuePool]:
+    pools = {"primary": engine.pool, "primary_async": async_engine.sync_engine.pool}
+    if search_engine is not async_engine:
+        pools["search"] = search_engine.sync_engine.pool
+    return {name: pool for name, pool in pools.items() if isinstance(pool, QueuePool)}
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """Connections per pool; checked_out reaching capacity means requests queue for pool_timeout"""
+    return {
+        name: {
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "capacity": pool.size() + DB_MAX_OVERFLOW,
+        }
+        for name, pool in _pools().items()
+    }
+
+for _field in ("checked_out", "idle", "capacity"):
+    metrics.gauge(
+        f"baseera_db_pool_{_field}", f"Database pool connections: {_field.replace('_', ' ')}", ("pool",),
+        lambda field=_field: {(name,): stats[field] for name, stats in pool_stats().items()},
+    )
+
+async def ping(db_engine: AsyncEngine, timeout: float = 2.0) -> Optional[str]:
+    """None if the database answers SELECT 1 in time, else the reason it did not"""
+    async def select_one():
+        async with db_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    try:
+        await asyncio.wait_for(select_one(), timeout)
+    except asyncio.TimeoutError:
+        return f"no answer within {timeout:g}s"
+    except Exception as exc:
+        return f"{type(exc).__name__}: {exc}".splitlines()[0]
+    return None
@@ -1,10 +1,42 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Table, Float
-from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import BigInteger, Column, Float, Integer, SmallInteger, String, Boolean, DateTime, ForeignKey, Table, Computed, Index, UniqueConstraint, DDL, TypeDecorator, event, func
+from sqlalchemy.orm import relationship, synonym
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
 from sqlalchemy.ext.declarative import declarative_base
+from pgvector.sqlalchemy import Vector
+from .arabic import normalize_arabic_sql
+from .config import EMBEDDING_DIM, PGVECTOR
 
 Base = declarative_base()
 
+if PGVECTOR:
+    # The embedding columns need pgvector; make create_all work on a fresh database too
+    event.listen(
+        Base.metadata, "before_create",
+        DDL("CREATE EXTENSION IF NOT EXISTS vector").execute_if(dialect="postgresql")
+    )
+
+
+class FloatArray(TypeDecorator):
+    """double precision[] embedding column for VECTOR_SEARCH_BACKEND=memory; binds numpy vectors like Vector does"""
+    impl = ARRAY(Float)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else [float(x) for x in value]
+
+
+def embedding_type(dimension=None):
+    return Vector(dimension) if PGVECTOR else FloatArray()
+
+
+def hnsw_index(name: str) -> tuple:
+    """Cosine HNSW index on a table's embedding column; none without pgvector (the memory backend scans in-process)"""
+    if not PGVECTOR:
+        return ()
+    return (Index(name, 'embedding', postgresql_using='hnsw',
+                  postgresql_with={'m': 16, 'ef_construction': 64},
+                  postgresql_ops={'embedding': 'vector_cosine_ops'}),)
+
 # Association tables for many-to-many relationships
 verse_topics = Table('verse_topics', Base.metadata,
     Column('verse_id', Integer, ForeignKey('verses.id')),
@@ -18,9 +50,31 @@ hadith_topics = Table('hadith_topics', Base.metadata,
 
 hadith_narrators = Table('hadith_narrators', Base.metadata,
     Column('hadith_id', Integer, ForeignKey('hadiths.id')),
-    Column('narrator_id', Integer, ForeignKey('narrators.id'))
+    Column('narrator_id', Integer, ForeignKey('narrators.id')),
+    Index('ix_hadith_narrators_narrator_hadith', 'narrator_id', 'hadith_id')
 )
 
+class EmbeddingModel(Base):
+    """Registry of the models that produced stored vectors; exactly one is active"""
+    __tablename__ = 'embedding_models'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+    dimension = Column(Integer, nullable=False)
+    normalized = Column(Boolean, nullable=False, default=False)
+    is_active = Column(Boolean, nullable=False, default=False)
+    # Being activated by scripts/reembed.py: workers load it next to the active model ahead of the swap
+    is_pending = Column(Boolean, nullable=False, default=False, server_default='false')
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class CorpusVersion(Base):
+    """Single-row stamp bumped by every ingest; HTTP caches key on it"""
+    __tablename__ = 'corpus_version'
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class Surah(Base):
     __tablename__ = 'surahs'
     
@@ -40,21 +94,44 @@ class Verse(Base):
     verse_number = Column(Integer)
     arabic = Column(String)
     english = Column(String)
-    embedding = Column(ARRAY(Float), nullable=True)  # Make it nullable
+    embedding = Column(embedding_type(EMBEDDING_DIM), nullable=True)  # Make it nullable
+    embedding_model_id = Column(Integer, ForeignKey('embedding_models.id'), nullable=True)
+
+    # Full-text search columns, maintained by Postgres (see the full_text_search migration,
+    # which also adds pg_trgm indexes on english and arabic_normalized)
+    arabic_normalized = Column(String, Computed(normalize_arabic_sql("arabic"), persisted=True))
+    english_tsv = Column(TSVECTOR, Computed("to_tsvector('english'::regconfig, coalesce(english, ''))", persisted=True))
+    arabic_tsv = Column(TSVECTOR, Computed(f"to_tsvector('simple'::regconfig, {normalize_arabic_sql('arabic')})", persisted=True))
+
+    __table_args__ = (
+        UniqueConstraint('surah_id', 'verse_number', name='uq_verses_surah_verse'),
+        Index('ix_verses_english_tsv', 'english_tsv', postgresql_using='gin'),
+        Index('ix_verses_arabic_tsv', 'arabic_tsv', postgresql_using='gin'),
+        *hnsw_index('ix_verses_embedding_hnsw'),
+    )
     
-    surah = relationship("Surah", back_populates="verses")
+    # Many-to-one and tiny: join it in the same SELECT rather than lazy-loading per verse
+    surah = relationship("Surah", back_populates="verses", lazy="joined")
     topics = relationship("Topic", secondary="verse_topics")
 
     def to_dict(self):
         return {
             "id": self.id,
-            "surah_number": self.surah.id,
+            "surah_number": self.surah_id,
             "verse_number": self.verse_number,
             "arabic": self.arabic,
             "english": self.english,
             "surah_name": self.surah.name
         }
 
+class VerseEmbedding(Base):
+    """Vectors staged by scripts/reembed.py for a model that is not active yet"""
+    __tablename__ = 'verse_embeddings'
+
+    verse_id = Column(Integer, ForeignKey('verses.id', ondelete='CASCADE'), primary_key=True)
+    model_id = Column(Integer, ForeignKey('embedding_models.id', ondelete='CASCADE'), primary_key=True)
+    embedding = Column(embedding_type(), nullable=False)
+
 class HadithCollection(Base):
     __tablename__ = 'hadith_collections'
     
@@ -74,11 +151,77 @@ class Hadith(Base):
     arabic = Column(String)
     english = Column(String)
     grading = Column(String)
+    embedding = Column(embedding_type(EMBEDDING_DIM), nullable=True)
+    embedding_model_id = Column(Integer, ForeignKey('embedding_models.id'), nullable=True)
+
+    # Same full-text columns as Verse (see the hadith_search migration for the trigram indexes)
+    arabic_normalized = Column(String, Computed(normalize_arabic_sql("arabic"), persisted=True))
+    english_tsv = Column(TSVECTOR, Computed("to_tsvector('english'::regconfig, coalesce(english, ''))", persisted=True))
+    arabic_tsv = Column(TSVECTOR, Computed(f"to_tsvector('simple'::regconfig, {normalize_arabic_sql('arabic')})", persisted=True))
+
+    __table_args__ = (
+        UniqueConstraint('collection_id', 'hadith_number', name='uq_hadiths_collection_number'),
+        Index('ix_hadiths_grading', 'grading'),
+        Index('ix_hadiths_english_tsv', 'english_tsv', postgresql_using='gin'),
+        Index('ix_hadiths_arabic_tsv', 'arabic_tsv', postgresql_using='gin'),
+        *hnsw_index('ix_hadiths_embedding_hnsw'),
+    )
     
-    collection = relationship("HadithCollection", back_populates="hadiths")
+    collection = relationship("HadithCollection", back_populates="hadiths", lazy="joined")
     narrators = relationship("Narrator", secondary=hadith_narrators)
     topics = relationship("Topic", secondary=hadith_topics)
 
+class HadithEmbedding(Base):
+    """Hadith vectors staged by scripts/reembed.py for a model that is not active yet"""
+    __tablename__ = 'hadith_embeddings'
+
+    hadith_id = Column(Integer, ForeignKey('hadiths.id', ondelete='CASCADE'), primary_key=True)
+    model_id = Column(Integer, ForeignKey('embedding_models.id', ondelete='CASCADE'), primary_key=True)
+    embedding = Column(embedding_type(), nullable=False)
+
+class HadithChunk(Base):
+    """Overlapping passages of a hadith too long for the encoder's window, each with its own vector.
+
+    Written by src.services.chunking.index_chunks; source_hash records the text and chunking
+    settings a hadith's chunks were cut from, so unchanged hadiths are skipped on the next run.
+    """
+    __tablename__ = 'hadith_chunks'
+
+    id = Column(Integer, primary_key=True)
+    hadith_id = Column(Integer, ForeignKey('hadiths.id', ondelete='CASCADE'), nullable=False)
+    chunk_index = Column(Integer, nullable=False)
+    char_start = Column(Integer, nullable=False)  # passage = hadith.english[char_start:char_end]
+    char_end = Column(Integer, nullable=False)
+    source_hash = Column(String(40), nullable=False)
+    embedding = Column(embedding_type(EMBEDDING_DIM), nullable=True)
+    embedding_model_id = Column(Integer, ForeignKey('embedding_models.id'), nullable=True)
+
+    # The searched document, whatever the corpus (see search.Corpus)
+    document_id = synonym('hadith_id')
+
+    __table_args__ = (
+        UniqueConstraint('hadith_id', 'chunk_index', name='uq_hadith_chunks_hadith_chunk'),
+        *hnsw_index('ix_hadith_chunks_embedding_hnsw'),
+    )
+
+class RelatedVerse(Base):
+    """A verse's nearest verses and hadiths by embedding, precomputed by src.services.related"""
+    __tablename__ = 'related_verses'
+
+    verse_id = Column(Integer, ForeignKey('verses.id', ondelete='CASCADE'), primary_key=True)
+    source = Column(String(8), primary_key=True)  # "quran" or "hadith", like search results
+    rank = Column(SmallInteger, primary_key=True)
+    neighbour_id = Column(Integer, nullable=False)
+    score = Column(Float, nullable=False)
+
+class RelatedMember(Base):
+    """Digest of every vector the related_verses graph was built from, to find what changed since"""
+    __tablename__ = 'related_members'
+
+    source = Column(String(8), primary_key=True)
+    row_id = Column(Integer, primary_key=True)
+    digest = Column(String(16), nullable=False)
+
 class Narrator(Base):
     __tablename__ = 'narrators'
     
@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
+from .config import FUSION_CANDIDATES, FUSION_METHOD, SEARCH_BATCH_MAX
+
 class VerseBase(BaseModel):
     surah_id: int
     verse_number: int
@@ -9,19 +11,59 @@ class VerseBase(BaseModel):
 
 class VerseResponse(VerseBase):
     id: int
-    surah_name: str
+    surah_id: Optional[int] = None
+    surah_name: Optional[str] = None
 
     class Config:
         from_attributes = True
 
+class VersePage(BaseModel):
+    results: List[VerseResponse]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page; None on the last page
+
 class SearchResult(BaseModel):
     id: int
-    surah_number: int
-    verse_number: int
-    arabic: str
-    english: str
-    surah_name: str
+    source: str = "quran"  # "quran" or "hadith"; ids are unique per source only
+    arabic: Optional[str] = None
+    english: Optional[str] = None
+    score: Optional[float] = None
+    # Quran
+    surah_number: Optional[int] = None
+    verse_number: Optional[int] = None
+    surah_name: Optional[str] = None
+    # Hadith
+    collection: Optional[str] = None
+    hadith_number: Optional[int] = None
+    chapter_number: Optional[int] = None
+    grading: Optional[str] = None
+    narrators: Optional[List[str]] = None
+    # Semantic hit on a long hadith: the overlapping passage of `english` that matched best
+    passage: Optional[str] = None
 
 class SearchResponse(BaseModel):
     results: List[SearchResult]
-    count: int 
\ No newline at end of file
+    count: int 
+
+class BatchSearchRequest(BaseModel):
+    """POST /search/batch: the GET /search parameters, applied to every query"""
+    queries: List[str] = Field(..., min_length=1, max_length=SEARCH_BATCH_MAX)
+    search_type: str = Field("hybrid", pattern="^(text|semantic|hybrid)$")
+    limit: int = Field(10, ge=1, le=100)
+    fusion: str = Field(FUSION_METHOD, pattern="^(rrf|weighted)$")
+    text_weight: float = Field(1.0, ge=0)
+    semantic_weight: float = Field(1.0, ge=0)
+    k: int = Field(FUSION_CANDIDATES, ge=1, le=500)
+    corpus: str = Field("quran", pattern="^(quran|hadith|all)$")
+    collection_id: Optional[int] = None
+    grading: Optional[str] = None
+    narrator_id: Optional[int] = None
+    surah_from: Optional[int] = Field(None, ge=1, le=114)
+    surah_to: Optional[int] = Field(None, ge=1, le=114)
+    revelation: Optional[str] = Field(None, pattern="^(makki|madani)$")
+    topic_id: List[int] = Field(default_factory=list)
+
+class BatchSearchItem(SearchResponse):
+    query: str
+
+class BatchSearchResponse(BaseModel):
+    results: List[BatchSearchItem]  # one per query, in request order
@@ -0,0 +1,149 @@
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from ..config import (
+    QUERY_CACHE_BACKEND,
+    QUERY_CACHE_SIZE,
+    QUERY_CACHE_TTL,
+    QUERY_CACHE_URL,
+)
+
+
+def normalize_query(query: str) -> str:
+    """Cache key form of a query: NFKC, case-folded, single-spaced"""
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+class MemoryCache:
+    """Bounded in-process LRU with a per-entry TTL"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 86400, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._data[key] = (value, self._clock() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    # The interface QueryCache uses on the request path; nothing here waits on I/O
+    async def aget(self, key: str) -> Optional[bytes]:
+        return self.get(key)
+
+    async def amget(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [self.get(key) for key in keys]
+
+    async def aset(self, key: str, value: bytes) -> None:
+        self.set(key, value)
+
+    async def asize(self) -> int:
+        return len(self)
+
+
+class RedisCache:
+    """Shared cache on any Redis-protocol server (Redis, Valkey, KeyDB, ...), used from the event loop.
+
+    The size is the server's DBSIZE, so give the cache a database of its own in QUERY_CACHE_URL.
+    """
+
+    def __init__(self, url: str, ttl: float = 86400, prefix: str = "baseera:query:"):
+        import redis.asyncio
+
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.asyncio.Redis.from_url(url)
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        return await self._client.get(self.prefix + key)
+
+    async def amget(self, keys: List[str]) -> List[Optional[bytes]]:
+        return await self._client.mget([self.prefix + key for key in keys]) if keys else []
+
+    async def aset(self, key: str, value: bytes) -> None:
+        # Redis evicts by its own maxmemory-policy (use allkeys-lru); we only set the TTL
+        await self._client.set(self.prefix + key, value, ex=int(self.ttl))
+
+    async def asize(self) -> int:
+        return await self._client.dbsize()
+
+
+class QueryCache:
+    """Caches LLM query expansions and query embeddings, keyed on normalized query text"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.counters = {"expansion_hits": 0, "expansion_misses": 0, "embedding_hits": 0, "embedding_misses": 0}
+
+    def _count(self, kind: str, hit: bool) -> None:
+        self.counters[f"{kind}_{'hits' if hit else 'misses'}"] += 1
+
+    async def get_expansion(self, query: str) -> Optional[str]:
+        value = await self.backend.aget("expansion:" + normalize_query(query))
+        self._count("expansion", value is not None)
+        return value.decode("utf-8") if value is not None else None
+
+    async def set_expansion(self, query: str, expansion: str) -> None:
+        await self.backend.aset("expansion:" + normalize_query(query), expansion.encode("utf-8"))
+
+    @staticmethod
+    def _embedding_key(query: str, model_name: str) -> str:
+        return f"embedding:{model_name}:{normalize_query(query)}"
+
+    async def get_embeddings(self, queries: List[str], model_name: str) -> List[Optional[np.ndarray]]:
+        """One lookup (a single round trip on Redis) for a batch of queries"""
+        values = await self.backend.amget([self._embedding_key(query, model_name) for query in queries])
+        for value in values:
+            self._count("embedding", value is not None)
+        return [np.frombuffer(value, dtype=np.float32) if value is not None else None for value in values]
+
+    async def get_embedding(self, query: str, model_name: str) -> Optional[np.ndarray]:
+        [embedding] = await self.get_embeddings([query], model_name)
+        return embedding
+
+    async def set_embedding(self, query: str, model_name: str, embedding) -> None:
+        await self.backend.aset(self._embedding_key(query, model_name), np.asarray(embedding, dtype=np.float32).tobytes())
+
+    async def stats(self) -> Dict[str, int]:
+        return {**self.counters, "size": await self.backend.asize()}
+
+
+def _create_backend():
+    if QUERY_CACHE_BACKEND == "redis":
+        return RedisCache(QUERY_CACHE_URL, ttl=QUERY_CACHE_TTL)
+    return MemoryCache(maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL)
+
+
+query_cache = QueryCache(_create_backend())
+
+
+def get_query_cache() -> QueryCache:
+    return query_cache
@@ -0,0 +1,98 @@
+"""Overlapping passages for documents longer than the encoder's window.
+
+all-MiniLM-L6-v2 reads at most 256 word pieces and silently drops the rest, so
+a long hadith embedded whole is only searchable by its opening. Such hadiths
+also get one vector per CHUNK_WORDS-word window (windows overlap by
+CHUNK_OVERLAP words); search scores a hadith by its best row or chunk vector.
+"""
+import hashlib
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import delete, false, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from ..config import CHUNK_OVERLAP, CHUNK_WORDS
+from ..models import Hadith, HadithChunk
+
+_words = re.compile(r"\S+")
+
+
+def chunk_spans(text: Optional[str], size: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> List[Tuple[int, int]]:
+    """Character spans of overlapping `size`-word windows; [] when the text fits in one window"""
+    words = [match.span() for match in _words.finditer(text or "")]
+    if len(words) <= size:
+        return []
+    step = max(size - overlap, 1)
+    spans = []
+    for start in range(0, len(words), step):
+        window = words[start:start + size]
+        spans.append((window[0][0], window[-1][1]))
+        if start + size >= len(words):
+            break
+    return spans
+
+
+def source_hash(text: str, model_id: int, size: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> str:
+    """Changes whenever the chunks of `text` would: new text, new settings or a new model"""
+    return hashlib.sha1(f"{size}:{overlap}:{model_id}:{text}".encode("utf-8")).hexdigest()
+
+
+def index_chunks(db: Session, encode: Callable[[List[str]], np.ndarray], model_id: int,
+                 batch_size: int = 256) -> Tuple[int, int]:
+    """Re-chunk and embed the hadiths whose chunks are missing or out of date; the caller commits.
+
+    Returns (hadiths re-chunked, chunks written). Hadiths that no longer need chunks lose them.
+    """
+    current: Dict[int, str] = dict(db.execute(
+        select(HadithChunk.hadith_id, func.min(HadithChunk.source_hash)).group_by(HadithChunk.hadith_id)
+    ).all())
+    # More than CHUNK_WORDS words needs at least 2 * CHUNK_WORDS - 1 characters; skip the rest unread
+    documents = db.execute(
+        select(Hadith.id, Hadith.english).filter(or_(
+            func.length(Hadith.english) >= 2 * CHUNK_WORDS - 1,
+            Hadith.id.in_(list(current)) if current else false(),
+        )).order_by(Hadith.id)
+    ).all()
+
+    stale = []
+    for hadith_id, english in documents:
+        spans = chunk_spans(english)
+        wanted = source_hash(english, model_id) if spans else None
+        if current.get(hadith_id) != wanted:
+            stale.append((hadith_id, english, spans, wanted))
+
+    written = 0
+    for start in range(0, len(stale), batch_size):
+        batch = stale[start:start + batch_size]
+        db.execute(delete(HadithChunk).where(HadithChunk.hadith_id.in_([hadith_id for hadith_id, *_ in batch])))
+        rows = [
+            {"hadith_id": hadith_id, "chunk_index": i, "char_start": begin, "char_end": end,
+             "source_hash": wanted, "embedding_model_id": model_id}
+            for hadith_id, english, spans, wanted in batch
+            for i, (begin, end) in enumerate(spans)
+        ]
+        if rows:
+            texts = [english[begin:end] for _, english, spans, _ in batch for begin, end in spans]
+            for row, embedding in zip(rows, encode(texts)):
+                row["embedding"] = embedding
+            db.execute(insert(HadithChunk), rows)
+            written += len(rows)
+    return len(stale), written
+
+
+def best_per_document(hits: Sequence[Tuple[int, float, Optional[Tuple[int, int]]]], k: int):
+    """Max-score aggregation of row and chunk hits: ([(document id, score)], {document id: best chunk span}).
+
+    `hits` are (document id, score, span) with span None for the whole-row vector.
+    """
+    best: Dict[int, Tuple[float, Optional[Tuple[int, int]]]] = {}
+    for document_id, score, span in hits:
+        if document_id not in best or score > best[document_id][0]:
+            best[document_id] = (score, span)
+    ranked = sorted(best.items(), key=lambda item: -item[1][0])[:k]
+    return (
+        [(document_id, score) for document_id, (score, _) in ranked],
+        {document_id: span for document_id, (_, span) in ranked if span is not None},
+    )
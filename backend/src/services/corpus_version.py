@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from typing import Callable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from ..models import CorpusVersion
+
+logger = logging.getLogger(__name__)
+
+
+class CorpusVersionTracker:
+    """This worker's view of the corpus version stamp; None until read (HTTP caching stays off until then)"""
+
+    def __init__(self):
+        self.value: Optional[int] = None
+        self._listeners = []
+
+    def on_change(self, listener: Callable[[int], None]) -> None:
+        self._listeners.append(listener)
+
+    def set(self, version: Optional[int]) -> bool:
+        """Record a version read from the database; notifies listeners and returns True if it changed"""
+        if version == self.value:
+            return False
+        previous, self.value = self.value, version
+        if previous is not None:
+            for listener in self._listeners:
+                listener(version)
+        return True
+
+    async def refresh(self, db: AsyncSession) -> bool:
+        return self.set(await db.scalar(select(CorpusVersion.version).filter(CorpusVersion.id == 1)))
+
+
+async def watch_corpus_version(tracker: CorpusVersionTracker, sessions: async_sessionmaker, interval: float) -> None:
+    """Pick up ingests made by other processes (seed scripts, reembed.py)"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with sessions() as db:
+                if await tracker.refresh(db):
+                    logger.info("Corpus version is now %s", tracker.value)
+        except Exception:
+            logger.exception("Corpus version refresh failed; keeping %s", tracker.value)
+
+
+def bump_corpus_version(db: Session) -> int:
+    """Advance the stamp inside the caller's ingest transaction, so readers see data and version change together"""
+    stmt = insert(CorpusVersion).values(id=1, version=1)
+    return db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[CorpusVersion.id],
+            set_={'version': CorpusVersion.version + 1, 'updated_at': func.now()}
+        ).returning(CorpusVersion.version)
+    ).scalar()
+
+
+corpus_version = CorpusVersionTracker()
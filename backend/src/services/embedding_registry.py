@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from ..models import EmbeddingModel, Hadith, Verse
+from .embeddings import EmbeddingProvider, LoadedModel
+
+logger = logging.getLogger(__name__)
+
+# Every table searched with the same query vector; they must all hold vectors from the active model
+EMBEDDED_TABLES = (Verse, Hadith)
+
+
+class EmbeddingContractError(RuntimeError):
+    """Stored vectors and the query encoder do not agree"""
+
+
+async def get_active_model(db: AsyncSession) -> Optional[EmbeddingModel]:
+    return await db.scalar(select(EmbeddingModel).filter(EmbeddingModel.is_active))
+
+
+async def get_pending_model(db: AsyncSession) -> Optional[EmbeddingModel]:
+    return await db.scalar(select(EmbeddingModel).filter(EmbeddingModel.is_pending, EmbeddingModel.is_active.is_(False)))
+
+
+async def check_embedding_contract(db: AsyncSession, loaded: LoadedModel) -> None:
+    """Fail unless the embedding columns, the registry and the loaded encoder all describe the same vectors"""
+    for model in EMBEDDED_TABLES:
+        table = model.__tablename__
+        column_dimension = await db.scalar(text(
+            "SELECT atttypmod FROM pg_attribute "
+            f"WHERE attrelid = '{table}'::regclass AND attname = 'embedding'"
+        ))
+        if column_dimension not in (None, -1) and column_dimension != loaded.dimension:
+            raise EmbeddingContractError(
+                f"{loaded.name} produces {loaded.dimension}-dim vectors but {table}.embedding is vector({column_dimension})"
+            )
+
+    active = await get_active_model(db)
+    if active is not None and (active.id, active.dimension) != (loaded.id, loaded.dimension):
+        raise EmbeddingContractError(
+            f"Active embedding model is {active.name} ({active.dimension}-dim), "
+            f"but queries would be encoded with {loaded.name} ({loaded.dimension}-dim)"
+        )
+
+    for model in EMBEDDED_TABLES:
+        foreign = await db.scalar(
+            select(func.count(model.id)).filter(
+                model.embedding.isnot(None),
+                model.embedding_model_id.is_distinct_from(loaded.id)
+            )
+        )
+        if foreign:
+            raise EmbeddingContractError(
+                f"{foreign} {model.__tablename__} have embeddings from a model other than {loaded.name}; "
+                "re-run scripts/reembed.py"
+            )
+
+
+async def load_active_model(provider: EmbeddingProvider, db: AsyncSession) -> LoadedModel:
+    """Load the encoder the stored vectors were built with and verify the contract"""
+    active = await get_active_model(db)
+    if active is None:
+        # Empty corpus: fall back to the configured model until something is ingested
+        loaded = await run_in_threadpool(provider.load)
+    else:
+        loaded = await run_in_threadpool(provider.load, active.name, active.id, active.normalized)
+    await check_embedding_contract(db, loaded)
+    return loaded
+
+
+async def follow_registry(provider: EmbeddingProvider, db: AsyncSession) -> None:
+    """Switch to the active model if it changed, and warm up a pending one into standby.
+
+    With the pending model already in standby, search itself switches over as soon as the
+    swap commits (see SearchService._encoder) instead of waiting for the next poll.
+    """
+    active = await get_active_model(db)
+    if active is not None and active.id != provider.current.id:
+        logger.info("Switching query encoder to %s", active.name)
+        await load_active_model(provider, db)
+    pending = await get_pending_model(db)
+    if pending is not None and pending.id != provider.current.id:
+        standby = provider.standby
+        if standby is None or standby.id != pending.id:
+            logger.info("Loading %s ahead of its activation", pending.name)
+            await run_in_threadpool(provider.prepare, pending.name, pending.id, pending.normalized)
+
+
+async def watch_active_model(provider: EmbeddingProvider, sessions: async_sessionmaker, interval: float) -> None:
+    """Follow activations made by scripts/reembed.py without restarting the worker"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with sessions() as db:
+                await follow_registry(provider, db)
+        except Exception:
+            logger.exception("Embedding model refresh failed; keeping %s", provider.current.name)
+
+
+def get_or_register_model(db: Session, name: str, dimension: int, normalized: bool) -> EmbeddingModel:
+    """Registry row for a model, created (inactive) if missing; used by the ingestion scripts"""
+    model = db.query(EmbeddingModel).filter(EmbeddingModel.name == name).one_or_none()
+    if model is None:
+        model = EmbeddingModel(name=name, dimension=dimension, normalized=normalized, is_active=False)
+        db.add(model)
+        db.flush()
+    elif model.dimension != dimension:
+        raise EmbeddingContractError(f"{name} is registered as {model.dimension}-dim but produces {dimension}-dim vectors")
+    return model
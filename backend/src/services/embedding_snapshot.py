@@ -0,0 +1,144 @@
+"""On-disk embedding snapshots for the in-memory vector backend.
+
+The ingest scripts write one snapshot per (table, embedding model) and every
+worker memory-maps it, so N workers share a single copy of the vectors in the
+page cache instead of each holding its own matrix.
+
+    <EMBEDDING_SNAPSHOT_DIR>/verses-3 -> verses-3.1718000000123
+        meta.json     dtype, dimension, and the table signature it was taken at
+        ids.npy       int64 row ids
+        vectors.npy   float32 L2-normalized vectors (exact scores / re-ranking)
+        codes.npy     int8 or float16 copy of vectors (quantized snapshots only)
+        scales.npy    float32 per-vector scale (int8 only: vector ~= codes * scale)
+
+The name is a symlink swapped atomically on rewrite; a worker still mapping the
+previous generation keeps reading it until it reloads.
+"""
+import json
+import os
+import shutil
+import time
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..config import EMBEDDING_SNAPSHOT_DIR, EMBEDDING_SNAPSHOT_DTYPE
+
+SNAPSHOT_DTYPES = ("float32", "float16", "int8")
+FORMAT_VERSION = 1
+
+
+class Snapshot(NamedTuple):
+    ids: np.ndarray
+    vectors: np.ndarray
+    codes: Optional[np.ndarray]
+    scales: Optional[np.ndarray]
+    signature: Tuple
+
+
+def signature_query(model, model_id: Optional[int]):
+    """(count, max id) of the rows embedded with a model; a snapshot is current while it matches"""
+    return (
+        select(func.count(model.id), func.max(model.id))
+        .filter(model.embedding.isnot(None), model.embedding_model_id == model_id)
+    )
+
+
+def snapshot_path(table: str, model_id: Optional[int], root: str = EMBEDDING_SNAPSHOT_DIR) -> str:
+    return os.path.join(root, f"{table}-{model_id}")
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """(codes, scales) for normalized vectors; int8 is symmetric per vector, float16 needs no scale"""
+    if dtype == "float32":
+        return None, None
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"Unknown snapshot dtype {dtype!r}; expected one of {', '.join(SNAPSHOT_DTYPES)}")
+
+
+def write_snapshot(path: str, ids: np.ndarray, vectors: np.ndarray, signature: Tuple,
+                   dtype: str = EMBEDDING_SNAPSHOT_DTYPE) -> str:
+    """Write a new generation next to `path` and point `path` at it"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors = (vectors / norms).astype(np.float32)
+    codes, scales = quantize(vectors, dtype)
+
+    root, name = os.path.split(os.path.abspath(path))
+    os.makedirs(root, exist_ok=True)
+    generation = f"{name}.{time.time_ns()}"
+    directory = os.path.join(root, generation)
+    os.makedirs(directory)
+    np.save(os.path.join(directory, "ids.npy"), np.asarray(ids, dtype=np.int64))
+    np.save(os.path.join(directory, "vectors.npy"), vectors)
+    if codes is not None:
+        np.save(os.path.join(directory, "codes.npy"), codes)
+    if scales is not None:
+        np.save(os.path.join(directory, "scales.npy"), scales)
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump({
+            "format": FORMAT_VERSION,
+            "dtype": dtype,
+            "count": len(ids),
+            "dimension": vectors.shape[1],
+            "signature": list(signature),
+        }, f)
+
+    link = os.path.join(root, f".{generation}.link")
+    os.symlink(generation, link)
+    previous = os.readlink(path) if os.path.islink(path) else None
+    os.replace(link, path)
+    if previous and previous != generation:
+        # Mapped files stay readable after unlinking, so workers on the old generation are unaffected
+        shutil.rmtree(os.path.join(root, previous), ignore_errors=True)
+    return path
+
+
+def read_snapshot(path: str, signature: Tuple) -> Optional[Snapshot]:
+    """Memory-map the snapshot at `path` if it was taken at `signature`, else None"""
+    try:
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("format") != FORMAT_VERSION or tuple(meta.get("signature", ())) != tuple(signature):
+        return None
+
+    # Resolve the symlink once so every array comes from the same generation
+    directory = os.path.realpath(path)
+
+    def load(name: str) -> Optional[np.ndarray]:
+        file = os.path.join(directory, f"{name}.npy")
+        return np.load(file, mmap_mode="r") if os.path.exists(file) else None
+
+    return Snapshot(load("ids"), load("vectors"), load("codes"), load("scales"), tuple(signature))
+
+
+def export_snapshot(db: Session, model, model_id: int, root: str = EMBEDDING_SNAPSHOT_DIR,
+                    dtype: str = EMBEDDING_SNAPSHOT_DTYPE) -> Optional[str]:
+    """Snapshot one table's vectors for a model; None when nothing is embedded with it"""
+    result = db.execute(
+        select(model.id, model.embedding)
+        .filter(model.embedding.isnot(None), model.embedding_model_id == model_id)
+        .order_by(model.id)
+        .execution_options(yield_per=10000)
+    )
+    ids, vectors = [], []
+    for row_id, embedding in result:
+        ids.append(row_id)
+        vectors.append(embedding)
+    if not ids:
+        return None
+
+    # The same (model_id, count, max id) CorpusIndex compares against
+    signature = (model_id, len(ids), ids[-1])
+    return write_snapshot(snapshot_path(model.__tablename__, model_id, root),
+                          np.asarray(ids), np.asarray(vectors, dtype=np.float32), signature, dtype)
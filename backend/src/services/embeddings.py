@@ -0,0 +1,117 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple, Optional, Union
+
+import numpy as np
+
+from ..config import EMBEDDING_BACKEND, EMBEDDING_MODEL, EMBEDDING_WORKERS
+from .onnx_encoder import OnnxEncoder, onnx_encoder
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+
+def sentence_transformer(name: str) -> "SentenceTransformer":
+    """Default model factory. sentence-transformers pulls in torch and scikit-learn, so it is
+    imported here, when the lifespan loads the model, rather than when the app is imported."""
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(name)
+
+
+# EMBEDDING_BACKEND -> model factory
+ENCODERS: Dict[str, Callable[[str], Union["SentenceTransformer", OnnxEncoder]]] = {
+    "torch": sentence_transformer,
+    "onnx": onnx_encoder,
+}
+
+
+class LoadedModel(NamedTuple):
+    """A loaded encoder and the registry entry its vectors belong to"""
+    model: Union["SentenceTransformer", OnnxEncoder]
+    name: str
+    id: Optional[int]
+    dimension: int
+    normalize: bool
+
+
+class EmbeddingProvider:
+    """Process-wide query encoder, loaded once at startup and shared by requests"""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, workers: int = EMBEDDING_WORKERS,
+                 factory: Optional[Callable[[str], Union["SentenceTransformer", OnnxEncoder]]] = None):
+        if factory is None and EMBEDDING_BACKEND not in ENCODERS:
+            raise ValueError(f"EMBEDDING_BACKEND must be one of {', '.join(ENCODERS)}, not {EMBEDDING_BACKEND!r}")
+        self.model_name = model_name
+        self.factory = factory or ENCODERS[EMBEDDING_BACKEND]
+        self._loaded: Optional[LoadedModel] = None
+        # The model reembed.py is about to activate, loaded and warm so the switch is instant
+        self.standby: Optional[LoadedModel] = None
+        self._lock = threading.Lock()
+        # Bounded pool: encodes queue here instead of piling onto the event loop
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="encode")
+
+    @property
+    def is_ready(self) -> bool:
+        return self._loaded is not None
+
+    @property
+    def current(self) -> LoadedModel:
+        loaded = self._loaded
+        if loaded is None:
+            raise RuntimeError(f"Embedding model {self.model_name} is not loaded")
+        return loaded
+
+    def load(self, model_name: Optional[str] = None, model_id: Optional[int] = None,
+             normalize: bool = False) -> LoadedModel:
+        """Load a model and run a dummy encode, then swap it in so no request sees it cold"""
+        name = model_name or self.model_name
+        with self._lock:
+            loaded = self._loaded
+            if loaded is not None and (loaded.name, loaded.id, loaded.normalize) == (name, model_id, normalize):
+                return loaded
+            standby = self.standby
+            if standby is not None and (standby.name, standby.id, standby.normalize) == (name, model_id, normalize):
+                loaded = standby
+            else:
+                loaded = self._warm(name, model_id, normalize)
+            self._loaded, self.standby = loaded, None
+            self.model_name = name
+            return loaded
+
+    def prepare(self, model_name: str, model_id: int, normalize: bool) -> LoadedModel:
+        """Load a model into standby, next to the current one, for a later load() or promote()"""
+        with self._lock:
+            standby = self.standby
+            if standby is None or (standby.name, standby.id, standby.normalize) != (model_name, model_id, normalize):
+                self.standby = self._warm(model_name, model_id, normalize)
+            return self.standby
+
+    def promote(self, standby: LoadedModel) -> None:
+        """Make a prepared model current; a no-op if another switch got there first"""
+        with self._lock:
+            if self.standby is standby:
+                self._loaded, self.standby = standby, None
+                self.model_name = standby.name
+
+    def _warm(self, name: str, model_id: Optional[int], normalize: bool) -> LoadedModel:
+        model = self.factory(name)
+        model.encode(["warmup"])
+        return LoadedModel(model, name, model_id, model.get_sentence_embedding_dimension(), normalize)
+
+    def encode(self, texts: Union[str, List[str]], loaded: Optional[LoadedModel] = None) -> np.ndarray:
+        loaded = loaded or self.current
+        return loaded.model.encode(texts, normalize_embeddings=loaded.normalize)
+
+    async def aencode(self, texts: Union[str, List[str]], loaded: Optional[LoadedModel] = None) -> np.ndarray:
+        """encode() on the provider's thread pool, so the event loop keeps serving requests"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.encode, texts, loaded or self.current)
+
+
+embedding_provider = EmbeddingProvider()
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    return embedding_provider
@@ -0,0 +1,38 @@
+import heapq
+from typing import Dict, Hashable, List, Optional, Tuple
+
+# (document key, score) best first; keys are anything hashable, e.g. (corpus, id) pairs
+Candidates = List[Tuple[Hashable, float]]
+
+
+def reciprocal_rank_fusion(legs: Dict[str, Candidates], weights: Dict[str, float], limit: int, k: int = 60) -> Candidates:
+    """Score each id by sum(weight / (k + rank)) over the legs it appears in; ignores raw scores"""
+    scores: Dict[Hashable, float] = {}
+    for name, candidates in legs.items():
+        weight = weights.get(name, 1.0)
+        for rank, (doc_id, _) in enumerate(candidates, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank)
+    return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+def weighted_blend(legs: Dict[str, Candidates], weights: Dict[str, float], limit: int) -> Candidates:
+    """Score each id by the weighted sum of its per-leg scores, each leg scaled to [0, 1] by its best score"""
+    scores: Dict[Hashable, float] = {}
+    for name, candidates in legs.items():
+        if not candidates:
+            continue
+        weight = weights.get(name, 1.0)
+        best = max(score for _, score in candidates) or 1.0
+        for doc_id, score in candidates:
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight * score / best
+    return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+def fuse(legs: Dict[str, Candidates], method: str = "rrf", weights: Optional[Dict[str, float]] = None,
+         limit: int = 10, rrf_k: int = 60) -> Candidates:
+    weights = weights or {}
+    if method == "rrf":
+        return reciprocal_rank_fusion(legs, weights, limit, rrf_k)
+    if method == "weighted":
+        return weighted_blend(legs, weights, limit)
+    raise ValueError(f"Unknown fusion method: {method}")
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, List, NamedTuple, Optional
+
+from ..config import (
+    LLM_BASE_URL, LLM_BREAKER_FAILURES, LLM_BREAKER_RESET, LLM_EXPANSION_DEADLINE, LLM_MAX_RETRIES, LLM_MODEL,
+    LLM_STREAM, LLM_TIMEOUT, OPENAI_API_KEY
+)
+from .metrics import metrics
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+EXPANSION_PROMPT = """You are an Islamic scholar helping to understand search queries
+                for Islamic texts. Your role is to:
+                1. Understand the core meaning and intent of the query
+                2. Expand it to include:
+                   - Related Quranic concepts and terms
+                   - Relevant Hadith topics and themes
+                   - Arabic terminology (both Quranic and Hadith terms)
+                   - Common variations and synonyms
+                   - Related prophetic teachings and sunnah
+                   - Historical context when relevant
+                3. Consider both:
+                   - Direct references (specific verses/hadiths)
+                   - Thematic connections (related principles/teachings)
+
+                Format your response as a clear, expanded search query that captures
+                these various dimensions while maintaining the original intent."""
+
+
+@lru_cache(maxsize=None)
+def get_ai_client() -> "AsyncOpenAI":
+    """Shared async OpenAI client; it pools HTTP connections across requests.
+
+    LLM_BASE_URL points it at any OpenAI-compatible server, e.g. the fake in benchmarks/fakes.py.
+    The openai package is imported on first use, keeping it out of worker boot.
+    """
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=OPENAI_API_KEY, base_url=LLM_BASE_URL, timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES)
+
+
+class CircuitBreaker:
+    """Stops calling a dependency that keeps failing.
+
+    After `failures` consecutive failures the circuit opens and allow() is False for
+    `reset_after` seconds; then one trial call is let through per `reset_after` until
+    one succeeds and closes the circuit again.
+    """
+
+    def __init__(self, failures: int = LLM_BREAKER_FAILURES, reset_after: float = LLM_BREAKER_RESET,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failures = failures
+        self.reset_after = reset_after
+        self._clock = clock
+        self._consecutive = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        now = self._clock()
+        if now - self._opened_at < self.reset_after:
+            return False
+        # Half-open: this caller is the trial; re-arm so concurrent callers keep skipping
+        self._opened_at = now
+        return True
+
+    def record_success(self) -> None:
+        self._consecutive = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self._consecutive += 1
+        if self._opened_at is not None or self._consecutive >= self.failures:
+            if self._opened_at is None:
+                logger.warning("LLM expansion failed %d times in a row; skipping it for %.0fs",
+                               self._consecutive, self.reset_after)
+            self._opened_at = self._clock()
+
+
+expansion_breaker = CircuitBreaker()
+
+EXPANSIONS = metrics.counter("baseera_llm_expansions_total", "LLM query expansions by outcome", ("outcome",))
+metrics.gauge("baseera_llm_circuit_open", "1 while LLM expansion is skipped after repeated failures", (),
+              lambda: {(): float(expansion_breaker.is_open)})
+
+
+class Expansion(NamedTuple):
+    text: str
+    complete: bool  # False for the raw-query fallback or a partial stream: use it, but do not cache it
+
+
+class QueryExpander:
+    """LLM query expansion that never holds a search up for longer than `deadline` seconds.
+
+    A timeout, an API error or an open circuit falls back to the raw query. With `stream`,
+    a completion cut off by the deadline still contributes the text that had arrived.
+    """
+
+    def __init__(self, client: "AsyncOpenAI", deadline: float = LLM_EXPANSION_DEADLINE,
+                 breaker: CircuitBreaker = expansion_breaker, stream: bool = LLM_STREAM, model: str = LLM_MODEL):
+        self.client = client
+        self.deadline = deadline
+        self.breaker = breaker
+        self.stream = stream
+        self.model = model
+
+    async def expand(self, query: str) -> Expansion:
+        if not self.breaker.allow():
+            EXPANSIONS.inc("circuit_open")
+            return Expansion(query, False)
+
+        received: List[str] = []
+        try:
+            await asyncio.wait_for(self._complete(query, received), self.deadline)
+        except asyncio.TimeoutError:
+            if received:
+                # The LLM is answering, just slowly: not a reason to stop asking it
+                self.breaker.record_success()
+                EXPANSIONS.inc("partial")
+                return Expansion(f"{query} {''.join(received)}", False)
+            self.breaker.record_failure()
+            EXPANSIONS.inc("timeout")
+            return Expansion(query, False)
+        except Exception as exc:
+            self.breaker.record_failure()
+            EXPANSIONS.inc("error")
+            logger.warning("LLM expansion failed (%s); searching with the raw query", exc)
+            return Expansion(query, False)
+
+        text = "".join(received).strip()
+        if not text:
+            self.breaker.record_failure()
+            EXPANSIONS.inc("error")
+            return Expansion(query, False)
+        self.breaker.record_success()
+        EXPANSIONS.inc("ok")
+        return Expansion(text, True)
+
+    async def _complete(self, query: str, received: List[str]) -> None:
+        """Append the completion to `received` as it arrives, so a timeout can keep what came in"""
+        messages = [
+            {"role": "system", "content": EXPANSION_PROMPT},
+            {"role": "user", "content": f"Understand and expand this query: {query}"},
+        ]
+        if not self.stream:
+            response = await self.client.chat.completions.create(model=self.model, messages=messages)
+            received.append(response.choices[0].message.content or "")
+            return
+
+        stream = await self.client.chat.completions.create(model=self.model, messages=messages, stream=True)
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                received.append(chunk.choices[0].delta.content)
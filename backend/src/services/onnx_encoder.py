@@ -0,0 +1,163 @@
+"""Query encoding through ONNX Runtime instead of PyTorch.
+
+export() converts a sentence-transformers model's transformer to ONNX, optionally
+with int8 dynamic quantization, and writes its tokenizer and pooling settings
+next to it. OnnxEncoder then reproduces SentenceTransformer.encode (same
+truncation, pooling and normalization) with onnxruntime and tokenizers only, so
+an API worker never imports torch. Exporting still needs sentence-transformers.
+"""
+import json
+import os
+from typing import List, Optional, Union
+
+import numpy as np
+
+from ..config import EMBEDDING_ONNX_DIR, EMBEDDING_ONNX_QUANTIZE, EMBEDDING_ONNX_THREADS
+
+CONFIG_FILE = "encoder.json"
+TOKENIZER_FILE = "tokenizer.json"
+MODEL_FILES = {False: "model.onnx", True: "model.int8.onnx"}
+POOLING_MODES = ("cls", "max", "mean")
+
+
+def export_path(model_name: str, root: str = EMBEDDING_ONNX_DIR) -> str:
+    return os.path.join(root, model_name.replace("/", "--"))
+
+
+def pool(hidden: np.ndarray, mask: np.ndarray, mode: str) -> np.ndarray:
+    """sentence-transformers' Pooling module over (batch, tokens, dim) states; padding is ignored"""
+    if mode == "cls":
+        return hidden[:, 0]
+    mask = mask[:, :, None].astype(hidden.dtype)
+    if mode == "max":
+        return np.where(mask > 0, hidden, np.float32(-1e9)).max(axis=1)
+    return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.clip(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12, None)
+
+
+def _pooling_mode(config: dict) -> str:
+    for mode in POOLING_MODES:
+        if config.get(f"pooling_mode_{mode}_token" if mode == "cls" else f"pooling_mode_{mode}_tokens"):
+            return mode
+    raise ValueError(f"Unsupported pooling {config}; the ONNX encoder handles {', '.join(POOLING_MODES)}")
+
+
+def _replace(write, path: str) -> None:
+    """Write through a temporary file, so a worker exporting alongside never reads half a file"""
+    partial = f"{path}.{os.getpid()}.partial"
+    write(partial)
+    os.replace(partial, path)
+
+
+def export(model_name: str, directory: Optional[str] = None, quantize: bool = EMBEDDING_ONNX_QUANTIZE,
+           opset: int = 14) -> str:
+    """Export `model_name` (and its int8 variant when `quantize`) unless already there; returns the directory"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    directory = directory or export_path(model_name)
+    os.makedirs(directory, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0]
+    pooling = next(module for module in model if isinstance(module, Pooling))
+    tokenizer = transformer.tokenizer
+
+    path = os.path.join(directory, MODEL_FILES[False])
+    inputs = tokenizer(["warmup"], return_tensors="pt")
+    names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in inputs]
+    if not os.path.exists(path):
+        transformer.auto_model.eval()
+        with torch.no_grad():
+            _replace(lambda target: torch.onnx.export(
+                transformer.auto_model, ({name: inputs[name] for name in names},), target,
+                input_names=names, output_names=["last_hidden_state"], opset_version=opset,
+                dynamic_axes={name: {0: "batch", 1: "tokens"} for name in names + ["last_hidden_state"]},
+            ), path)
+    if quantize and not os.path.exists(os.path.join(directory, MODEL_FILES[True])):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        _replace(lambda target: quantize_dynamic(path, target, weight_type=QuantType.QInt8),
+                 os.path.join(directory, MODEL_FILES[True]))
+
+    tokenizer.backend_tokenizer.save(os.path.join(directory, TOKENIZER_FILE))
+    config = {
+        "model": model_name,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.max_seq_length,
+        "pooling": _pooling_mode(pooling.get_config_dict()),
+        "normalize": any(isinstance(module, Normalize) for module in model),
+        "pad_id": tokenizer.pad_token_id,
+        "pad_token": tokenizer.pad_token,
+    }
+
+    def write_config(target):
+        with open(target, "w") as f:
+            json.dump(config, f, indent=2)
+
+    _replace(write_config, os.path.join(directory, CONFIG_FILE))  # last: its presence marks a finished export
+    return directory
+
+
+class OnnxEncoder:
+    """The encode() / get_sentence_embedding_dimension() part of SentenceTransformer, on ONNX Runtime.
+
+    One session serves every encode thread; each run uses at most `threads` intra-op threads.
+    """
+
+    def __init__(self, directory: str, quantized: bool = EMBEDDING_ONNX_QUANTIZE,
+                 threads: int = EMBEDDING_ONNX_THREADS):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(directory, CONFIG_FILE)) as f:
+            self.config = json.load(f)
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(directory, MODEL_FILES[quantized]), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.output_name = self.session.get_outputs()[0].name
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(directory, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_id"], pad_token=self.config["pad_token"])
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dimension"]
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               normalize_embeddings: bool = False) -> np.ndarray:
+        texts = [text.strip() for text in ([sentences] if isinstance(sentences, str) else sentences)]
+        embeddings = np.zeros((len(texts), self.config["dimension"]), dtype=np.float32)
+        # Longest first, like sentence-transformers, so each batch pads to similar lengths
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            batch = order[start:start + batch_size]
+            encodings = self.tokenizer.encode_batch([texts[i] for i in batch])
+            feed = {
+                "input_ids": np.asarray([encoding.ids for encoding in encodings], dtype=np.int64),
+                "attention_mask": np.asarray([encoding.attention_mask for encoding in encodings], dtype=np.int64),
+                "token_type_ids": np.asarray([encoding.type_ids for encoding in encodings], dtype=np.int64),
+            }
+            [hidden] = self.session.run([self.output_name], {k: v for k, v in feed.items() if k in self.input_names})
+            embeddings[batch] = pool(hidden, feed["attention_mask"], self.config["pooling"])
+        if self.config["normalize"] or normalize_embeddings:
+            embeddings = normalize(embeddings)
+        return embeddings[0] if isinstance(sentences, str) else embeddings
+
+
+def onnx_encoder(model_name: str) -> OnnxEncoder:
+    """Model factory for EMBEDDING_BACKEND=onnx; exports the model first if it has not been"""
+    directory = export_path(model_name)
+    variant = os.path.join(directory, MODEL_FILES[EMBEDDING_ONNX_QUANTIZE])
+    if not (os.path.exists(os.path.join(directory, CONFIG_FILE)) and os.path.exists(variant)):
+        export(model_name, directory)
+    return OnnxEncoder(directory)
@@ -0,0 +1,140 @@
+"""Precomputed nearest neighbours of every verse among the verses and the hadiths.
+
+GET /api/verses/{id}/related reads a verse's list with one primary-key lookup
+instead of running a semantic search (LLM expansion, encode, vector scan) per
+click. build_related() is run after every ingest and only recomputes the lists
+that the changed vectors can affect.
+"""
+import hashlib
+from typing import Dict, Iterator, List, Set, Tuple
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from ..config import RELATED_BLOCK_ROWS, RELATED_K
+from ..models import Hadith, RelatedMember, RelatedVerse, Verse
+from .vector_index import VectorIndex
+
+# Neighbour sources, keyed like search results
+SOURCES = {"quran": Verse, "hadith": Hadith}
+
+Hits = List[Tuple[int, float]]
+
+MEMBER_BATCH = 10000
+
+
+def digest(vector: np.ndarray) -> str:
+    return hashlib.blake2b(np.ascontiguousarray(vector, dtype=np.float32).tobytes(), digest_size=8).hexdigest()
+
+
+def load_index(db: Session, model, model_id: int) -> VectorIndex:
+    return VectorIndex.from_rows(db.execute(
+        select(model.id, model.embedding)
+        .filter(model.embedding.isnot(None), model.embedding_model_id == model_id)
+        .order_by(model.id)
+    ))
+
+
+def nearest(index: VectorIndex, ids: np.ndarray, vectors: np.ndarray, k: int, exclude_self: bool,
+            block: int = RELATED_BLOCK_ROWS) -> Iterator[Tuple[int, Hits]]:
+    """(id, its k nearest rows of `index`), scoring `block` vectors per matrix product"""
+    for start in range(0, len(ids), block):
+        block_ids = ids[start:start + block].tolist()
+        for row_id, hits in zip(block_ids, index.search_many(vectors[start:start + block], k + exclude_self)):
+            if exclude_self:
+                hits = [(hit_id, score) for hit_id, score in hits if hit_id != row_id]
+            yield row_id, hits[:k]
+
+
+def _rows(index: VectorIndex, ids) -> np.ndarray:
+    return index.matrix[np.searchsorted(index.ids, np.asarray(list(ids), dtype=np.int64))]
+
+
+def affected(verses: VectorIndex, source: str, index: VectorIndex, changed: Set[int],
+             floor: Dict[int, float], block: int = RELATED_BLOCK_ROWS) -> Set[int]:
+    """Verses that some changed row of `index` would now enter the top k of.
+
+    `floor` is each verse's current k-th score for this source (absent while its list is short).
+    """
+    if not changed or len(verses) == 0:
+        return set()
+    changed_ids = np.asarray(sorted(changed), dtype=np.int64)
+    candidates = _rows(index, changed_ids)
+    thresholds = np.asarray([floor.get(verse_id, -np.inf) for verse_id in verses.ids.tolist()], dtype=np.float32)
+    found = set()
+    for start in range(0, len(verses), block):
+        scores = verses.matrix[start:start + block] @ candidates.T
+        if source == "quran":
+            scores[verses.ids[start:start + block, None] == changed_ids[None, :]] = -np.inf
+        beaten = scores.max(axis=1) > thresholds[start:start + block]
+        found.update(verses.ids[start:start + block][beaten].tolist())
+    return found
+
+
+def build_related(db: Session, model_id: int, k: int = RELATED_K, full: bool = False) -> Tuple[int, int]:
+    """Bring related_verses up to date with the vectors of the given model; the caller commits.
+
+    A verse's lists are recomputed when its own vector changed, when they point at a
+    changed or removed row, or when a changed row now outscores their k-th neighbour;
+    the rest are left alone. Returns (verses recomputed, neighbours written).
+    """
+    indexes = {source: load_index(db, model, model_id) for source, model in SOURCES.items()}
+    verses = indexes["quran"]
+    if full:
+        db.execute(delete(RelatedVerse))
+        db.execute(delete(RelatedMember))
+
+    members = {(source, row_id): value for source, row_id, value in db.execute(
+        select(RelatedMember.source, RelatedMember.row_id, RelatedMember.digest)
+    )}
+    current = {
+        (source, row_id): digest(vector)
+        for source, index in indexes.items()
+        for row_id, vector in zip(index.ids.tolist(), index.matrix)
+    }
+    changed = {key for key, value in current.items() if members.get(key) != value}
+    removed = members.keys() - current.keys()
+    if not changed and not removed:
+        return 0, 0
+
+    stale = {row_id for source, row_id in changed | removed if source == "quran"}
+    touched = changed | removed
+    floors: Dict[str, Dict[int, float]] = {source: {} for source in SOURCES}
+    for verse_id, source, neighbour_id, score, rank in db.execute(select(
+        RelatedVerse.verse_id, RelatedVerse.source, RelatedVerse.neighbour_id, RelatedVerse.score, RelatedVerse.rank
+    )):
+        if (source, neighbour_id) in touched:
+            stale.add(verse_id)
+        if rank == k - 1:
+            floors[source][verse_id] = score
+    for source, index in indexes.items():
+        stale |= affected(verses, source, index, {row_id for name, row_id in changed if name == source}, floors[source])
+
+    db.execute(delete(RelatedVerse).where(RelatedVerse.verse_id.in_(stale)))
+    ids = np.asarray(sorted(set(verses.ids.tolist()) & stale), dtype=np.int64)
+    written = 0
+    if len(ids):
+        vectors = _rows(verses, ids)
+        for source, index in indexes.items():
+            rows = [
+                {"verse_id": verse_id, "source": source, "rank": rank, "neighbour_id": neighbour_id, "score": score}
+                for verse_id, hits in nearest(index, ids, vectors, k, exclude_self=source == "quran")
+                for rank, (neighbour_id, score) in enumerate(hits)
+            ]
+            if rows:
+                db.execute(insert(RelatedVerse), rows)
+                written += len(rows)
+
+    for source in SOURCES:
+        gone = [row_id for name, row_id in removed | changed if name == source and (name, row_id) in members]
+        # Bound the bind parameters per statement; a first build changes every hadith
+        for start in range(0, len(gone), MEMBER_BATCH):
+            db.execute(delete(RelatedMember).where(
+                RelatedMember.source == source, RelatedMember.row_id.in_(gone[start:start + MEMBER_BATCH])
+            ))
+    if changed:
+        db.execute(insert(RelatedMember), [
+            {"source": source, "row_id": row_id, "digest": current[source, row_id]} for source, row_id in changed
+        ])
+    return len(stale), written
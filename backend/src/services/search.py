@@ -1,109 +1,553 @@
-from sentence_transformers import SentenceTransformer
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+import asyncio
+import heapq
 import numpy as np
-from openai import OpenAI
-from ..models import Verse, Surah
-from ..config import OPENAI_API_KEY
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Integer, cast, column, func, null, or_, select, text, true, union_all, values
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from ..arabic import has_arabic, normalize_arabic
+from ..config import (
+    CHUNK_OVERSAMPLE, FUSION_CANDIDATES, FUSION_METHOD, PGVECTOR_EF_SEARCH, RRF_K, SEARCH_BATCH_CONCURRENCY,
+    SEARCH_COALESCE, TEXT_SEARCH_FUZZY, VECTOR_SEARCH_BACKEND
+)
+from ..models import (
+    EmbeddingModel, Hadith, HadithChunk, HadithCollection, Narrator, Surah, Verse,
+    hadith_narrators, hadith_topics, verse_topics
+)
+from .cache import QueryCache, normalize_query
+from .chunking import best_per_document
+from .embeddings import EmbeddingProvider, LoadedModel
+from .fusion import Candidates, fuse
+from .llm import Expansion, QueryExpander
+from .metrics import stage
+from .singleflight import SingleFlight
+from .surahs import surah_cache, surah_name
+from .vector_index import CorpusIndex, VectorIndex, hadith_chunk_index, hadith_index, verse_index
+from typing import TYPE_CHECKING, Any, Awaitable, List, Dict, NamedTuple, Optional, Tuple
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+
+class Corpus(NamedTuple):
+    """A searchable table: its rows, the table whose name a text query may match, and its vector index.
+
+    `parent_key` is the row's foreign key to that table (verse -> surah, hadith -> collection).
+
+    Long documents may also have passage vectors (`chunks`, keyed by document_id); a
+    document's semantic score is then the best of its row and chunk similarities.
+    """
+    model: Any
+    parent: Any
+    parent_key: Any
+    index: CorpusIndex
+    chunks: Any = None
+    chunk_index: Optional[CorpusIndex] = None
+
+
+CORPORA = {
+    "quran": Corpus(Verse, Surah, Verse.surah_id, verse_index),
+    "hadith": Corpus(Hadith, HadithCollection, Hadith.collection_id, hadith_index, HadithChunk, hadith_chunk_index),
+}
+
+search_flights = SingleFlight("search")
+expansion_flights = SingleFlight("expansion")
+
+# Whether the database's pgvector (0.8+) can resume an HNSW scan until enough rows pass a filter
+_pgvector_iterative_scan: Optional[bool] = None
+
+
+async def _iterative_scan(db) -> bool:
+    global _pgvector_iterative_scan
+    if _pgvector_iterative_scan is None:
+        version = await db.scalar(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'"))
+        _pgvector_iterative_scan = bool(version) and tuple(int(part) for part in version.split(".")[:2]) >= (0, 8)
+    return _pgvector_iterative_scan
+
+# Character span of the best-matching chunk per hit; absent for hits matched on the whole row
+Passages = Dict[Tuple[str, int], Tuple[int, int]]
+
+
+# What serialization needs; selecting whole rows would also drag in the embedding and tsvector columns
+VERSE_COLUMNS = (Verse.id, Verse.surah_id, Verse.verse_number, Verse.arabic, Verse.english)
+HADITH_COLUMNS = (Hadith.id, Hadith.hadith_number, Hadith.chapter_number, Hadith.grading, Hadith.arabic, Hadith.english)
+
+
+class SearchFilters(NamedTuple):
+    """Optional restrictions; a corpus that cannot satisfy a set filter is left out of the search"""
+    collection_id: Optional[int] = None
+    grading: Optional[str] = None
+    narrator_id: Optional[int] = None
+    surah_from: Optional[int] = None
+    surah_to: Optional[int] = None
+    revelation: Optional[str] = None  # "makki" or "madani"
+    topic_ids: Tuple[int, ...] = ()  # any of these topics; applies to both corpora
+
+
+HADITH_FILTERS = ("collection_id", "grading", "narrator_id")
+QURAN_FILTERS = ("surah_from", "surah_to", "revelation")
+
 
 class SearchService:
-    def __init__(self, db: Session):
-        self.db = db
-        self.model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-        self.ai_client = OpenAI(api_key=OPENAI_API_KEY)
+    def __init__(self, sessions: async_sessionmaker, embedder: EmbeddingProvider, ai_client: "AsyncOpenAI", cache: QueryCache):
+        # A session factory rather than one session: hybrid search runs its legs concurrently
+        self.sessions = sessions
+        self.embedder = embedder
+        self.ai_client = ai_client
+        self.expander = QueryExpander(ai_client)
+        self.cache = cache
+        # Set once a query was embedded without its LLM expansion; such results must not be cached
+        self.degraded = False
+
+    async def search(self, query: str, search_type: str = "hybrid", limit: int = 10,
+                     fusion: str = FUSION_METHOD, weights: Optional[Dict[str, float]] = None,
+                     candidates: int = FUSION_CANDIDATES, corpus: str = "quran",
+                     filters: SearchFilters = SearchFilters()) -> List[Dict]:
+        """Search one corpus ("quran", "hadith") or both ("all") and return one ranked list.
+
+        Within each leg the per-corpus candidates are merged by score (ts_rank and cosine
+        similarity are comparable across tables), then the text and semantic legs are fused.
+        Hits are keyed (corpus, id) throughout. Identical searches running at the same time
+        in this worker share one computation (SEARCH_COALESCE); the result is read-only.
+        """
+        async def run() -> Tuple[List[Dict], bool]:
+            [page] = await self.search_batch([query], search_type, limit, fusion, weights, candidates, corpus, filters)
+            return page, self.degraded
+
+        if not SEARCH_COALESCE:
+            page, _ = await run()
+            return page
+        key = (normalize_query(query), search_type, limit, fusion, tuple(sorted((weights or {}).items())),
+               candidates, corpus, filters)
+        # The leader's service ran the search; carry its degraded flag over to every caller
+        page, degraded = await search_flights.do(key, run)
+        self.degraded = self.degraded or degraded
+        return page
+
+    async def search_batch(self, queries: List[str], search_type: str = "hybrid", limit: int = 10,
+                           fusion: str = FUSION_METHOD, weights: Optional[Dict[str, float]] = None,
+                           candidates: int = FUSION_CANDIDATES, corpus: str = "quran",
+                           filters: SearchFilters = SearchFilters()) -> List[List[Dict]]:
+        """search() for many queries at once; one result list per query, in order.
 
-    async def search(self, query: str, search_type: str = "hybrid") -> List[Dict]:
+        Identical queries (after normalize_query) run once. The semantic leg encodes every
+        query in one batch and scores them all in one pass per corpus, and rows are hydrated
+        once for the union of all pages.
+        """
+        keys = [normalize_query(query) for query in queries]
+        unique: Dict[str, str] = {}
+        for key, query in zip(keys, queries):
+            unique.setdefault(key, query)
+        texts = list(unique.values())
+
+        scoped = {
+            name: conditions for name, conditions in
+            ((name, self._conditions(name, filters)) for name in (CORPORA if corpus == "all" else [corpus]))
+            if conditions is not None
+        }
+        if not scoped:
+            return [[] for _ in queries]
+
+        passages: List[Passages] = [{} for _ in texts]
         if search_type == "text":
-            return self.text_search(query)
+            hits = await self._text_legs(texts, scoped, limit)
         elif search_type == "semantic":
-            return self.semantic_search(query)
+            hits, passages = await self._semantic_legs(texts, scoped, limit, filters)
         else:
-            text_results = self.text_search(query)
-            semantic_results = self.semantic_search(query)
-            return self.combine_results(text_results, semantic_results)
-
-    def text_search(self, query: str) -> List[Dict]:
-        """Traditional database text search"""
-        results = self.db.query(Verse).join(Surah).filter(
-            or_(
-                Verse.english.ilike(f"%{query}%"),
-                Verse.arabic.ilike(f"%{query}%"),
-                Surah.name.ilike(f"%{query}%")
+            k = max(candidates, limit)
+            text_hits, (semantic_hits, passages) = await asyncio.gather(
+                self._text_legs(texts, scoped, k),
+                self._semantic_legs(texts, scoped, k, filters)
             )
-        ).all()
-        return [self.verse_to_dict(verse) for verse in results]
+            with stage("fuse"):
+                hits = [
+                    fuse({"text": text, "semantic": semantic}, fusion, weights, limit, RRF_K)
+                    for text, semantic in zip(text_hits, semantic_hits)
+                ]
+
+        with stage("hydrate"):
+            pages = dict(zip(unique, await hydrate(self.sessions, hits, passages)))
+        return [pages[key] for key in keys]
 
-    async def semantic_search(self, query: str) -> List[Dict]:
+    async def text_search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Full-text search over English and normalized Arabic, ranked by ts_rank"""
+        return await self.search(query, "text", limit)
+
+    async def semantic_search(self, query: str, limit: int = 10) -> List[Dict]:
         """AI-enhanced semantic search"""
-        # Get AI to understand query intent
-        ai_response = await self.ai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{
-                "role": "system",
-                "content": """You are an Islamic scholar helping to understand search queries 
-                for Islamic texts. Your role is to:
-                1. Understand the core meaning and intent of the query
-                2. Expand it to include:
-                   - Related Quranic concepts and terms
-                   - Relevant Hadith topics and themes
-                   - Arabic terminology (both Quranic and Hadith terms)
-                   - Common variations and synonyms
-                   - Related prophetic teachings and sunnah
-                   - Historical context when relevant
-                3. Consider both:
-                   - Direct references (specific verses/hadiths)
-                   - Thematic connections (related principles/teachings)
-                
-                Format your response as a clear, expanded search query that captures
-                these various dimensions while maintaining the original intent."""
-            }, {
-                "role": "user",
-                "content": f"Understand and expand this query: {query}"
-            }]
+        return await self.search(query, "semantic", limit)
+
+    @staticmethod
+    def _conditions(corpus: str, filters: SearchFilters) -> Optional[list]:
+        """SQL conditions implementing the filters on one corpus, or None if it cannot match them"""
+        other = QURAN_FILTERS if corpus == "hadith" else HADITH_FILTERS
+        if any(getattr(filters, name) is not None for name in other):
+            return None
+        conditions = []
+        if filters.topic_ids:
+            topics = hadith_topics if corpus == "hadith" else verse_topics
+            conditions.append(CORPORA[corpus].model.id.in_(
+                select(topics.c.hadith_id if corpus == "hadith" else topics.c.verse_id)
+                .where(topics.c.topic_id.in_(filters.topic_ids))
+            ))
+        if corpus == "hadith":
+            if filters.collection_id is not None:
+                conditions.append(Hadith.collection_id == filters.collection_id)
+            if filters.grading is not None:
+                conditions.append(Hadith.grading == filters.grading)
+            if filters.narrator_id is not None:
+                conditions.append(Hadith.id.in_(
+                    select(hadith_narrators.c.hadith_id).where(hadith_narrators.c.narrator_id == filters.narrator_id)
+                ))
+        else:
+            if filters.surah_from is not None:
+                conditions.append(Verse.surah_id >= filters.surah_from)
+            if filters.surah_to is not None:
+                conditions.append(Verse.surah_id <= filters.surah_to)
+            if filters.revelation is not None:
+                conditions.append(Verse.surah_id.in_(
+                    select(Surah.id).where(Surah.is_makki == (filters.revelation == "makki"))
+                ))
+        return conditions
+
+    @staticmethod
+    def _merge(per_corpus: Dict[str, Candidates], k: int) -> Candidates:
+        return heapq.nlargest(
+            k,
+            (((name, row_id), score) for name, hits in per_corpus.items() for row_id, score in hits),
+            key=lambda hit: hit[1]
         )
-        
-        enhanced_query = ai_response.choices[0].message.content
-        
-        # Generate embedding for enhanced query
-        query_embedding = self.model.encode(enhanced_query)
-        
-        # Find similar verses
-        verses = self.db.query(Verse).all()
-        verses_with_embeddings = [(v, np.array(v.embedding)) for v in verses if v.embedding is not None]
-        
-        if verses_with_embeddings:
-            similarities = [
-                (verse, cosine_similarity([emb], [query_embedding])[0][0])
-                for verse, emb in verses_with_embeddings
-            ]
-            results = [v for v, _ in sorted(similarities, key=lambda x: x[1], reverse=True)[:10]]
-            return [self.verse_to_dict(verse) for verse in results]
-        
-        return []
 
     @staticmethod
-    def verse_to_dict(verse: Verse) -> Dict:
+    async def _bounded(aws: List[Awaitable], limit: int = SEARCH_BATCH_CONCURRENCY) -> list:
+        """gather() that keeps at most `limit` awaitables in flight (each may hold pooled connections)"""
+        semaphore = asyncio.Semaphore(limit)
+
+        async def run(aw):
+            async with semaphore:
+                return await aw
+
+        return await asyncio.gather(*(run(aw) for aw in aws))
+
+    async def _text_legs(self, queries: List[str], scoped: Dict[str, list], k: int) -> List[Candidates]:
+        return await self._bounded([self._text_leg(query, scoped, k) for query in queries])
+
+    async def _text_leg(self, query: str, scoped: Dict[str, list], k: int) -> Candidates:
+        results = await asyncio.gather(*(
+            self._text_candidates(CORPORA[name], query, k, conditions) for name, conditions in scoped.items()
+        ))
+        return self._merge(dict(zip(scoped, results)), k)
+
+    async def _semantic_legs(self, queries: List[str], scoped: Dict[str, list], k: int,
+                             filters: SearchFilters) -> Tuple[List[Candidates], List[Passages]]:
+        # One snapshot of the encoder and one batch of query vectors for every corpus
+        loaded = await self._encoder()
+        query_embeddings = await self._embed_queries(queries, loaded)
+        results = await asyncio.gather(*(
+            self._semantic_candidates(name, query_embeddings, loaded, k, conditions, filters)
+            for name, conditions in scoped.items()
+        ))
+        hits = [
+            self._merge({name: per_query[i][0] for name, per_query in zip(scoped, results)}, k)
+            for i in range(len(queries))
+        ]
+        passages = [
+            {(name, row_id): span for name, per_query in zip(scoped, results) for row_id, span in per_query[i][1].items()}
+            for i in range(len(queries))
+        ]
+        return hits, passages
+
+    async def _text_candidates(self, corpus: Corpus, query: str, k: int, conditions: list) -> Candidates:
+        model = corpus.model
+        normalized = normalize_arabic(query)
+        # ts_rank detoasts every matching tsvector, so only rank against the column(s) the query's script can match
+        arabic = has_arabic(query)
+        english = not arabic or any(c.isascii() and c.isalpha() for c in query)
+        matches, ranks = [], []
+        if english:
+            english_query = func.websearch_to_tsquery('english', query)
+            matches.append(model.english_tsv.bool_op('@@')(english_query))
+            ranks.append(func.ts_rank(model.english_tsv, english_query))
+        if arabic:
+            arabic_query = func.plainto_tsquery('simple', normalized)
+            matches.append(model.arabic_tsv.bool_op('@@')(arabic_query))
+            ranks.append(func.ts_rank(model.arabic_tsv, arabic_query))
+        rank = sum(ranks[1:], ranks[0])
+
+        async with self.sessions() as db, stage("text"):
+            # Surah / collection names are matched on their own small table first: an ILIKE on the joined
+            # parent inside the OR would stop Postgres from using the tsvector GIN indexes for any of it
+            parents = (await db.scalars(
+                select(corpus.parent.id).filter(corpus.parent.name.icontains(query, autoescape=True))
+            )).all()
+            if parents:
+                matches.append(corpus.parent_key.in_(parents))
+            result = await db.execute(
+                select(model.id, rank).filter(
+                    or_(*matches),
+                    *conditions
+                ).order_by(rank.desc(), model.id).limit(k)
+            )
+            hits = [(row_id, score) for row_id, score in result]
+
+            # Typo / substring tolerance: trigram word similarity, only when FTS under-fills the page
+            if TEXT_SEARCH_FUZZY and len(hits) < k:
+                similarity = func.greatest(
+                    func.word_similarity(query, model.english),
+                    func.word_similarity(normalized, model.arabic_normalized)
+                )
+                result = await db.execute(
+                    select(model.id, similarity).filter(
+                        or_(
+                            model.english.bool_op('%>')(query),
+                            model.arabic_normalized.bool_op('%>')(normalized)
+                        ),
+                        model.id.notin_([row_id for row_id, _ in hits]),
+                        *conditions
+                    ).order_by(similarity.desc(), model.id).limit(k - len(hits))
+                )
+                hits += [(row_id, score) for row_id, score in result]
+
+            return hits
+
+    async def _semantic_candidates(self, name: str, query_embeddings: np.ndarray, loaded: LoadedModel, k: int,
+                                   conditions: list, filters: SearchFilters
+                                   ) -> List[Tuple[Candidates, Dict[int, Tuple[int, int]]]]:
+        """Per query: the k nearest documents, and the best chunk's span for those matched through a chunk"""
+        corpus = CORPORA[name]
+        model, chunks = corpus.model, corpus.chunks
+        chunk_k = k * CHUNK_OVERSAMPLE  # several chunks of one document collapse into one hit
+        hits: List[list] = [[] for _ in query_embeddings]
+        async with self.sessions() as db, stage("vector"):
+            if VECTOR_SEARCH_BACKEND == "pgvector":
+                # Nearest neighbours straight from the HNSW index; nothing but ids and scores leave Postgres
+                settings = {"hnsw.ef_search": min(max(PGVECTOR_EF_SEARCH, chunk_k if chunks is not None else k), 1000)}
+                if conditions:
+                    # A plain HNSW scan applies filters to its ef_search candidates only, so a narrow
+                    # filter (one surah, a rare topic) would come back short or empty
+                    if await _iterative_scan(db):
+                        settings["hnsw.iterative_scan"] = "strict_order"  # keep scanning until k rows pass
+                    else:
+                        settings["enable_indexscan"] = "off"  # exact: rank only the rows that pass
+                await db.execute(select(*(func.set_config(name, str(value), true()) for name, value in settings.items())))
+                # Every query vector in one statement: an index scan per VALUES row via LATERAL
+                queries = values(
+                    column("i", Integer), column("embedding", Vector(loaded.dimension)), name="queries"
+                ).data(list(enumerate(query_embeddings)))
+                # VALUES rows reach Postgres untyped; without the cast <=> sees text
+                query_vector = cast(queries.c.embedding, Vector(loaded.dimension))
+                distance = model.embedding.cosine_distance(query_vector)
+                nearest = (
+                    select(model.id.label("id"), (1 - distance).label("score"),
+                           cast(null(), Integer).label("char_start"), cast(null(), Integer).label("char_end"))
+                    .filter(model.embedding.isnot(None), model.embedding_model_id == loaded.id, *conditions)
+                    .order_by(distance)
+                    .limit(k)
+                )
+                if chunks is not None:
+                    # Chunks get their own index scan in the same statement; the max per document is taken below
+                    chunk_distance = chunks.embedding.cosine_distance(query_vector)
+                    nearest_chunks = (
+                        select(chunks.document_id.label("id"), (1 - chunk_distance).label("score"),
+                               chunks.char_start, chunks.char_end)
+                        .filter(chunks.embedding.isnot(None), chunks.embedding_model_id == loaded.id)
+                        .order_by(chunk_distance)
+                        .limit(chunk_k)
+                    )
+                    if conditions:
+                        nearest_chunks = nearest_chunks.join(model, model.id == chunks.document_id).filter(*conditions)
+                    nearest = union_all(nearest, nearest_chunks)
+                nearest = nearest.lateral()
+                result = await db.execute(
+                    select(queries.c.i, nearest.c.id, nearest.c.score, nearest.c.char_start, nearest.c.char_end)
+                    .select_from(queries).join(nearest, true())
+                )
+                for i, row_id, score, char_start, char_end in result:
+                    hits[i].append((row_id, score, None if char_start is None else (char_start, char_end)))
+            else:
+                # Exact search in the process-wide index: one matrix-matrix product for the batch over
+                # only the rows the filters allow
+                index = await corpus.index.get(db, loaded.id)
+                mask = await self._mask(name, index, filters, db) if conditions else None
+                for i, row_hits in enumerate(index.search_many(query_embeddings, k=k, mask=mask)):
+                    hits[i] += [(row_id, score, None) for row_id, score in row_hits]
+
+                if chunks is not None:
+                    chunk_index = await corpus.chunk_index.get(db, loaded.id)
+                    allowed_chunks = None
+                    if conditions:
+                        allowed_chunks = (await db.execute(
+                            select(chunks.id).join(model, model.id == chunks.document_id).filter(*conditions)
+                        )).scalars().all()
+                    chunk_hits = chunk_index.search_many(query_embeddings, k=chunk_k, allowed_ids=allowed_chunks)
+                    chunk_ids = {chunk_id for row_hits in chunk_hits for chunk_id, _ in row_hits}
+                    if chunk_ids:
+                        located = {
+                            chunk_id: (document_id, (char_start, char_end))
+                            for chunk_id, document_id, char_start, char_end in await db.execute(
+                                select(chunks.id, chunks.document_id, chunks.char_start, chunks.char_end)
+                                .filter(chunks.id.in_(chunk_ids))
+                            )
+                        }
+                        for i, row_hits in enumerate(chunk_hits):
+                            for chunk_id, score in row_hits:
+                                if chunk_id in located:
+                                    document_id, span = located[chunk_id]
+                                    hits[i].append((document_id, score, span))
+        return [best_per_document(query_hits, k) for query_hits in hits]
+
+    async def _mask(self, name: str, index: VectorIndex, filters: SearchFilters, db) -> Optional[np.ndarray]:
+        """Rows of `index` that pass the filters, worked out before any scoring.
+
+        Surah range and revelation type are read off the index's surah_id column in memory;
+        whatever filters remain cost one id query.
+        """
+        mask = None
+        surah_ids = index.attributes.get("surah_id")
+        if surah_ids is not None and any(getattr(filters, field) is not None for field in QURAN_FILTERS):
+            # Rows without a known surah (0) never pass
+            last = surah_ids.max(initial=0) if filters.surah_to is None else filters.surah_to
+            mask = (surah_ids >= (filters.surah_from or 1)) & (surah_ids <= last)
+            if filters.revelation is not None:
+                surahs = await surah_cache.aget(db)
+                wanted = filters.revelation == "makki"
+                mask &= np.isin(surah_ids, [surah.id for surah in surahs.values() if surah.is_makki == wanted])
+            filters = filters._replace(**{field: None for field in QURAN_FILTERS})
+
+        conditions = self._conditions(name, filters)
+        if conditions:
+            allowed_ids = (await db.execute(select(CORPORA[name].model.id).filter(*conditions))).scalars().all()
+            allowed = np.isin(index.ids, np.asarray(allowed_ids, dtype=np.int64))
+            mask = allowed if mask is None else mask & allowed
+        return mask
+
+    async def _encoder(self) -> LoadedModel:
+        """The encoder matching the stored vectors.
+
+        While a model waits in standby (reembed.py is activating it), every semantic search reads
+        the registry first, so queries switch to it on the first search after the swap commits
+        rather than at the next registry poll. Otherwise this costs nothing.
+        """
+        standby = self.embedder.standby
+        if standby is not None:
+            async with self.sessions() as db:
+                active_id = await db.scalar(select(EmbeddingModel.id).filter(EmbeddingModel.is_active))
+            if active_id == standby.id:
+                self.embedder.promote(standby)
+        return self.embedder.current
+
+    async def _embed_queries(self, queries: List[str], loaded: LoadedModel) -> np.ndarray:
+        """Embeddings of the LLM-expanded queries; cache misses are expanded concurrently and encoded as one batch"""
+        embeddings = await self.cache.get_embeddings(queries, loaded.name)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            expansions = await self._bounded([self._expansion(queries[i]) for i in missing])
+            with stage("encode"):
+                encoded = await self.embedder.aencode([expansion.text for expansion in expansions], loaded)
+            for i, expansion, embedding in zip(missing, expansions, encoded):
+                # A fallback embedding must not outlive the LLM outage that caused it
+                if expansion.complete:
+                    await self.cache.set_embedding(queries[i], loaded.name, embedding)
+                else:
+                    self.degraded = True
+                embeddings[i] = embedding
+        return np.stack(embeddings)
+
+    async def _expansion(self, query: str) -> Expansion:
+        enhanced_query = await self.cache.get_expansion(query)
+        if enhanced_query is not None:
+            return Expansion(enhanced_query, True)
+        with stage("expand"):
+            if SEARCH_COALESCE:
+                expansion = await expansion_flights.do(normalize_query(query), lambda: self.expander.expand(query))
+            else:
+                expansion = await self.expander.expand(query)
+        if expansion.complete:
+            await self.cache.set_expansion(query, expansion.text)
+        return expansion
+
+    @staticmethod
+    def verse_to_dict(verse, surah_name: Optional[str]) -> Dict:
+        """Works on a Verse or any row with its columns (see VERSE_COLUMNS)"""
         return {
             "id": verse.id,
             "surah_number": verse.surah_id,
             "verse_number": verse.verse_number,
             "arabic": verse.arabic,
             "english": verse.english,
-            "surah_name": verse.surah_name
+            "surah_name": surah_name,
+            "source": "quran"
         }
 
-    def _calculate_relevance_score(self, verse, query, semantic_score=None):
-        """Calculate overall relevance score for ranking"""
-        score = 0
-        
-        # Direct text match bonus
-        if query.lower() in verse.english.lower():
-            score += 0.5
-            
-        # Semantic similarity score
-        if semantic_score is not None:
-            score += semantic_score * 0.5
-            
-        return score 
\ No newline at end of file
+    @staticmethod
+    def hadith_to_dict(hadith, collection_name: Optional[str], narrators: List[str]) -> Dict:
+        """Works on a Hadith or any row with its columns (see HADITH_COLUMNS)"""
+        return {
+            "id": hadith.id,
+            "collection": collection_name,
+            "hadith_number": hadith.hadith_number,
+            "chapter_number": hadith.chapter_number,
+            "grading": hadith.grading,
+            "narrators": narrators,
+            "arabic": hadith.arabic,
+            "english": hadith.english,
+            "source": "hadith"
+        }
+
+
+async def hydrate(sessions: async_sessionmaker, pages: List[Candidates],
+                  passages: Optional[List[Passages]] = None) -> List[List[Dict]]:
+    """Load full rows for the final pages only, one IN query per corpus for all of them, keeping hit order.
+
+    A hit matched through a chunk carries that passage of its English text.
+    """
+    ids: Dict[str, set] = {}
+    for hits in pages:
+        for (name, row_id), _ in hits:
+            ids.setdefault(name, set()).add(row_id)
+    if not ids:
+        return [[] for _ in pages]
+
+    loaders = {"quran": _load_verses, "hadith": _load_hadiths}
+    loaded = await asyncio.gather(*(loaders[name](sessions, list(row_ids)) for name, row_ids in ids.items()))
+    rows = {(name, row_id): row for name, by_id in zip(ids, loaded) for row_id, row in by_id.items()}
+    return [
+        [_with_passage({**rows[key], "score": score}, spans.get(key)) for key, score in hits if key in rows]
+        for hits, spans in zip(pages, passages or [{} for _ in pages])
+    ]
+
+
+def _with_passage(result: Dict, span: Optional[Tuple[int, int]]) -> Dict:
+    if span is not None and result.get("english"):
+        result["passage"] = result["english"][span[0]:span[1]]
+    return result
+
+
+async def _load_verses(sessions: async_sessionmaker, ids: List[int]) -> Dict[int, Dict]:
+    # Plain column rows (no embedding / tsvector payload); surah names come from the in-process cache
+    async with sessions() as db:
+        result = await db.execute(select(*VERSE_COLUMNS).filter(Verse.id.in_(ids)))
+        rows = result.all()
+        surahs = await surah_cache.aget(db, {row.surah_id for row in rows})
+        return {row.id: SearchService.verse_to_dict(row, surah_name(surahs, row.surah_id)) for row in rows}
+
+
+async def _load_hadiths(sessions: async_sessionmaker, ids: List[int]) -> Dict[int, Dict]:
+    async with sessions() as db:
+        result = await db.execute(
+            select(*HADITH_COLUMNS, HadithCollection.name.label("collection_name"))
+            .outerjoin(HadithCollection).filter(Hadith.id.in_(ids))
+        )
+        hadiths = result.all()
+        narrators: Dict[int, List[str]] = {}
+        result = await db.execute(
+            select(hadith_narrators.c.hadith_id, Narrator.name)
+            .join(Narrator, Narrator.id == hadith_narrators.c.narrator_id)
+            .filter(hadith_narrators.c.hadith_id.in_(ids))
+            .order_by(hadith_narrators.c.hadith_id, Narrator.id)
+        )
+        for hadith_id, name in result:
+            narrators.setdefault(hadith_id, []).append(name)
+        return {
+            row.id: SearchService.hadith_to_dict(row, row.collection_name, narrators.get(row.id, []))
+            for row in hadiths
+        }
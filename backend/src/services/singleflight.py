@@ -0,0 +1,77 @@
+"""In-process request coalescing ("single flight").
+
+When identical searches arrive together (e.g. right after a push notification),
+the first one runs and the rest await its result instead of each paying for an
+LLM expansion, an encode and a scoring pass. Results are shared, not copied:
+callers must treat them as read-only.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, List, TypeVar
+
+from .metrics import metrics
+
+T = TypeVar("T")
+
+COALESCED = metrics.counter(
+    "baseera_singleflight_calls_total",
+    "Calls by whether they ran the work (leader) or awaited an identical call in flight (shared)",
+    ("flight", "role"),
+)
+_flights: List["SingleFlight"] = []
+metrics.gauge("baseera_singleflight_in_flight", "Distinct calls running, per flight", ("flight",),
+              lambda: {(flight.name,): float(len(flight)) for flight in _flights})
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution of the work.
+
+    The work runs in its own task, so a caller that is cancelled (a client that went
+    away) does not cancel it for the others; it is cancelled only once every caller
+    has gone. An exception reaches every caller of that flight, and the next call
+    with the key starts afresh.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, _Flight] = {}
+        _flights.append(self)
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(asyncio.ensure_future(work()))
+            flight.task.add_done_callback(lambda task: self._land(key, flight))
+            COALESCED.inc(self.name, "leader")
+        else:
+            COALESCED.inc(self.name, "shared")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to use the result; later callers start a new flight
+                self._land(key, flight)
+                flight.task.cancel()
+
+    def _land(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if flight.task.done() and not flight.task.cancelled():
+            flight.task.exception()  # retrieved, even if every caller was cancelled first
+
+    def stats(self) -> Dict[str, float]:
+        leaders, shared = COALESCED.value(self.name, "leader"), COALESCED.value(self.name, "shared")
+        return {"leaders": leaders, "shared": shared, "ratio": shared / (leaders + shared) if leaders else 0.0}
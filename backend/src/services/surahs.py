@@ -0,0 +1,67 @@
+import threading
+from types import MappingProxyType
+from typing import Iterable, Mapping, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models import Surah
+
+
+class SurahInfo(NamedTuple):
+    id: int
+    name: Optional[str]
+    name_arabic: Optional[str]
+    is_makki: Optional[bool]
+    verses_count: Optional[int]
+
+
+_COLUMNS = (Surah.id, Surah.name, Surah.name_arabic, Surah.is_makki, Surah.verses_count)
+
+
+class SurahCache:
+    """The 114-row surahs table as an immutable in-process lookup, so serializers never join or lazy-load it.
+
+    It is loaded on first use and reloaded only when asked for an id it does not hold yet
+    (e.g. surahs seeded after the worker started).
+    """
+
+    def __init__(self):
+        self._surahs: Mapping[int, SurahInfo] = MappingProxyType({})
+        self._lock = threading.Lock()
+
+    def _missing(self, ids: Iterable[int]) -> bool:
+        surahs = self._surahs
+        return not surahs or any(surah_id is not None and surah_id not in surahs for surah_id in ids)
+
+    def _store(self, rows) -> Mapping[int, SurahInfo]:
+        surahs = MappingProxyType({row[0]: SurahInfo(*row) for row in rows})
+        with self._lock:
+            self._surahs = surahs
+        return surahs
+
+    def get(self, db: Session, ids: Iterable[int] = ()) -> Mapping[int, SurahInfo]:
+        ids = tuple(ids)
+        if self._missing(ids):
+            return self._store(db.execute(select(*_COLUMNS)).all())
+        return self._surahs
+
+    async def aget(self, db: AsyncSession, ids: Iterable[int] = ()) -> Mapping[int, SurahInfo]:
+        ids = tuple(ids)
+        if self._missing(ids):
+            return self._store((await db.execute(select(*_COLUMNS))).all())
+        return self._surahs
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._surahs = MappingProxyType({})
+
+
+def surah_name(surahs: Mapping[int, SurahInfo], surah_id: Optional[int]) -> Optional[str]:
+    """None for a verse whose surah_id is NULL or not in the table, rather than failing the whole response"""
+    surah = surahs.get(surah_id)
+    return surah.name if surah else None
+
+
+surah_cache = SurahCache()
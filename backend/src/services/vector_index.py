@@ -0,0 +1,247 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import EMBEDDING_RERANK, EMBEDDING_SNAPSHOT_DIR
+from ..models import Hadith, HadithChunk, Verse
+from .embedding_snapshot import read_snapshot, signature_query, snapshot_path
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIndex:
+    """Pre-normalized float32 embedding matrix with a parallel id array.
+
+    `attributes` holds optional per-row columns (e.g. surah_id) parallel to `ids`,
+    so filters on them become boolean masks without a database round trip.
+    """
+
+    def __init__(self, ids: np.ndarray, matrix: np.ndarray):
+        self.ids = np.ascontiguousarray(ids, dtype=np.int64)
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.attributes: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, Sequence[float]]]) -> "VectorIndex":
+        ids, vectors = [], []
+        for row_id, embedding in rows:
+            if embedding is None:
+                continue
+            ids.append(row_id)
+            vectors.append(embedding)
+
+        if not vectors:
+            return cls(np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32))
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        return cls(np.asarray(ids, dtype=np.int64), _normalize(matrix))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dimension(self) -> int:
+        return self.matrix.shape[1]
+
+    def search(self, query_embedding: Sequence[float], k: int = 10,
+               allowed_ids: Optional[Sequence[int]] = None) -> List[Tuple[int, float]]:
+        """Return the k (id, cosine similarity) pairs closest to the query, best first.
+
+        allowed_ids restricts the result to those ids (exact, unlike a post-filter on the top k).
+        """
+        return self.search_many([query_embedding], k, allowed_ids)[0]
+
+    def search_many(self, query_embeddings, k: int = 10, allowed_ids: Optional[Sequence[int]] = None,
+                    mask: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        """search() for a batch of queries as one matrix-matrix product; one hit list per query.
+
+        `mask` (a boolean per row) restricts the result like allowed_ids. Either way only
+        the allowed rows are scored, so a selective filter makes the search cheaper.
+        """
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        if len(self) == 0 or k <= 0:
+            return [[] for _ in queries]
+        if queries.shape[1] != self.dimension:
+            raise ValueError(
+                f"Query embedding has dimension {queries.shape[1]}, index has {self.dimension}"
+            )
+        norms = np.linalg.norm(queries, axis=1)
+        valid = norms > 0
+        queries = queries / np.where(valid, norms, 1.0)[:, None]
+
+        if allowed_ids is not None:
+            allowed = np.isin(self.ids, np.asarray(allowed_ids, dtype=np.int64))
+            mask = allowed if mask is None else mask & allowed
+        rows = None if mask is None else np.flatnonzero(mask)
+        available = len(self) if rows is None else len(rows)
+        k = min(k, available)
+        if k == 0:
+            return [[] for _ in queries]
+
+        scores = self._scores(queries, rows)
+        top, top_scores = self._top(queries, scores, k, rows)
+        return [
+            list(zip(self.ids[row].tolist(), row_scores.tolist())) if ok else []
+            for row, row_scores, ok in zip(top, top_scores, valid)
+        ]
+
+    def _scores(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Scores against every row, or only the given row positions (one column each)"""
+        return queries @ (self.matrix if rows is None else self.matrix[rows]).T
+
+    def _top(self, queries: np.ndarray, scores: np.ndarray, k: int,
+             rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Row positions (in the whole index) and scores of each query's k best columns of `scores`"""
+        top, top_scores = _top_k(scores, k)
+        return (top if rows is None else rows[top]), top_scores
+
+
+class QuantizedVectorIndex(VectorIndex):
+    """VectorIndex scanned on int8 / float16 codes, with the best candidates re-ranked exactly.
+
+    Each query reads the codes (a half or a quarter of the float32 bytes) plus only
+    rerank * k rows of `matrix`, which is normally a memory-mapped snapshot.
+    """
+
+    SCAN_ROWS = 16384  # codes are widened to float32 this many rows at a time
+
+    def __init__(self, ids: np.ndarray, matrix: np.ndarray, codes: np.ndarray,
+                 scales: Optional[np.ndarray] = None, rerank: int = 4):
+        super().__init__(ids, matrix)
+        self.codes = codes
+        self.scales = scales
+        self.rerank = rerank
+
+    def _scores(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        count = len(self) if rows is None else len(rows)
+        scores = np.empty((len(queries), count), dtype=np.float32)
+        for start in range(0, count, self.SCAN_ROWS):
+            stop = start + self.SCAN_ROWS
+            part = slice(start, stop) if rows is None else rows[start:stop]
+            block = queries @ self.codes[part].astype(np.float32).T
+            if self.scales is not None:
+                block *= self.scales[part]
+            scores[:, start:stop] = block
+        return scores
+
+    def _top(self, queries: np.ndarray, scores: np.ndarray, k: int,
+             rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        if self.rerank <= 0:
+            return super()._top(queries, scores, k, rows)
+        shortlist, _ = super()._top(queries, scores, min(k * self.rerank, scores.shape[1]), rows)
+        exact = np.einsum("qd,qcd->qc", queries, self.matrix[shortlist])
+        order = np.argsort(-exact, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(shortlist, order, axis=1), np.take_along_axis(exact, order, axis=1)
+
+
+def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Column positions and values of each row's k highest scores, best first"""
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+def load_snapshot_index(table: str, signature: Tuple, rerank: int = EMBEDDING_RERANK,
+                        root: str = EMBEDDING_SNAPSHOT_DIR) -> Optional[VectorIndex]:
+    """Index over the memory-mapped snapshot of a table, if one was written at this signature"""
+    snapshot = read_snapshot(snapshot_path(table, signature[0], root), signature)
+    if snapshot is None:
+        return None
+    if snapshot.codes is None:
+        return VectorIndex(snapshot.ids, snapshot.vectors)
+    return QuantizedVectorIndex(snapshot.ids, snapshot.vectors, snapshot.codes, snapshot.scales, rerank)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class CorpusIndex:
+    """Process-wide VectorIndex over one table, rebuilt when the table changes.
+
+    `attributes` are columns of the table loaded into VectorIndex.attributes with the vectors.
+    """
+
+    def __init__(self, model, attributes: Sequence = ()):
+        self.model = model
+        self.attributes = attributes
+        self._index: Optional[VectorIndex] = None
+        self._signature = None
+        self._stale = False
+        self._lock = asyncio.Lock()
+
+        for event_name in ("after_insert", "after_update", "after_delete"):
+            event.listen(model, event_name, self._mark_stale)
+
+    def _mark_stale(self, mapper, connection, target):
+        self._stale = True
+
+    def invalidate(self):
+        self._stale = True
+
+    async def _current_signature(self, db: AsyncSession, model_id: Optional[int]):
+        # Cheap change detector for writes made by other processes (e.g. seed_db.py)
+        result = await db.execute(signature_query(self.model, model_id))
+        return (model_id, *result.one())
+
+    async def get(self, db: AsyncSession, model_id: Optional[int]) -> VectorIndex:
+        """Index over the rows embedded with the given registry model"""
+        signature = await self._current_signature(db, model_id)
+        index = self._index
+        if index is not None and not self._stale and signature == self._signature:
+            return index
+
+        async with self._lock:
+            if self._index is None or self._stale or signature != self._signature:
+                self._stale = False
+                index = await self._load(db, model_id, signature)
+                if self.attributes:
+                    index.attributes = await self._load_attributes(db, model_id, index.ids)
+                self._index, self._signature = index, signature
+            return self._index
+
+    def _embedded(self, model_id: Optional[int]) -> tuple:
+        return self.model.embedding.isnot(None), self.model.embedding_model_id == model_id
+
+    async def _load(self, db: AsyncSession, model_id: Optional[int], signature) -> VectorIndex:
+        if EMBEDDING_SNAPSHOT_DIR:
+            # Shared read-only pages instead of a private copy, when the ingest wrote a current snapshot
+            index = await asyncio.to_thread(load_snapshot_index, self.model.__tablename__, signature)
+            if index is not None:
+                return index
+            logger.warning("No current embedding snapshot for %s; loading vectors from the database",
+                           self.model.__tablename__)
+        result = await db.execute(
+            select(self.model.id, self.model.embedding).filter(*self._embedded(model_id)).order_by(self.model.id)
+        )
+        rows = result.all()
+        # Building the matrix is CPU work; keep it off the event loop
+        return await asyncio.to_thread(VectorIndex.from_rows, rows)
+
+    async def _load_attributes(self, db: AsyncSession, model_id: Optional[int], ids: np.ndarray) -> Dict[str, np.ndarray]:
+        """Attribute columns parallel to `ids`; 0 for a row deleted since the vectors were read"""
+        result = await db.execute(
+            select(self.model.id, *self.attributes).filter(*self._embedded(model_id)).order_by(self.model.id)
+        )
+        rows = result.all()
+        row_ids = np.asarray([row[0] for row in rows], dtype=np.int64)
+        positions = np.minimum(np.searchsorted(row_ids, ids), max(len(rows) - 1, 0))
+        found = row_ids[positions] == ids if len(rows) else np.zeros(len(ids), dtype=bool)
+        attributes = {}
+        for i, column in enumerate(self.attributes, start=1):
+            values = np.asarray([row[i] or 0 for row in rows], dtype=np.int64)
+            attributes[column.key] = np.where(found, values[positions] if len(rows) else 0, 0)
+        return attributes
+
+
+# surah_id lets surah range and revelation type filters mask rows before any scoring
+verse_index = CorpusIndex(Verse, attributes=(Verse.surah_id,))
+hadith_index = CorpusIndex(Hadith)
+hadith_chunk_index = CorpusIndex(HadithChunk)
@@ -1,5 +1,5 @@
-from database import SessionLocal
-from models import Surah, Verse
+from src.database import SessionLocal
+from src.models import Surah, Verse
 
 def test_models():
     db = SessionLocal()
@@ -0,0 +1,18 @@
+from src.arabic import has_arabic, normalize_arabic
+
+
+def test_strips_diacritics_and_quranic_marks():
+    assert normalize_arabic("بِسْمِ ٱللَّهِ ٱلرَّحْمَٰنِ ٱلرَّحِيمِ") == "بسم الله الرحمن الرحيم"
+
+
+def test_folds_alif_hamza_and_ta_marbuta():
+    assert normalize_arabic("إِيمَان") == "ايمان"
+    assert normalize_arabic("رَحْمَةٌ") == "رحمه"
+    assert normalize_arabic("مُؤْمِنٌ") == "مومن"
+    assert normalize_arabic("هُدًى") == "هدي"
+
+
+def test_has_arabic_ignores_marks_and_latin_text():
+    assert has_arabic("sabr صبر")
+    assert not has_arabic("patience")
+    assert not has_arabic("\u064b\u0640")
@@ -0,0 +1,34 @@
+from src.services.chunking import best_per_document, chunk_spans, source_hash
+
+
+def test_short_texts_are_not_chunked():
+    assert chunk_spans("one two three", size=3, overlap=1) == []
+    assert chunk_spans(None) == []
+
+
+def test_windows_overlap_and_cover_the_text():
+    text = " ".join(f"w{i}" for i in range(10))
+
+    spans = chunk_spans(text, size=4, overlap=1)
+
+    assert [text[start:end].split() for start, end in spans] == [
+        ["w0", "w1", "w2", "w3"],
+        ["w3", "w4", "w5", "w6"],
+        ["w6", "w7", "w8", "w9"],
+    ]
+
+
+def test_source_hash_changes_with_text_model_and_settings():
+    base = source_hash("text", 1, size=160, overlap=40)
+
+    assert base == source_hash("text", 1, size=160, overlap=40)
+    assert len({base, source_hash("text!", 1), source_hash("text", 2), source_hash("text", 1, size=120)}) == 4
+
+
+def test_best_per_document_keeps_the_max_score_and_its_span():
+    hits = [(1, 0.5, None), (2, 0.7, (0, 10)), (1, 0.9, (20, 30)), (2, 0.6, (10, 20)), (3, 0.4, None)]
+
+    ranked, spans = best_per_document(hits, k=2)
+
+    assert ranked == [(1, 0.9), (2, 0.7)]
+    assert spans == {1: (20, 30), 2: (0, 10)}
@@ -1,10 +1,34 @@
-from src.database import engine
+import asyncio
+
+import src.database as database
+from src.config import DB_MAX_OVERFLOW, DB_POOL_SIZE
+from src.database import engine, ping, pool_stats
+from src.services.metrics import metrics
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
 
 def test_connection():
     with engine.connect() as conn:
         result = conn.execute(text("SELECT 1"))
         print("Database connection successful!")
 
+def test_statement_timeout_is_set_per_driver(monkeypatch):
+    monkeypatch.setattr(database, "DB_STATEMENT_TIMEOUT_MS", 250)
+
+    assert database._connect_args() == {"options": "-c statement_timeout=250"}
+    assert database._connect_args(asyncpg=True) == {"server_settings": {"statement_timeout": "250"}}
+
+
+def test_ping_reports_an_unreachable_database():
+    error = asyncio.run(ping(create_async_engine("postgresql+asyncpg://nobody@127.0.0.1:1/none"), timeout=5))
+
+    assert error and "Error" in error
+
+
+def test_pool_usage_is_exported():
+    assert pool_stats()["primary"]["capacity"] == DB_POOL_SIZE + DB_MAX_OVERFLOW
+    assert f'baseera_db_pool_capacity{{pool="primary"}} {DB_POOL_SIZE + DB_MAX_OVERFLOW}' in metrics.render()
+
+
 if __name__ == "__main__":
-    test_connection() 
\ No newline at end of file
+    test_connection()
@@ -0,0 +1,79 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest import mock
+
+import pytest
+
+from benchmarks.fakes import HashingEncoder
+from src.models import EmbeddingModel
+from src.services.cache import MemoryCache, QueryCache
+from src.services.embeddings import EmbeddingProvider
+from src.services.search import SearchService
+
+
+class Registry:
+    """Stands in for a search sessionmaker whose sessions only report the active model id"""
+
+    def __init__(self, active_id):
+        self.active_id = active_id
+        self.reads = 0
+
+    @asynccontextmanager
+    async def __call__(self):
+        yield self
+
+    async def scalar(self, statement):
+        self.reads += 1
+        return self.active_id
+
+
+def provider_with_counts():
+    loads = []
+
+    def factory(name):
+        loads.append(name)
+        return HashingEncoder(name)
+
+    return EmbeddingProvider("old", factory=factory), loads
+
+
+def test_a_prepared_model_is_switched_to_without_loading_it_again():
+    provider, loads = provider_with_counts()
+    provider.load("old", 1)
+
+    standby = provider.prepare("new", 2, False)
+    assert provider.current.name == "old" and provider.standby is standby
+
+    assert provider.load("new", 2) is standby
+    assert loads == ["old", "new"] and provider.standby is None
+
+
+def test_search_switches_to_the_standby_model_once_it_is_active():
+    provider, _ = provider_with_counts()
+    provider.load("old", 1)
+    registry = Registry(active_id=1)
+    service = SearchService(registry, provider, None, QueryCache(MemoryCache()))
+
+    assert asyncio.run(service._encoder()).name == "old"
+    assert registry.reads == 0  # nothing pending: no registry read per search
+
+    provider.prepare("new", 2, False)
+    assert asyncio.run(service._encoder()).name == "old"
+    registry.active_id = 2
+    assert asyncio.run(service._encoder()).name == "new"
+    assert provider.standby is None and registry.reads == 2
+
+
+def test_activating_another_dimension_needs_embedding_dim_to_match(monkeypatch):
+    from scripts import reembed
+
+    registered = EmbeddingModel(id=2, name="wide", dimension=768, normalized=False, is_active=False)
+    monkeypatch.setattr(reembed, "PGVECTOR", True)
+    monkeypatch.setattr(reembed, "EMBEDDING_DIM", 384)
+    monkeypatch.setattr(reembed, "SentenceTransformer", HashingEncoder)
+    monkeypatch.setattr(reembed, "SessionLocal", mock.MagicMock)
+    monkeypatch.setattr(reembed, "get_or_register_model", lambda db, *args: registered)
+    monkeypatch.setattr(reembed, "stage", mock.Mock(side_effect=AssertionError("staged before refusing")))
+
+    with pytest.raises(SystemExit, match="EMBEDDING_DIM=768"):
+        reembed.main(["--model", "wide", "--activate"])
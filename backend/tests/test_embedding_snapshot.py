@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.services.embedding_snapshot import quantize, read_snapshot, snapshot_path, write_snapshot
+from src.services.vector_index import QuantizedVectorIndex, VectorIndex, load_snapshot_index
+
+
+def _corpus(rows=500, dimension=32, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.arange(1, rows + 1), rng.normal(size=(rows, dimension)).astype(np.float32), rng
+
+
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+def test_quantized_snapshot_reranks_to_the_exact_top_k(tmp_path, dtype):
+    ids, vectors, rng = _corpus()
+    signature = (1, len(ids), int(ids[-1]))
+    write_snapshot(snapshot_path("verses", 1, str(tmp_path)), ids, vectors, signature, dtype)
+
+    index = load_snapshot_index("verses", signature, rerank=4, root=str(tmp_path))
+    exact = VectorIndex.from_rows(zip(ids.tolist(), vectors))
+    queries = rng.normal(size=(8, 32))
+
+    assert isinstance(index, QuantizedVectorIndex) and isinstance(index.codes, np.memmap)
+    for approximate, expected in zip(index.search_many(queries, k=10), exact.search_many(queries, k=10)):
+        assert [row_id for row_id, _ in approximate] == [row_id for row_id, _ in expected]
+        assert np.allclose([score for _, score in approximate], [score for _, score in expected], atol=1e-5)
+
+
+def test_int8_codes_reconstruct_the_vectors():
+    _, vectors, _ = _corpus(rows=50)
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    codes, scales = quantize(unit, "int8")
+
+    assert codes.dtype == np.int8 and np.abs(codes).max() == 127
+    assert np.abs(codes * scales[:, None] - unit).max() <= scales.max() / 2 + 1e-7
+
+
+def test_snapshot_is_ignored_once_the_table_has_changed(tmp_path):
+    ids, vectors, _ = _corpus(rows=20)
+    path = snapshot_path("verses", 1, str(tmp_path))
+    write_snapshot(path, ids, vectors, (1, 20, 20), "float32")
+
+    assert type(load_snapshot_index("verses", (1, 20, 20), root=str(tmp_path))) is VectorIndex
+    assert read_snapshot(path, (1, 21, 21)) is None
+    assert read_snapshot(path, (2, 20, 20)) is None
+    assert read_snapshot(snapshot_path("hadiths", 1, str(tmp_path)), (1, 20, 20)) is None
+
+
+def test_rewrite_swaps_the_generation_in_place(tmp_path):
+    ids, vectors, _ = _corpus(rows=20)
+    path = snapshot_path("verses", 1, str(tmp_path))
+    write_snapshot(path, ids, vectors, (1, 20, 20), "float32")
+    first = os.readlink(path)
+    mapped = read_snapshot(path, (1, 20, 20))
+
+    write_snapshot(path, ids[:10], vectors[:10], (1, 10, 10), "float32")
+
+    assert os.readlink(path) != first
+    assert sorted(os.listdir(tmp_path)) == sorted(["verses-1", os.readlink(path)])
+    # A worker still holding the old generation keeps reading it
+    assert len(mapped.ids) == 20 and float(np.linalg.norm(mapped.vectors[0])) == pytest.approx(1.0)
+    assert len(read_snapshot(path, (1, 10, 10)).ids) == 10
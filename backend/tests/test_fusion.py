@@ -0,0 +1,37 @@
+import pytest
+
+from src.services.fusion import fuse
+
+
+def test_rrf_rewards_ids_found_by_both_legs():
+    legs = {
+        "text": [(1, 0.9), (2, 0.5), (3, 0.1)],
+        "semantic": [(4, 0.95), (2, 0.9), (5, 0.8)],
+    }
+
+    hits = fuse(legs, "rrf", limit=3)
+
+    assert hits[0][0] == 2
+    assert {doc_id for doc_id, _ in hits} == {2, 1, 4}
+
+
+def test_rrf_weights_shift_the_ranking():
+    legs = {"text": [(1, 1.0)], "semantic": [(2, 1.0)]}
+
+    assert fuse(legs, "rrf", {"text": 0.5, "semantic": 2.0}, limit=2)[0][0] == 2
+
+
+def test_weighted_blend_scales_each_leg_by_its_best_score():
+    legs = {
+        "text": [(1, 0.2), (2, 0.1)],
+        "semantic": [(2, 0.9), (3, 0.45)],
+    }
+
+    hits = fuse(legs, "weighted", {"text": 1.0, "semantic": 1.0}, limit=3)
+
+    assert hits == [(2, 1.5), (1, 1.0), (3, 0.5)]
+
+
+def test_unknown_method_raises():
+    with pytest.raises(ValueError):
+        fuse({}, "borda")
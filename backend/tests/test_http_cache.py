@@ -0,0 +1,121 @@
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.api.http_cache import ResponseCacheMiddleware
+from src.services.cache import MemoryCache
+from src.services.corpus_version import CorpusVersionTracker
+
+
+def make_app(version=1):
+    tracker = CorpusVersionTracker()
+    tracker.set(version)
+    calls = []
+    app = FastAPI()
+    app.add_middleware(ResponseCacheMiddleware, tracker=tracker, cache=MemoryCache(maxsize=16), max_age=60)
+
+    @app.get("/api/verses/export")
+    def export():
+        calls.append("export")
+        return StreamingResponse(iter(["{}\n"]), media_type="application/x-ndjson")
+
+    @app.get("/api/verses/{verse_id}")
+    def get_verse(verse_id: int):
+        calls.append(verse_id)
+        if verse_id == 404:
+            raise HTTPException(status_code=404)
+        return {"id": verse_id}
+
+    @app.get("/search")
+    def search(q: str, response: Response):
+        calls.append(q)
+        if q == "degraded":
+            response.headers["Cache-Control"] = "no-store"
+        return {"q": q}
+
+    @app.get("/search/cache")
+    def stats():
+        calls.append("stats")
+        return {}
+
+    return TestClient(app), tracker, calls
+
+
+def test_repeat_requests_are_served_from_the_cache_with_an_etag():
+    client, _, calls = make_app()
+
+    first = client.get("/api/verses/1")
+    second = client.get("/api/verses/1")
+
+    assert calls == [1]
+    assert second.json() == {"id": 1}
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.headers["cache-control"] == "public, max-age=60"
+    assert second.headers["content-type"] == "application/json"
+
+
+def test_matching_if_none_match_is_a_304_without_running_the_route():
+    client, _, calls = make_app()
+    etag = client.get("/api/verses/2").headers["etag"]
+    calls.clear()
+
+    response = client.get("/api/verses/2", headers={"If-None-Match": f'"other", {etag}'})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert calls == []
+
+
+def test_a_new_corpus_version_changes_the_etag_and_drops_cached_bodies():
+    client, tracker, calls = make_app()
+    etag = client.get("/api/verses/3").headers["etag"]
+
+    tracker.set(2)
+    response = client.get("/api/verses/3", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert calls == [3, 3]
+
+
+def test_errors_streams_and_live_counters_are_not_cached():
+    client, _, calls = make_app()
+
+    for _ in range(2):
+        assert client.get("/api/verses/404").status_code == 404
+        export = client.get("/api/verses/export")
+        client.get("/search/cache")
+
+    assert calls == [404, "export", "stats"] * 2
+    assert "etag" in export.headers and export.text == "{}\n"
+
+
+def test_caching_is_off_until_the_version_is_known():
+    client, _, calls = make_app(version=None)
+
+    client.get("/api/verses/1")
+    response = client.get("/api/verses/1")
+
+    assert calls == [1, 1]
+    assert "etag" not in response.headers
+
+
+def test_search_gets_a_weak_etag_and_degraded_pages_are_not_stored():
+    client, _, calls = make_app()
+
+    etag = client.get("/search?q=mercy").headers["etag"]
+    assert etag.startswith('W/"')
+    assert client.get("/search?q=mercy", headers={"If-None-Match": etag[2:]}).status_code == 304
+
+    for _ in range(2):
+        degraded = client.get("/search?q=degraded")
+    assert degraded.headers["cache-control"] == "no-store" and "etag" not in degraded.headers
+    assert calls == ["mercy", "degraded", "degraded"]
+
+
+def test_if_none_match_star_still_runs_the_route():
+    client, _, calls = make_app()
+
+    assert client.get("/api/verses/404", headers={"If-None-Match": "*"}).status_code == 404
+    assert client.get("/api/verses/5", headers={"If-None-Match": "*"}).status_code == 200
+    assert calls == [404, 5]
@@ -0,0 +1,102 @@
+import asyncio
+
+import httpx
+import numpy as np
+from openai import AsyncOpenAI
+
+from benchmarks.fakes import FakeExpander, HashingEncoder, fake_llm_app
+from src.services.cache import MemoryCache, QueryCache
+from src.services.embeddings import EmbeddingProvider
+from src.services.llm import CircuitBreaker, Expansion, QueryExpander
+from src.services.search import SearchService
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def expander(client, **options):
+    options.setdefault("breaker", CircuitBreaker(failures=2, reset_after=30))
+    return QueryExpander(client, **options)
+
+
+def test_breaker_opens_after_repeated_failures_and_lets_one_trial_through_later():
+    clock = Clock()
+    breaker = CircuitBreaker(failures=2, reset_after=30, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now = 31
+    assert breaker.allow()       # the trial call
+    assert not breaker.allow()   # everyone else keeps skipping while it runs
+    breaker.record_success()
+    assert breaker.allow() and not breaker.is_open
+
+
+def test_slow_llm_falls_back_to_the_raw_query_at_the_deadline():
+    result = asyncio.run(expander(FakeExpander(latency=1.0), deadline=0.05).expand("patience"))
+
+    assert result == Expansion("patience", False)
+
+
+def test_streamed_expansion_keeps_what_arrived_before_the_deadline():
+    # 7 words over 0.7s; the deadline leaves time for a few of them
+    result = asyncio.run(expander(FakeExpander(latency=0.7), deadline=0.25, stream=True).expand("patience"))
+
+    assert not result.complete
+    assert result.text.startswith("patience patience sabr")
+    assert "hardship" not in result.text
+
+
+def test_partial_streams_do_not_trip_the_breaker():
+    breaker = CircuitBreaker(failures=1, reset_after=30)
+    client = FakeExpander(latency=0.7)
+
+    for _ in range(2):
+        result = asyncio.run(expander(client, deadline=0.25, stream=True, breaker=breaker).expand("patience"))
+
+    assert client.calls == 2 and not breaker.is_open
+    assert not result.complete and result.text != "patience"
+
+
+def test_open_circuit_skips_the_llm():
+    client = FakeExpander(fail=True)
+    service = expander(client)
+
+    results = [asyncio.run(service.expand("mercy")) for _ in range(4)]
+
+    assert client.calls == 2
+    assert all(result == Expansion("mercy", False) for result in results)
+
+
+def test_real_client_against_the_fake_server():
+    client = AsyncOpenAI(api_key="test", base_url="http://llm.test/v1",
+                         http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_llm_app())))
+
+    plain = asyncio.run(expander(client).expand("zakat"))
+    streamed = asyncio.run(expander(client, stream=True).expand("zakat"))
+
+    assert plain == streamed == Expansion("zakat charity alms giving wealth poor", True)
+
+
+def test_fallback_embeddings_are_not_cached():
+    provider = EmbeddingProvider("hashing-encoder", factory=HashingEncoder)
+    loaded = provider.load()
+    cache = QueryCache(MemoryCache())
+    service = SearchService(None, provider, FakeExpander(latency=1.0), cache)
+    service.expander.deadline = 0.05
+    service.expander.breaker = CircuitBreaker()
+
+    [embedding] = asyncio.run(service._embed_queries(["mercy"], loaded))
+
+    assert np.array_equal(embedding, HashingEncoder().encode("mercy"))
+    assert asyncio.run(cache.get_expansion("mercy")) is None
+    assert asyncio.run(cache.get_embedding("mercy", loaded.name)) is None
+    assert service.degraded
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.timing import TimingMiddleware
+from src.services.metrics import REQUEST_SECONDS, STAGE_SECONDS, Registry, stage, track
+
+
+def make_client(**options):
+    app = FastAPI()
+    app.add_middleware(TimingMiddleware, **options)
+
+    @app.get("/search")
+    async def search():
+        async def leg():
+            async with stage("text"):
+                await asyncio.sleep(0.001)
+
+        await asyncio.gather(leg(), leg())
+        with stage("serialize"):
+            return {"results": []}
+
+    @app.get("/api/verses/{verse_id}")
+    def get_verse(verse_id: int):
+        return {"id": verse_id}
+
+    return TestClient(app)
+
+
+def test_histogram_renders_cumulative_prometheus_buckets():
+    registry = Registry()
+    histogram = registry.histogram("stage_seconds", "Stage time", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "encode")
+
+    lines = registry.render().splitlines()
+
+    assert lines[:2] == ["# HELP stage_seconds Stage time", "# TYPE stage_seconds histogram"]
+    assert 'stage_seconds_bucket{stage="encode",le="0.1"} 2' in lines
+    assert 'stage_seconds_bucket{stage="encode",le="1"} 3' in lines
+    assert 'stage_seconds_bucket{stage="encode",le="+Inf"} 4' in lines
+    assert 'stage_seconds_count{stage="encode"} 4' in lines
+    assert 'stage_seconds_sum{stage="encode"} 3.650000' in lines
+
+
+def test_stage_is_a_no_op_outside_a_tracked_request():
+    with stage("encode"):
+        pass
+
+    with track() as timings, stage("encode"):
+        pass
+
+    assert list(timings.stages) == ["encode"]
+
+
+def test_server_timing_header_lists_stages_and_total():
+    client = make_client(record_metrics=False, server_timing=True)
+
+    header = client.get("/search").headers["server-timing"]
+
+    names = [part.split(";")[0] for part in header.split(", ")]
+    assert names == ["text", "serialize", "total"]
+    # Both concurrent legs are counted
+    assert float(header.split(", ")[0].split("dur=")[1]) >= 2.0
+
+
+def test_metrics_are_labelled_by_route_template():
+    client = make_client(record_metrics=True)
+    before = REQUEST_SECONDS.count("GET", "/api/verses/{verse_id}", "200")
+    stages_before = STAGE_SECONDS.count("text")
+
+    client.get("/api/verses/1")
+    client.get("/api/verses/2")
+    client.get("/search")
+
+    assert REQUEST_SECONDS.count("GET", "/api/verses/{verse_id}", "200") == before + 2
+    assert STAGE_SECONDS.count("text") == stages_before + 1
+    assert "server-timing" not in client.get("/search").headers
+
+
+def test_slow_requests_are_logged_with_their_stages(caplog):
+    client = make_client(record_metrics=False, slow_ms=0.001)
+
+    with caplog.at_level(logging.WARNING, logger="src.api.timing"):
+        client.get("/search", params={"q": "patience"})
+
+    [record] = caplog.records
+    assert "/search?q=patience" in record.getMessage()
+    assert "text=" in record.getMessage() and "serialize=" in record.getMessage()
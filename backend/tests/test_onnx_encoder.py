@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from src.config import EMBEDDING_MODEL
+from src.services.onnx_encoder import pool
+
+
+@pytest.mark.parametrize("mode", ["mean", "max", "cls"])
+def test_pooling_ignores_padding(mode):
+    rng = np.random.default_rng(0)
+    hidden = rng.normal(size=(1, 3, 8)).astype(np.float32)
+    padded = np.concatenate([hidden, rng.normal(size=(1, 4, 8)).astype(np.float32)], axis=1)
+
+    expected = pool(hidden, np.ones((1, 3), dtype=np.int64), mode)
+    actual = pool(padded, np.array([[1, 1, 1, 0, 0, 0, 0]]), mode)
+
+    assert np.allclose(actual, expected)
+    if mode == "mean":
+        assert np.allclose(expected, hidden.mean(axis=1), atol=1e-6)
+
+
+@pytest.mark.parametrize("quantized, floor", [(False, 0.9999), (True, 0.98)])
+def test_onnx_embeddings_agree_with_sentence_transformers(tmp_path_factory, quantized, floor):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tokenizers")
+    sentence_transformers = pytest.importorskip("sentence_transformers")
+    from src.services.onnx_encoder import OnnxEncoder, export
+
+    texts = [
+        "patience in hardship", "  Night prayer ", "zakat",
+        # Past the 256-token window, so truncation has to match too
+        " ".join(["whoever believes in Allah and the Last Day should speak good or keep silent"] * 30),
+    ]
+    directory = export(EMBEDDING_MODEL, str(tmp_path_factory.getbasetemp() / "onnx"), quantize=True)
+    expected = sentence_transformers.SentenceTransformer(EMBEDDING_MODEL, device="cpu").encode(texts)
+
+    encoder = OnnxEncoder(directory, quantized=quantized, threads=1)
+    actual = encoder.encode(texts, batch_size=2)
+    cosine = (actual * expected).sum(axis=1) / np.linalg.norm(actual, axis=1) / np.linalg.norm(expected, axis=1)
+
+    assert actual.shape == expected.shape == (len(texts), encoder.get_sentence_embedding_dimension())
+    assert cosine.min() >= floor
+    assert np.allclose(encoder.encode(texts[0]), actual[0], atol=1e-5)
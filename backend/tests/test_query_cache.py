@@ -0,0 +1,62 @@
+import asyncio
+
+import numpy as np
+
+from src.services.cache import MemoryCache, QueryCache, normalize_query
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_query_folds_case_and_whitespace():
+    assert normalize_query("  Patience \t IN  Hardship ") == "patience in hardship"
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(maxsize=2)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    cache.get("a")
+    cache.set("c", b"3")
+
+    assert cache.get("a") == b"1"
+    assert cache.get("b") is None
+    assert cache.get("c") == b"3"
+
+
+def test_memory_cache_expires_entries():
+    clock = FakeClock()
+    cache = MemoryCache(ttl=10, clock=clock)
+    cache.set("a", b"1")
+
+    clock.now = 9.9
+    assert cache.get("a") == b"1"
+    clock.now = 10
+    assert cache.get("a") is None
+
+
+def test_query_cache_round_trips_and_counts():
+    cache = QueryCache(MemoryCache())
+
+    async def main():
+        assert await cache.get_embedding("Prayer", "test-model") is None
+        await cache.set_expansion("Prayer", "salah, prayer, dua")
+        await cache.set_embedding("Prayer", "test-model", [0.5, 0.25])
+
+        assert await cache.get_expansion(" prayer ") == "salah, prayer, dua"
+        hit, miss = await cache.get_embeddings(["PRAYER", "zakat"], "test-model")
+        assert np.array_equal(hit, np.array([0.5, 0.25], dtype=np.float32)) and miss is None
+        return await cache.stats()
+
+    assert asyncio.run(main()) == {
+        "expansion_hits": 1,
+        "expansion_misses": 0,
+        "embedding_hits": 1,
+        "embedding_misses": 2,
+        "size": 2,
+    }
@@ -0,0 +1,322 @@
+"""Serialization must cost a constant number of queries per response, whatever the page size.
+
+Needs a scratch Postgres database with pgvector (its tables are dropped and recreated):
+
+    TEST_DATABASE_URL=postgresql://localhost/baseera_test pytest tests/test_query_counts.py
+"""
+import os
+from contextlib import contextmanager
+
+import pytest
+
+DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+ENCODER_NAME = "hashing-encoder"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def fixed_search_paths():
+    # The trigram fallback adds a query only for under-filled pages; keep counts deterministic
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr("src.services.search.TEXT_SEARCH_FUZZY", False)
+        patch.setattr("src.services.search.VECTOR_SEARCH_BACKEND", "pgvector")
+        yield
+
+
+@pytest.fixture(scope="module")
+def app():
+    from fastapi import FastAPI
+    from sqlalchemy import create_engine, event, insert
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from benchmarks.fakes import FakeExpander, HashingEncoder
+    from src.api.routes import search, verses
+    from src.database import get_async_sessionmaker, get_db, get_search_sessionmaker
+    from src.models import (
+        Base, EmbeddingModel, Hadith, HadithCollection, Narrator, Surah, Topic, Verse, hadith_narrators, verse_topics
+    )
+    from src.services.cache import MemoryCache, QueryCache, get_query_cache
+    from src.services.chunking import index_chunks
+    from src.services.related import build_related
+    from src.services.embeddings import EmbeddingProvider, get_embedding_provider
+    from src.services.llm import get_ai_client
+    from src.services.surahs import surah_cache
+
+    encoder = HashingEncoder(ENCODER_NAME)
+    engine = create_engine(DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        model_id = conn.execute(
+            insert(EmbeddingModel).values(name=ENCODER_NAME, dimension=384, normalized=False, is_active=True)
+            .returning(EmbeddingModel.id)
+        ).scalar()
+        conn.execute(insert(Surah), [
+            {"id": 1, "name": "Al-Fatiha", "verses_count": 4, "is_makki": True},
+            {"id": 2, "name": "Al-Baqara", "verses_count": 4, "is_makki": False},
+        ])
+        verse_rows = [{"surah_id": s, "verse_number": n, "arabic": "صبر", "english": f"patience and prayer {s} {n}"}
+                      for s in (1, 2) for n in range(1, 5)]
+        conn.execute(insert(Verse), [
+            {**row, "embedding": e, "embedding_model_id": model_id}
+            for row, e in zip(verse_rows, encoder.encode([row["english"] for row in verse_rows]))
+        ])
+        conn.execute(insert(Topic), [{"id": 1, "name": "Prayer"}])
+        conn.execute(insert(verse_topics), [{"verse_id": verse_id, "topic_id": 1} for verse_id in (2, 7)])
+        conn.execute(insert(HadithCollection), [{"id": 1, "name": "Sahih Bukhari"}])
+        conn.execute(insert(Narrator), [{"id": 1, "name": "Aisha"}, {"id": 2, "name": "Abu Hurairah"}])
+        hadith_rows = [{"id": n, "collection_id": 1, "hadith_number": n, "english": f"patience in prayer {n}",
+                        "grading": "Sahih"} for n in range(1, 9)]
+        conn.execute(insert(Hadith), [
+            {**row, "embedding": e, "embedding_model_id": model_id}
+            for row, e in zip(hadith_rows, encoder.encode([row["english"] for row in hadith_rows]))
+        ])
+        conn.execute(insert(hadith_narrators), [{"hadith_id": n, "narrator_id": 1 + n % 2} for n in range(1, 9)])
+        # Longer than one chunk; what it is about only comes up at the end
+        long_english = " ".join(["the caravan travelled on through the night"] * 40) + " give charity to orphans"
+        conn.execute(insert(Hadith), [{
+            "id": 9, "collection_id": 1, "hadith_number": 9, "english": long_english, "grading": "Hasan",
+            "embedding": encoder.encode(long_english), "embedding_model_id": model_id,
+        }])
+    with sessionmaker(bind=engine)() as db:
+        index_chunks(db, encoder.encode, model_id)
+        build_related(db, model_id, k=3)
+        db.commit()
+
+    async_engine = create_async_engine(make_url(DATABASE_URL).set(drivername="postgresql+asyncpg"))
+    sessions = async_sessionmaker(async_engine, expire_on_commit=False)
+    SyncSession = sessionmaker(bind=engine)
+    provider = EmbeddingProvider(ENCODER_NAME, factory=lambda name: encoder)
+    provider.load(ENCODER_NAME, model_id, False)
+
+    def override_get_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(search.router)
+    app.include_router(verses.router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_sessionmaker] = lambda: sessions
+    app.dependency_overrides[get_search_sessionmaker] = lambda: sessions
+    app.dependency_overrides[get_embedding_provider] = lambda: provider
+    app.dependency_overrides[get_ai_client] = lambda: FakeExpander()
+    app.dependency_overrides[get_query_cache] = lambda: QueryCache(MemoryCache(maxsize=0))
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", count)
+
+    @contextmanager
+    def queries():
+        start = len(statements)
+        counted = []
+        yield counted
+        counted.extend(statements[start:])
+
+    app.state.queries = queries
+    app.state.engine = engine
+    app.state.async_engine = async_engine
+    surah_cache.invalidate()
+    yield app
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def client(app):
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as client:
+        # Warm the surah cache and connection pools so only per-request work is counted
+        client.get("/api/verses/")
+        client.get("/search", params={"q": "patience", "search_type": "text"})
+        yield client
+
+
+def _count(app, client, path, **params):
+    with app.state.queries() as counted:
+        response = client.get(path, params=params)
+    assert response.status_code == 200, response.text
+    return len(counted), response.json()
+
+
+def test_verse_list_is_one_query_for_any_page_size(app, client):
+    small, page = _count(app, client, "/api/verses/", limit=2)
+    large, full = _count(app, client, "/api/verses/", limit=8)
+
+    assert (small, large) == (1, 1)
+    assert len(page["results"]) == 2 and len(full["results"]) == 8
+    assert full["results"][0]["surah_name"] == "Al-Fatiha" and full["results"][-1]["surah_name"] == "Al-Baqara"
+
+
+def test_keyset_pages_walk_the_corpus_in_order(app, client):
+    seen, cursor = [], None
+    while True:
+        count, page = _count(app, client, "/api/verses/", limit=3, **({"cursor": cursor} if cursor else {}))
+        assert count == 1
+        seen += [(verse["surah_id"], verse["verse_number"]) for verse in page["results"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [(s, n) for s in (1, 2) for n in range(1, 5)]
+
+
+def test_export_streams_every_verse_as_ndjson(client):
+    import json
+
+    response = client.get("/api/verses/export")
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["surah_id"], row["verse_number"]) for row in rows] == [(s, n) for s in (1, 2) for n in range(1, 5)]
+    assert rows[0]["surah_name"] == "Al-Fatiha"
+
+
+def test_single_verse_is_one_query(app, client):
+    count, verse = _count(app, client, "/api/verses/1")
+
+    assert count == 1
+    assert verse["surah_name"] == "Al-Fatiha"
+
+
+@pytest.mark.parametrize("search_type, corpus, expected", [
+    ("text", "quran", 3),      # surah names, candidates, rows
+    ("semantic", "quran", 3),  # hnsw settings, candidates, rows
+    ("hybrid", "quran", 5),
+    ("hybrid", "hadith", 6),   # + narrators
+])
+def test_search_query_count_does_not_grow_with_results(app, client, search_type, corpus, expected):
+    small, few = _count(app, client, "/search", q="patience", search_type=search_type, corpus=corpus, limit=1)
+    large, many = _count(app, client, "/search", q="patience", search_type=search_type, corpus=corpus, limit=8)
+
+    assert (small, large) == (expected, expected)
+    assert few["count"] == 1 and many["count"] == 8
+
+
+def test_text_search_matches_surah_names_literally(client):
+    def surahs(q):
+        response = client.get("/search", params={"q": q, "search_type": "text", "corpus": "quran", "limit": 20})
+        return {result["surah_number"] for result in response.json()["results"]}
+
+    assert surahs("baqara") == {2}
+    assert surahs("%") == surahs("Al_Fatiha") == set()
+
+
+def test_verse_to_dict_does_not_lazy_load(app):
+    from sqlalchemy.orm import Session
+    from src.models import Verse
+
+    with Session(app.state.engine) as db, app.state.queries() as counted:
+        rows = [verse.to_dict() for verse in db.query(Verse).all()]
+
+    assert len(counted) == 1
+    assert {(row["surah_number"], row["surah_name"]) for row in rows} == {(1, "Al-Fatiha"), (2, "Al-Baqara")}
+
+
+def test_batch_semantic_search_is_one_pass_for_any_batch_size(app, client):
+    def post(queries):
+        with app.state.queries() as counted:
+            response = client.post("/search/batch", json={"queries": queries, "search_type": "semantic", "limit": 3})
+        assert response.status_code == 200, response.text
+        return len(counted), response.json()["results"]
+
+    one, [single] = post(["patience"])
+    many, batch = post(["patience", "prayer 2 3", "Patience ", "mercy"])
+
+    assert one == many == 3  # hnsw settings, every query's candidates, rows
+    assert [item["query"] for item in batch] == ["patience", "prayer 2 3", "Patience ", "mercy"]
+    assert batch[0] == single and batch[2]["results"] == single["results"]
+    assert all(item["count"] == 3 for item in batch)
+
+
+def test_degraded_batches_are_not_stored(client, monkeypatch):
+    from src.services.llm import Expansion
+
+    def post():
+        response = client.post("/search/batch", json={"queries": ["patience", "prayer"], "search_type": "semantic"})
+        assert response.status_code == 200, response.text
+        return response.headers.get("cache-control")
+
+    assert post() is None
+
+    async def late(self, query):
+        return Expansion(query, False)
+
+    monkeypatch.setattr("src.services.search.SearchService._expansion", late)
+    assert post() == "no-store"
+
+
+def test_long_hadith_is_found_by_its_best_chunk(app, client):
+    count, page = _count(app, client, "/search", q="orphans", search_type="semantic", corpus="hadith", limit=3)
+
+    assert count == 4  # hnsw settings, row and chunk candidates, rows, narrators
+    [best, *rest] = page["results"]
+    assert best["id"] == 9 and best["passage"].endswith("give charity to orphans")
+    assert len(best["passage"]) < len(best["english"])
+    assert 9 not in [result["id"] for result in rest]
+    assert all(result["passage"] is None for result in rest)
+
+
+def test_related_verses_are_one_lookup_plus_hydration(app, client):
+    count, page = _count(app, client, "/api/verses/1/related", limit=6)
+    verses_only, only = _count(app, client, "/api/verses/1/related", source="quran")
+
+    assert count == 4  # neighbours, verses, hadiths, narrators
+    assert {result["source"] for result in page["results"]} == {"quran", "hadith"}
+    assert [result["score"] for result in page["results"]] == sorted((r["score"] for r in page["results"]), reverse=True)
+    assert verses_only == 2 and only["count"] == 3
+    assert 1 not in [result["id"] for result in only["results"]]
+    assert client.get("/api/verses/999/related").status_code == 404
+
+
+@pytest.mark.parametrize("backend", ["pgvector", "memory"])
+@pytest.mark.parametrize("filters, expected", [
+    ({"surah_from": 2}, {(2, n) for n in range(1, 5)}),
+    ({"surah_to": 1, "revelation": "makki"}, {(1, n) for n in range(1, 5)}),
+    ({"revelation": "madani", "topic_id": 1}, {(2, 3)}),
+])
+def test_semantic_search_filters_verses_before_ranking(app, client, monkeypatch, backend, filters, expected):
+    monkeypatch.setattr("src.services.search.VECTOR_SEARCH_BACKEND", backend)
+
+    for search_type in ("semantic", "text"):
+        _, page = _count(app, client, "/search", q="patience", search_type=search_type, limit=8, **filters)
+        assert {(result["surah_number"], result["verse_number"]) for result in page["results"]} == expected
+
+
+def test_narrow_filters_are_not_starved_by_the_hnsw_candidate_list(app, client, monkeypatch):
+    from sqlalchemy import event
+
+    # One HNSW candidate per query, and the index used even on a table this small:
+    # filtering that candidate afterwards would almost always leave nothing
+    monkeypatch.setattr("src.services.search.PGVECTOR_EF_SEARCH", 1)
+
+    def prefer_indexes(conn):
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+
+    event.listen(app.state.async_engine.sync_engine, "begin", prefer_indexes)
+    try:
+        for q in ("patience", "mercy", "prayer"):
+            response = client.get("/search", params={
+                "q": q, "search_type": "semantic", "limit": 1, "revelation": "madani", "topic_id": 1,
+            })
+            assert [(r["surah_number"], r["verse_number"]) for r in response.json()["results"]] == [(2, 3)]
+    finally:
+        event.remove(app.state.async_engine.sync_engine, "begin", prefer_indexes)
+
+
+def test_verse_filters_leave_hadiths_out(client):
+    response = client.get("/search", params={"q": "patience", "corpus": "all", "surah_from": 2})
+
+    assert {result["source"] for result in response.json()["results"]} == {"quran"}
@@ -0,0 +1,34 @@
+import numpy as np
+
+from src.services.related import affected, nearest
+from src.services.vector_index import VectorIndex
+
+
+def index(vectors, ids=None):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return VectorIndex.from_rows(zip(ids or range(1, len(vectors) + 1), vectors))
+
+
+def test_blocked_neighbours_match_a_full_scan_and_skip_the_verse_itself():
+    rng = np.random.default_rng(0)
+    verses = index(rng.normal(size=(50, 8)))
+
+    blocked = dict(nearest(verses, verses.ids, verses.matrix, k=5, exclude_self=True, block=7))
+
+    scores = verses.matrix @ verses.matrix.T
+    np.fill_diagonal(scores, -np.inf)
+    for position, verse_id in enumerate(verses.ids.tolist()):
+        expected = verses.ids[np.argsort(-scores[position])[:5]].tolist()
+        assert [hit_id for hit_id, _ in blocked[verse_id]] == expected
+
+
+def test_a_changed_row_only_affects_verses_whose_kth_neighbour_it_beats():
+    verses = index([[1, 0], [0, 1]])
+    hadiths = index([[1, 0.1]], ids=[7])
+
+    # Verse 1 points the same way as hadith 7; verse 2 already has a neighbour closer than it
+    found = affected(verses, "hadith", hadiths, {7}, floor={1: 0.5, 2: 0.5})
+
+    assert found == {1}
+    assert affected(verses, "hadith", hadiths, {7}, floor={1: 0.5}) == {1, 2}  # verse 2's list is short
+    assert affected(verses, "quran", verses, {1}, floor={1: 0.9, 2: 0.9}) == set()  # never its own neighbour
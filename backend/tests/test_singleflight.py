@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fakes import FakeExpander, HashingEncoder
+from src.services.cache import MemoryCache, QueryCache
+from src.services.embeddings import EmbeddingProvider
+from src.services.search import SearchService
+from src.services.singleflight import SingleFlight
+
+
+class Work:
+    def __init__(self, delay=0.02, fail=False):
+        self.delay, self.fail = delay, fail
+        self.calls = self.cancelled = 0
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise ValueError("boom")
+        return ["result"]
+
+
+def test_identical_concurrent_calls_share_one_execution():
+    flights, work = SingleFlight("test-share"), Work()
+
+    async def main():
+        return await asyncio.gather(*(flights.do("key", work) for _ in range(5)), flights.do("other", work))
+
+    results = asyncio.run(main())
+
+    assert work.calls == 2
+    assert results[:5] == [["result"]] * 5 and results[0] is results[4]
+    assert flights.stats() == {"leaders": 2, "shared": 4, "ratio": 4 / 6}
+    assert len(flights) == 0
+
+
+def test_a_cancelled_caller_does_not_cancel_the_others():
+    flights, work = SingleFlight("test-cancel-one"), Work()
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do("key", work))
+        await asyncio.sleep(0.005)
+        leader.cancel()
+        return await follower, leader.cancelled()
+
+    assert asyncio.run(main()) == (["result"], True)
+    assert work.calls == 1 and work.cancelled == 0
+
+
+def test_work_is_cancelled_once_every_caller_is_gone():
+    flights, work = SingleFlight("test-cancel-all"), Work(delay=1)
+
+    async def main():
+        callers = [asyncio.ensure_future(flights.do("key", work)) for _ in range(2)]
+        await asyncio.sleep(0.005)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+
+    assert work.cancelled == 1 and len(flights) == 0
+
+
+def test_errors_reach_every_caller_and_are_not_remembered():
+    flights, work = SingleFlight("test-errors"), Work(fail=True)
+
+    async def main():
+        results = await asyncio.gather(flights.do("key", work), flights.do("key", work), return_exceptions=True)
+        work.fail = False
+        return results, await flights.do("key", work)
+
+    (first, second), retry = asyncio.run(main())
+
+    assert isinstance(first, ValueError) and first is second
+    assert retry == ["result"] and work.calls == 2
+
+
+@pytest.mark.parametrize("coalesce, calls", [(True, 1), (False, 3)])
+def test_concurrent_searches_expand_a_query_once(monkeypatch, coalesce, calls):
+    monkeypatch.setattr("src.services.search.SEARCH_COALESCE", coalesce)
+    provider = EmbeddingProvider("hashing-encoder", factory=HashingEncoder)
+    loaded = provider.load()
+    client = FakeExpander(latency=0.02)
+    service = SearchService(None, provider, client, QueryCache(MemoryCache(maxsize=0)))
+
+    async def main():
+        return await asyncio.gather(*(service._embed_queries([query], loaded) for query in ("mercy", "Mercy ", "mercy")))
+
+    embeddings = asyncio.run(main())
+
+    assert client.calls == calls
+    assert all((embedding == embeddings[0]).all() for embedding in embeddings)
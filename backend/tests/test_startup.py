@@ -0,0 +1,10 @@
+from scripts.check_import_time import heavy, profile
+
+
+def test_app_import_needs_no_database_and_leaves_heavy_packages_alone():
+    # Nothing listens on port 1: importing the app must not connect (schema comes from alembic)
+    url = "postgresql://nobody@127.0.0.1:1/none"
+    result = profile("main", env={"DATABASE_URL": url, "SEARCH_DATABASE_URL": url})
+
+    assert heavy(result.modules) == set()
+    assert {"main", "src.api.routes.search", "src.services.embeddings"} <= result.modules
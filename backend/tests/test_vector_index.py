@@ -0,0 +1,114 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from src.services.vector_index import VectorIndex
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_search_returns_top_k_by_cosine_similarity():
+    index = VectorIndex.from_rows([
+        (1, [1.0, 0.0]),
+        (2, [0.0, 3.0]),
+        (3, [2.0, 2.0]),
+        (4, None),
+    ])
+
+    hits = index.search([1.0, 0.1], k=2)
+
+    assert len(index) == 3
+    assert [verse_id for verse_id, _ in hits] == [1, 3]
+    assert np.isclose(hits[0][1], 1.0 / np.sqrt(1.01), atol=1e-6)
+
+
+def test_search_matches_brute_force():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(200, 16))
+    index = VectorIndex.from_rows(enumerate(vectors.tolist(), start=1))
+    query = rng.normal(size=16)
+
+    expected = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+    expected_ids = (np.argsort(-expected)[:5] + 1).tolist()
+
+    assert [verse_id for verse_id, _ in index.search(query, k=5)] == expected_ids
+
+
+def test_empty_index_returns_no_hits():
+    assert VectorIndex.from_rows([]).search([1.0, 0.0]) == []
+
+
+def test_allowed_ids_restrict_the_search_exactly():
+    index = VectorIndex.from_rows([
+        (1, [1.0, 0.0]),
+        (2, [0.9, 0.1]),
+        (3, [0.0, 1.0]),
+    ])
+
+    assert [hadith_id for hadith_id, _ in index.search([1.0, 0.0], k=2, allowed_ids=[3, 2])] == [2, 3]
+    assert index.search([1.0, 0.0], k=2, allowed_ids=[]) == []
+
+
+def test_search_many_matches_brute_force_per_query():
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(300, 16))
+    index = VectorIndex.from_rows(enumerate(vectors.tolist(), start=1))
+    queries = rng.normal(size=(5, 16))
+    queries[2] = 0.0
+    allowed = np.arange(1, 301, 3)
+
+    batched = index.search_many(queries, k=7, allowed_ids=allowed.tolist())
+
+    assert batched[2] == []
+    unit = vectors[allowed - 1] / np.linalg.norm(vectors[allowed - 1], axis=1, keepdims=True)
+    for query, hits in zip(queries[[0, 1, 3, 4]], batched[:2] + batched[3:]):
+        expected = allowed[np.argsort(-(unit @ query))[:7]].tolist()
+        assert [doc_id for doc_id, _ in hits] == expected
+
+
+def test_mask_scores_only_the_allowed_rows():
+    from src.services.embedding_snapshot import quantize
+    from src.services.vector_index import QuantizedVectorIndex
+
+    class CountingIndex(QuantizedVectorIndex):
+        scored = []
+
+        def _scores(self, queries, rows=None):
+            self.scored.append(len(self) if rows is None else len(rows))
+            return super()._scores(queries, rows)
+
+    rng = np.random.default_rng(1)
+    index = VectorIndex.from_rows(enumerate(rng.normal(size=(100, 8)).tolist(), start=1))
+    quantized = CountingIndex(index.ids, index.matrix, *quantize(index.matrix, "int8"), rerank=4)
+    mask = index.ids % 3 == 0
+    queries = rng.normal(size=(2, 8))
+
+    expected = index.search_many(queries, k=4, allowed_ids=index.ids[mask].tolist())
+
+    assert index.search_many(queries, k=4, mask=mask) == expected
+    assert [[row_id for row_id, _ in hits] for hits in quantized.search_many(queries, k=4, mask=mask)] == \
+        [[row_id for row_id, _ in hits] for hits in expected]
+    assert quantized.scored == [mask.sum()]
+
+
+def test_memory_backend_schema_needs_no_pgvector():
+    # Column types are fixed when src.models is imported, so check them in a fresh interpreter
+    script = """
+import numpy as np
+from sqlalchemy.dialects import postgresql
+from src.models import Base, Verse
+
+types = {table.name: table.c.embedding.type.compile(dialect=postgresql.dialect())
+         for table in Base.metadata.sorted_tables if "embedding" in table.c}
+assert len(types) == 5 and set(types.values()) == {"FLOAT[]"}, types
+assert not [index for table in Base.metadata.sorted_tables for index in table.indexes
+            if index.dialect_options["postgresql"]["using"] == "hnsw"]
+bind = Verse.embedding.type.bind_processor(postgresql.dialect())
+assert bind(np.array([1, 2], dtype=np.float32)) == [1.0, 2.0]
+"""
+    env = {**os.environ, "VECTOR_SEARCH_BACKEND": "memory"}
+    result = subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,43 @@
+import pytest
+from fastapi import HTTPException
+
+from src.api.routes.verses import decode_cursor, encode_cursor
+from src.services.surahs import SurahCache, SurahInfo, surah_name
+
+
+def test_cursor_round_trips_and_is_opaque():
+    cursor = encode_cursor(2, 255)
+
+    assert decode_cursor(cursor) == (2, 255)
+    assert "255" not in cursor and "=" not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(1, 2)[:-3], "WzFd"])
+def test_malformed_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+
+    assert error.value.status_code == 400
+
+
+def test_verse_without_a_known_surah_has_no_surah_name():
+    surahs = {1: SurahInfo(1, "Al-Fatiha", "الفاتحة", True, 7)}
+
+    assert surah_name(surahs, 1) == "Al-Fatiha"
+    assert surah_name(surahs, None) is None
+    assert surah_name(surahs, 115) is None
+
+
+def test_null_surah_ids_do_not_reload_the_surah_cache():
+    class Session:
+        loads = 0
+
+        def execute(self, query):
+            Session.loads += 1
+            return type("Result", (), {"all": lambda self: [(1, "Al-Fatiha", "الفاتحة", True, 7)]})()
+
+    cache = SurahCache()
+    cache.get(Session(), {1})
+    cache.get(Session(), {1, None})
+
+    assert Session.loads == 1
@@ -3,6 +3,7 @@
 # Start backend
 cd backend
 source venv/bin/activate
+alembic upgrade head
 python main.py &
 
 # Start frontend